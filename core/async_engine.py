@@ -0,0 +1,305 @@
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from core.tts_engine import TTSEngine, AudioChunk, write_wav
+
+# Marcadores internos da fila de trabalhos e dos trechos de streaming
+_STOP = object()
+_END = object()
+
+# Intervalo em que uma thread bloqueada por um consumidor lento verifica o cancelamento
+_CANCEL_POLL_SECONDS = 0.1
+
+
+@dataclass
+class _Job:
+    """Requisição enfileirada para as threads de inferência"""
+    kwargs: Dict[str, Any]
+    loop: asyncio.AbstractEventLoop
+    future: Optional[asyncio.Future] = None
+    chunks: Optional[asyncio.Queue] = None
+    output_path: Optional[str] = None
+    cancelled: threading.Event = field(default_factory=threading.Event)
+
+
+class AsyncTTSEngine:
+    """
+    Fachada asyncio para o TTSEngine.
+
+    As requisições entram em uma fila limitada e são atendidas por threads
+    de inferência dedicadas, sem bloquear o event loop. Quando a fila está
+    cheia, synthesize() e stream() aguardam uma vaga (contrapressão). Se a
+    corrotina que aguarda for cancelada, a requisição ainda na fila é
+    descartada e um streaming em andamento para na próxima sentença; uma
+    síntese que já está no modelo termina e o resultado é descartado. No
+    streaming, a thread espera o consumidor quando há max_buffered_chunks
+    trechos não consumidos.
+
+    Com mais de uma thread, a inferência de um mesmo modelo XTTS continua
+    serializada pelo TTSEngine (o GPT guarda estado por chamada); as
+    threads extras atendem acertos de cache, gravação de arquivos e
+    requisições de outros modelos enquanto uma síntese ocupa o modelo.
+    """
+
+    def __init__(self,
+                 engine: Optional[TTSEngine] = None,
+                 workers: int = 1,
+                 max_queue_size: int = 32,
+                 max_buffered_chunks: int = 2):
+        """
+        Args:
+            engine: TTSEngine a usar (padrão: um novo TTSEngine)
+            workers: Número de threads de inferência (a inferência de cada modelo XTTS é serializada)
+            max_queue_size: Número máximo de requisições aguardando uma thread
+            max_buffered_chunks: Trechos de um streaming prontos e ainda não consumidos; com a
+                fila cheia a síntese espera o consumidor
+        """
+        self.engine = engine or TTSEngine()
+        self.workers = max(1, workers)
+        self.max_queue_size = max(1, max_queue_size)
+        self.max_buffered_chunks = max(1, max_buffered_chunks)
+        self.logger = logging.getLogger(__name__)
+
+        self._jobs = queue.Queue()
+        self._slots = asyncio.Semaphore(self.max_queue_size)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._running = 0
+        self._stats = {"submitted": 0, "completed": 0, "cancelled": 0, "failed": 0}
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"tts-inference-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    @staticmethod
+    def _deliver(loop: asyncio.AbstractEventLoop, callback, *args):
+        """Agenda um callback no event loop da requisição (ignorado se o loop já foi fechado)"""
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass
+
+    @staticmethod
+    def _set_result(future: asyncio.Future, result):
+        if not future.done():
+            future.set_result(result)
+
+    @staticmethod
+    def _set_exception(future: asyncio.Future, error: BaseException):
+        if not future.done():
+            future.set_exception(error)
+
+    def _worker(self):
+        """Laço das threads de inferência"""
+        while True:
+            job = self._jobs.get()
+            if job is _STOP:
+                break
+            # A vaga na fila é liberada assim que o trabalho sai dela
+            self._deliver(job.loop, self._slots.release)
+
+            if job.cancelled.is_set():
+                self._count("cancelled")
+                continue
+
+            with self._lock:
+                self._running += 1
+            try:
+                if job.chunks is None:
+                    self._run_synthesize(job)
+                else:
+                    self._run_stream(job)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+    def _run_synthesize(self, job: _Job):
+        try:
+            wav, sample_rate = self.engine._synthesize_cached(**job.kwargs)
+            if job.output_path:
+                write_wav(job.output_path, wav, sample_rate)
+            result = AudioChunk(audio=wav, sample_rate=sample_rate, index=0, text=job.kwargs["text"])
+        except Exception as e:
+            self.logger.error(f"Erro na síntese assíncrona: {e}")
+            self._count("failed")
+            self._deliver(job.loop, self._set_exception, job.future, e)
+            return
+
+        self._count("cancelled" if job.cancelled.is_set() else "completed")
+        self._deliver(job.loop, self._set_result, job.future, result)
+
+    @staticmethod
+    def _put_chunk(job: _Job, item) -> bool:
+        """
+        Entrega um item ao consumidor do streaming, aguardando vaga na fila
+
+        Returns:
+            False se o consumidor desistiu (cancelamento, aclose() ou loop encerrado)
+        """
+        try:
+            future = asyncio.run_coroutine_threadsafe(job.chunks.put(item), job.loop)
+        except RuntimeError:
+            return False
+        while True:
+            try:
+                future.result(timeout=_CANCEL_POLL_SECONDS)
+                return True
+            except FutureTimeoutError:
+                if job.cancelled.is_set() or job.loop.is_closed():
+                    future.cancel()
+                    return False
+
+    def _run_stream(self, job: _Job):
+        stream = self.engine.generate_speech_stream(**job.kwargs)
+        consumer_gone = False
+        try:
+            for chunk in stream:
+                if job.cancelled.is_set() or not self._put_chunk(job, chunk):
+                    consumer_gone = True
+                    break
+        except Exception as e:
+            self.logger.error(f"Erro no streaming assíncrono: {e}")
+            self._count("failed")
+            self._put_chunk(job, e)
+            return
+        finally:
+            # Interrompe a síntese das sentenças restantes se o consumidor desistiu
+            stream.close()
+
+        if consumer_gone or job.cancelled.is_set():
+            self._count("cancelled")
+            return
+        self._count("completed")
+        self._put_chunk(job, _END)
+
+    async def _submit(self, job: _Job):
+        """Enfileira o trabalho, aguardando uma vaga se a fila estiver cheia"""
+        self._ensure_started()
+        await self._slots.acquire()
+        self._jobs.put(job)
+        self._count("submitted")
+
+    async def synthesize(self,
+                         text: str,
+                         speaker_wav: Optional[str] = None,
+                         language: Optional[str] = None,
+                         model_name: Optional[str] = None,
+                         speed: float = 1.0,
+                         sampling_params: Optional[Dict] = None,
+                         output_path: Optional[str] = None) -> AudioChunk:
+        """
+        Sintetiza o texto sem bloquear o event loop
+
+        Args:
+            text: Texto para sintetizar
+            speaker_wav: Arquivo de áudio do speaker para clonagem de voz (opcional)
+            language: Código do idioma (opcional)
+            model_name: Modelo a usar nesta requisição (opcional, padrão: modelo atual)
+            speed: Velocidade da fala
+            sampling_params: Parâmetros de amostragem do XTTS (opcional)
+            output_path: Se informado, o áudio também é salvo neste arquivo WAV
+
+        Returns:
+            AudioChunk com o PCM float32 do texto inteiro
+        """
+        loop = asyncio.get_running_loop()
+        job = _Job(
+            kwargs={
+                "text": text,
+                "speaker_wav": speaker_wav,
+                "language": language,
+                "model_name": model_name,
+                "speed": speed,
+                "sampling_params": sampling_params
+            },
+            loop=loop,
+            future=loop.create_future(),
+            output_path=output_path
+        )
+        await self._submit(job)
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            job.cancelled.set()
+            raise
+
+    async def stream(self,
+                     text: str,
+                     speaker_wav: Optional[str] = None,
+                     language: Optional[str] = None,
+                     model_name: Optional[str] = None,
+                     speed: float = 1.0,
+                     sampling_params: Optional[Dict] = None) -> AsyncIterator[AudioChunk]:
+        """
+        Gera fala sentença por sentença sem bloquear o event loop
+
+        Yields:
+            AudioChunk de cada sentença, na ordem do texto
+        """
+        job = _Job(
+            kwargs={
+                "text": text,
+                "speaker_wav": speaker_wav,
+                "language": language,
+                "model_name": model_name,
+                "speed": speed,
+                "sampling_params": sampling_params
+            },
+            loop=asyncio.get_running_loop(),
+            chunks=asyncio.Queue(maxsize=self.max_buffered_chunks)
+        )
+        await self._submit(job)
+        try:
+            while True:
+                item = await job.chunks.get()
+                if item is _END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Cancelamento ou aclose(): a thread para na próxima sentença
+            job.cancelled.set()
+
+    @property
+    def queue_depth(self) -> int:
+        """Número de requisições aguardando uma thread de inferência"""
+        return self._jobs.qsize()
+
+    def get_stats(self) -> Dict:
+        """Retorna profundidade da fila, requisições em execução e contadores"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["running"] = self._running
+        stats["queue_depth"] = self.queue_depth
+        stats["max_queue_size"] = self.max_queue_size
+        stats["workers"] = self.workers
+        return stats
+
+    async def close(self):
+        """Encerra as threads de inferência após os trabalhos já enfileirados"""
+        threads, self._threads = self._threads, []
+        for _ in threads:
+            self._jobs.put(_STOP)
+        loop = asyncio.get_running_loop()
+        for thread in threads:
+            await loop.run_in_executor(None, thread.join)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,213 @@
+import io
+import queue
+import logging
+import threading
+from typing import BinaryIO, Dict, Iterable, List, Optional, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Formatos de saída: container/codec do libsndfile e extensão do arquivo
+ENCODING_FORMATS = {
+    "opus": {"format": "OGG", "subtype": "OPUS", "extension": "ogg"},
+    "vorbis": {"format": "OGG", "subtype": "VORBIS", "extension": "ogg"},
+    "flac": {"format": "FLAC", "subtype": "PCM_16", "extension": "flac"},
+}
+
+# Taxa de saída padrão: a nativa do Opus (notas de voz do WhatsApp)
+DEFAULT_ENCODING_RATE = 48000
+
+# Taxas aceitas pelo codificador Opus
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+_END = object()
+
+Output = Union[str, BinaryIO]
+
+
+class StreamingEncoder:
+    """
+    Reamostra e codifica áudio de forma incremental.
+
+    Cada trecho recebido passa por um único reamostrador em streaming (soxr)
+    e é gravado em todos os formatos pedidos, sem reler o áudio nem
+    processar o arquivo inteiro no final.
+    """
+
+    def __init__(self, outputs: Dict[str, Output], input_rate: int, output_rate: int = DEFAULT_ENCODING_RATE):
+        """
+        Args:
+            outputs: Formato ("opus", "vorbis", "flac") -> caminho ou arquivo binário de saída
+            input_rate: Taxa de amostragem do modelo
+            output_rate: Taxa de amostragem dos arquivos codificados
+        """
+        import soxr
+        import soundfile as sf
+
+        if not outputs:
+            raise ValueError("Nenhum formato de saída informado")
+        for name in outputs:
+            if name not in ENCODING_FORMATS:
+                raise ValueError(f"Formato de saída não suportado: {name}")
+        if "opus" in outputs and output_rate not in OPUS_SAMPLE_RATES:
+            raise ValueError(f"Taxa de amostragem não suportada pelo Opus: {output_rate}")
+
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.samples_written = 0
+        self._resampler = None
+        if input_rate != output_rate:
+            self._resampler = soxr.ResampleStream(input_rate, output_rate, 1, dtype="float32", quality="HQ")
+
+        self._files: Dict[str, "sf.SoundFile"] = {}
+        try:
+            for name, target in outputs.items():
+                spec = ENCODING_FORMATS[name]
+                self._files[name] = sf.SoundFile(target, mode="w", samplerate=output_rate, channels=1,
+                                                 format=spec["format"], subtype=spec["subtype"])
+        except Exception:
+            self._close_files()
+            raise
+
+    def _write_resampled(self, wav: np.ndarray):
+        if wav.size == 0:
+            return
+        # Sem o peak global (o áudio ainda está sendo gerado): apenas limita a faixa
+        np.clip(wav, -1.0, 1.0, out=wav)
+        for sound_file in self._files.values():
+            sound_file.write(wav)
+        self.samples_written += wav.size
+
+    def write(self, wav: np.ndarray):
+        """Reamostra e codifica um trecho de PCM float32 na taxa de entrada"""
+        wav = np.asarray(wav, dtype=np.float32).reshape(-1)
+        if self._resampler is not None:
+            wav = self._resampler.resample_chunk(wav)
+        else:
+            wav = wav.copy()
+        self._write_resampled(wav)
+
+    def _close_files(self):
+        for sound_file in self._files.values():
+            try:
+                sound_file.close()
+            except Exception as e:
+                logger.warning(f"Erro ao fechar arquivo codificado: {e}")
+
+    def close(self):
+        """Esvazia o reamostrador e finaliza os arquivos"""
+        try:
+            if self._resampler is not None:
+                self._write_resampled(self._resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True))
+        finally:
+            self._close_files()
+
+    @property
+    def duration(self) -> float:
+        """Duração codificada até o momento, em segundos"""
+        return self.samples_written / self.output_rate
+
+
+class EncodingPipeline:
+    """
+    Etapa de codificação em uma thread própria.
+
+    Os trechos entregues por feed() entram em uma fila limitada e são
+    codificados enquanto o próximo trecho é sintetizado, de modo que a
+    codificação se sobrepõe à síntese.
+    """
+
+    def __init__(self, outputs: Dict[str, Output], output_rate: int = DEFAULT_ENCODING_RATE, max_pending: int = 8):
+        """
+        Args:
+            outputs: Formato -> caminho ou arquivo binário de saída
+            output_rate: Taxa de amostragem dos arquivos codificados
+            max_pending: Número máximo de trechos aguardando codificação
+        """
+        self.outputs = outputs
+        self.output_rate = output_rate
+        self._pending = queue.Queue(maxsize=max(1, max_pending))
+        self._encoder: Optional[StreamingEncoder] = None
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="tts-encoder", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._pending.get()
+            if item is _END:
+                break
+            if self._error is not None:
+                # Após um erro a fila continua sendo esvaziada, para não travar quem produz
+                continue
+            wav, sample_rate = item
+            try:
+                if self._encoder is None:
+                    self._encoder = StreamingEncoder(self.outputs, sample_rate, self.output_rate)
+                elif sample_rate != self._encoder.input_rate:
+                    raise ValueError("Taxa de amostragem mudou durante o streaming")
+                self._encoder.write(wav)
+            except Exception as e:
+                self._error = e
+
+        if self._encoder is not None:
+            try:
+                self._encoder.close()
+            except Exception as e:
+                self._error = self._error or e
+
+    def feed(self, wav: np.ndarray, sample_rate: int):
+        """Enfileira um trecho para codificação (aguarda se a fila estiver cheia)"""
+        if self._error is not None:
+            raise self._error
+        self._pending.put((wav, sample_rate))
+
+    def finish(self) -> float:
+        """
+        Aguarda a codificação dos trechos pendentes e finaliza os arquivos
+
+        Returns:
+            Duração do áudio codificado em segundos
+        """
+        self._pending.put(_END)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        if self._encoder is None:
+            raise ValueError("Nenhum áudio foi gerado para codificar")
+        return self._encoder.duration
+
+
+def encode_chunks(chunks: Iterable,
+                  formats: List[str],
+                  output_paths: Optional[Dict[str, str]] = None,
+                  output_rate: int = DEFAULT_ENCODING_RATE) -> Dict[str, Union[str, bytes]]:
+    """
+    Codifica os trechos de uma síntese em streaming em um ou mais formatos
+
+    Args:
+        chunks: Iterável de AudioChunk (ex: TTSEngine.generate_speech_stream)
+        formats: Formatos de saída ("opus", "vorbis", "flac")
+        output_paths: Formato -> caminho do arquivo; formatos sem caminho são codificados em memória
+        output_rate: Taxa de amostragem dos arquivos codificados
+
+    Returns:
+        Formato -> caminho do arquivo gravado ou bytes codificados
+    """
+    output_paths = output_paths or {}
+    outputs: Dict[str, Output] = {name: output_paths.get(name) or io.BytesIO() for name in formats}
+
+    pipeline = EncodingPipeline(outputs, output_rate)
+    try:
+        for chunk in chunks:
+            pipeline.feed(chunk.audio, chunk.sample_rate)
+    except BaseException:
+        try:
+            pipeline.finish()
+        except Exception:
+            pass
+        raise
+    duration = pipeline.finish()
+
+    logger.info(f"Áudio codificado ({', '.join(formats)}, {output_rate} Hz): {duration:.1f}s")
+    return {name: target if isinstance(target, str) else target.getvalue() for name, target in outputs.items()}
@@ -0,0 +1,114 @@
+import logging
+from typing import Optional
+import torch
+from torch import nn
+
+logger = logging.getLogger(__name__)
+
+# Quadros do decodificador por janela; com o contexto, cada janela tem 512
+# quadros, um dos buckets do modo compilado (core.compilation)
+DEFAULT_WINDOW = 464
+
+# Quadros de contexto de cada lado da janela; cobrem o campo receptivo do
+# HiFi-GAN (~14 quadros nas configurações do XTTS e do VITS), de modo que a
+# saída de cada janela coincide com a do decodificador sobre a sequência inteira
+DEFAULT_CONTEXT = 24
+
+# Quadros em que janelas vizinhas se sobrepõem na saída (overlap-add com rampas lineares)
+DEFAULT_OVERLAP = 4
+
+
+class ChunkedDecoder(nn.Module):
+    """
+    Decodificador HiFi-GAN executado em janelas sobrepostas.
+
+    A sequência de latentes é dividida em janelas de comprimento fixo, cada
+    uma estendida com quadros de contexto dos dois lados. A saída de cada
+    janela é cortada para a sua região e somada à saída com rampas
+    complementares na sobreposição. A memória das ativações intermediárias
+    depende apenas do tamanho da janela, não do comprimento do texto; apenas
+    a forma de onda final é alocada por inteiro. Sequências que cabem em uma
+    janela usam o decodificador diretamente.
+    """
+
+    def __init__(self,
+                 decoder: nn.Module,
+                 window: int = DEFAULT_WINDOW,
+                 context: int = DEFAULT_CONTEXT,
+                 overlap: int = DEFAULT_OVERLAP):
+        """
+        Args:
+            decoder: Decodificador original (HifiganGenerator ou BucketedDecoder)
+            window: Quadros do decodificador por janela
+            context: Quadros de contexto adicionados de cada lado da janela
+            overlap: Quadros de sobreposição entre janelas na saída (no máximo context)
+        """
+        super().__init__()
+        if window <= 2 * overlap:
+            raise ValueError(f"Janela muito pequena ({window}) para a sobreposição de {overlap} quadros")
+        if overlap > context:
+            raise ValueError("A sobreposição não pode ser maior que o contexto")
+        self.decoder = decoder
+        self.window = window
+        self.context = context
+        self.overlap = overlap
+
+    def forward(self, x: torch.Tensor, g: Optional[torch.Tensor] = None) -> torch.Tensor:
+        length = x.shape[-1]
+        if length <= self.window + 2 * self.context:
+            return self.decoder(x, g=g)
+
+        # Um resto menor que a sobreposição é incorporado à última janela
+        bounds = list(range(0, length, self.window)) + [length]
+        if bounds[-1] - bounds[-2] < self.overlap:
+            del bounds[-2]
+
+        output = None
+        hop = None
+        ramp = None
+        for start, end in zip(bounds, bounds[1:]):
+            # Região da saída desta janela (com a sobreposição) e entrada com o contexto
+            out_start = max(0, start - self.overlap)
+            out_end = min(length, end + self.overlap)
+            in_start = max(0, start - self.context)
+            in_end = min(length, end + self.context)
+
+            chunk = self.decoder(x[..., in_start:in_end], g=g)
+            if output is None:
+                hop = chunk.shape[-1] // (in_end - in_start)
+                output = chunk.new_zeros(*chunk.shape[:-1], length * hop)
+                # Rampa de 0 a 1 sobre os 2 * overlap quadros em torno de cada fronteira
+                fade = 2 * self.overlap * hop
+                ramp = (torch.arange(fade, device=chunk.device, dtype=chunk.dtype) + 0.5) / fade
+
+            piece = chunk[..., (out_start - in_start) * hop:(out_end - in_start) * hop]
+            if self.overlap:
+                piece = piece.clone()
+                fade = ramp.shape[-1]
+                if start > 0:
+                    piece[..., :fade] *= ramp
+                if end < length:
+                    piece[..., -fade:] *= ramp.flip(0)
+            output[..., out_start * hop:out_end * hop] += piece
+        return output
+
+
+def install_chunked_decoder(owner: nn.Module,
+                            window: int = DEFAULT_WINDOW,
+                            context: int = DEFAULT_CONTEXT,
+                            overlap: int = DEFAULT_OVERLAP) -> bool:
+    """
+    Faz o waveform_decoder de um modelo (Vits ou HifiDecoder do XTTS) decodificar em janelas
+
+    Returns:
+        True se instalado (False se o modelo não tiver waveform_decoder, ex: backend ONNX)
+    """
+    decoder = getattr(owner, "waveform_decoder", None)
+    if decoder is None:
+        return False
+    if isinstance(decoder, ChunkedDecoder):
+        decoder.window, decoder.context, decoder.overlap = window, context, overlap
+        return True
+    owner.waveform_decoder = ChunkedDecoder(decoder, window=window, context=context, overlap=overlap)
+    logger.info(f"Decodificação em janelas de {window} quadros ativada ({type(owner).__name__})")
+    return True
@@ -0,0 +1,193 @@
+import time
+import logging
+from typing import Dict, List, Optional
+import torch
+from torch import nn
+import torch.nn.functional as F
+from core.chunked_decoding import ChunkedDecoder
+
+logger = logging.getLogger(__name__)
+
+# Modos de compilação aceitos por TTSEngine.load_model
+COMPILE_MODES = ("trace", "compile")
+
+# Comprimentos (em quadros do decodificador) para os quais o grafo é especializado
+DEFAULT_BUCKETS = [64, 128, 256, 512, 1024, 2048]
+
+# Quadros finais recalculados sem o preenchimento do bucket; cobrem o campo
+# receptivo do HiFi-GAN (~14 quadros nas configurações do XTTS e do VITS)
+TAIL_CONTEXT = 24
+
+# Erro máximo aceito entre o decodificador compilado e o original, relativo ao pico
+VERIFY_TOLERANCE = 1e-3
+
+
+class _ConditionedDecoder(nn.Module):
+    """Expõe decoder(x, g=g) como forward(x, g) para o torch.jit.trace"""
+
+    def __init__(self, decoder: nn.Module):
+        super().__init__()
+        self.decoder = decoder
+
+    def forward(self, x: torch.Tensor, g: torch.Tensor) -> torch.Tensor:
+        return self.decoder(x, g=g)
+
+
+class BucketedDecoder(nn.Module):
+    """
+    Decodificador HiFi-GAN compilado para um conjunto fixo de comprimentos.
+
+    A entrada é completada com zeros até o menor bucket que a comporta e a
+    saída é cortada para o comprimento original. Assim o número de
+    especializações de forma é limitado e todas são geradas no aquecimento,
+    durante o carregamento do modelo. Como os zeros alteram os últimos
+    quadros, o final da sequência (TAIL_CONTEXT quadros) é recalculado pelo
+    decodificador original sobre um trecho curto com contexto real. Entradas
+    maiores que o maior bucket usam o decodificador original.
+    """
+
+    def __init__(self, decoder: nn.Module, mode: str = "trace", buckets: Optional[List[int]] = None):
+        """
+        Args:
+            decoder: Decodificador original (HifiganGenerator)
+            mode: "trace" (TorchScript) ou "compile" (torch.compile)
+            buckets: Comprimentos de entrada para os quais o grafo é especializado
+        """
+        super().__init__()
+        if mode not in COMPILE_MODES:
+            raise ValueError(f"Modo de compilação não suportado: {mode}")
+        self.decoder = decoder
+        self.mode = mode
+        self.buckets = sorted(buckets or DEFAULT_BUCKETS)
+        self.upsample_factor = None
+        self._compiled = None if mode == "trace" else torch.compile(decoder, dynamic=False)
+        self._traced: Dict[tuple, torch.jit.ScriptModule] = {}
+
+    def _bucket_for(self, length: int) -> Optional[int]:
+        for bucket in self.buckets:
+            if length <= bucket:
+                return bucket
+        return None
+
+    def _run(self, x: torch.Tensor, g: Optional[torch.Tensor]) -> torch.Tensor:
+        if self.mode == "compile":
+            return self._compiled(x, g=g)
+
+        # Um grafo TorchScript por forma de entrada (e por presença do condicionamento g)
+        key = (tuple(x.shape), None if g is None else tuple(g.shape))
+        traced = self._traced.get(key)
+        if traced is None:
+            # Um módulo (e não uma função) para que os pesos não virem constantes do grafo
+            if g is None:
+                traced = torch.jit.trace(self.decoder, (x,), check_trace=False)
+            else:
+                traced = torch.jit.trace(_ConditionedDecoder(self.decoder), (x, g), check_trace=False)
+            self._traced[key] = traced
+        return traced(x) if g is None else traced(x, g)
+
+    def forward(self, x: torch.Tensor, g: Optional[torch.Tensor] = None) -> torch.Tensor:
+        length = x.shape[-1]
+        bucket = self._bucket_for(length)
+        if bucket is None or self.upsample_factor is None or length <= 2 * TAIL_CONTEXT:
+            return self.decoder(x, g=g)
+
+        padded = F.pad(x, (0, bucket - length))
+        with torch.no_grad():
+            output = self._run(padded, g)[..., :length * self.upsample_factor]
+            if length < bucket:
+                # Final sem o efeito do preenchimento: trecho curto com TAIL_CONTEXT quadros reais à esquerda
+                tail = self.decoder(x[..., length - 2 * TAIL_CONTEXT:], g=g)
+                output[..., (length - TAIL_CONTEXT) * self.upsample_factor:] = tail[..., TAIL_CONTEXT * self.upsample_factor:]
+        return output
+
+    @torch.no_grad()
+    def warmup(self, channels: int, g: Optional[torch.Tensor] = None, batch_size: int = 1):
+        """
+        Compila e executa o decodificador uma vez para cada bucket
+
+        Args:
+            channels: Número de canais de entrada do decodificador
+            g: Condicionamento global de exemplo (embedding do speaker), se o modelo usar
+            batch_size: Tamanho do lote usado na inferência
+        """
+        device = next(self.decoder.parameters()).device
+        for bucket in self.buckets:
+            x = torch.zeros(batch_size, channels, bucket, device=device)
+            output = self._run(x, g)
+            self.upsample_factor = output.shape[-1] // bucket
+        self.verify(channels, g=g, batch_size=batch_size)
+
+    @torch.no_grad()
+    def verify(self, channels: int, g: Optional[torch.Tensor] = None, batch_size: int = 1) -> bool:
+        """
+        Compara a saída compilada com a do decodificador original em uma entrada aleatória
+
+        Se a diferença exceder VERIFY_TOLERANCE (relativa ao pico), o modo
+        compilado é desativado e o decodificador original passa a ser usado.
+
+        Returns:
+            True se as saídas coincidirem
+        """
+        device = next(self.decoder.parameters()).device
+        generator = torch.Generator().manual_seed(0)
+        # Comprimento que não coincide com um bucket, para exercitar o preenchimento
+        length = self.buckets[0] - 3 if self.buckets[0] > 2 * TAIL_CONTEXT + 3 else self.buckets[0]
+        x = torch.randn(batch_size, channels, length, generator=generator).to(device)
+        expected = self.decoder(x, g=g)
+        error = (self(x, g=g) - expected).abs().max().item()
+        peak = expected.abs().max().item()
+        if error > VERIFY_TOLERANCE * max(peak, 1e-6):
+            logger.warning(f"Decodificador compilado diverge do original (erro {error:.2e}, pico {peak:.2e});"
+                           " usando o decodificador original")
+            self.upsample_factor = None
+            return False
+        return True
+
+
+def _decoder_conditioning(decoder: nn.Module) -> Optional[torch.Tensor]:
+    """Cria um embedding de speaker de exemplo se o decodificador tiver condicionamento global"""
+    cond_layer = getattr(decoder, "cond_layer", None)
+    if cond_layer is None:
+        return None
+    device = next(decoder.parameters()).device
+    return torch.zeros(1, cond_layer.in_channels, 1, device=device)
+
+
+def compile_model(tts, mode: str = "trace", buckets: Optional[List[int]] = None) -> float:
+    """
+    Compila o decodificador do modelo (VITS ou XTTS) e faz o aquecimento por buckets
+
+    Args:
+        tts: Instância TTS (TTS.api) carregada
+        mode: "trace" (TorchScript) ou "compile" (torch.compile)
+        buckets: Comprimentos de entrada do decodificador a pré-compilar
+
+    Returns:
+        Tempo gasto na compilação e aquecimento, em segundos
+    """
+    tts_model = tts.synthesizer.tts_model
+    model_type = type(tts_model).__name__
+    if model_type == "Vits":
+        owner = tts_model
+    elif model_type == "Xtts":
+        owner = tts_model.hifigan_decoder
+    else:
+        raise ValueError(f"Modo compilado não suportado para o modelo: {model_type}")
+
+    decoder = getattr(owner, "waveform_decoder", None)
+    if decoder is None:
+        raise ValueError("O decodificador do modelo não pode ser compilado (backend ONNX?)")
+    # Com a decodificação em janelas, compila o decodificador de cada janela
+    attribute = "waveform_decoder"
+    if isinstance(decoder, ChunkedDecoder):
+        owner, decoder, attribute = decoder, decoder.decoder, "decoder"
+    if isinstance(decoder, BucketedDecoder):
+        return 0.0
+
+    start = time.perf_counter()
+    bucketed = BucketedDecoder(decoder, mode=mode, buckets=buckets)
+    bucketed.warmup(decoder.conv_pre.in_channels, g=_decoder_conditioning(decoder))
+    setattr(owner, attribute, bucketed)
+    elapsed = time.perf_counter() - start
+    logger.info(f"Decodificador compilado ({mode}) para {len(bucketed.buckets)} buckets em {elapsed:.1f}s")
+    return elapsed
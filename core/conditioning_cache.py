@@ -0,0 +1,164 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import torch
+
+
+class ConditioningCache:
+    """
+    Cache dos latentes de condicionamento do XTTS (latente GPT + embedding do speaker).
+
+    As entradas são indexadas por um hash do conteúdo do áudio de referência
+    somado aos parâmetros de condicionamento, de modo que o mesmo arquivo
+    renomeado reaproveita o cache e um arquivo alterado é recalculado.
+    Mantém um LRU em memória e persiste os tensores em disco para que
+    sobrevivam a reinícios do processo.
+    """
+
+    def __init__(self, cache_dir: str = "./cache/conditioning", max_items: int = 32):
+        """
+        Args:
+            cache_dir: Diretório onde os tensores são persistidos (None = apenas memória)
+            max_items: Número máximo de vozes mantidas em memória
+        """
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self.logger = logging.getLogger(__name__)
+
+        self._memory = OrderedDict()
+        self._file_hashes: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def hash_audio(self, audio_path: str) -> str:
+        """Calcula o hash do conteúdo de um arquivo de áudio (memorizado por caminho, tamanho e mtime)"""
+        stat = os.stat(audio_path)
+        file_id = (os.path.abspath(audio_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._file_hashes.get(file_id)
+        if cached:
+            return cached
+
+        digest = hashlib.sha256()
+        with open(audio_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        content_hash = digest.hexdigest()
+
+        with self._lock:
+            self._file_hashes[file_id] = content_hash
+        return content_hash
+
+    def make_key(self, audio_path: str, params: Dict) -> str:
+        """Gera a chave do cache a partir do conteúdo do áudio e dos parâmetros de condicionamento"""
+        payload = json.dumps(params, sort_keys=True, default=str)
+        digest = hashlib.sha256()
+        digest.update(self.hash_audio(audio_path).encode("utf-8"))
+        digest.update(payload.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pt")
+
+    def get(self, key: str) -> Optional[Tuple["torch.Tensor", "torch.Tensor"]]:
+        """Busca os latentes em memória e, em seguida, no disco"""
+        with self._lock:
+            latents = self._memory.get(key)
+            if latents is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return latents
+
+        if self.cache_dir and os.path.exists(self._disk_path(key)):
+            try:
+                import torch
+
+                data = torch.load(self._disk_path(key), map_location="cpu")
+                latents = (data["gpt_cond_latent"], data["speaker_embedding"])
+                self._remember(key, latents)
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                return latents
+            except Exception as e:
+                self.logger.warning(f"Entrada de cache de condicionamento inválida ({key}): {e}")
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str,
+            gpt_cond_latent: "torch.Tensor",
+            speaker_embedding: "torch.Tensor") -> Tuple["torch.Tensor", "torch.Tensor"]:
+        """Armazena os latentes em memória e no disco, retornando as cópias em CPU"""
+        latents = (
+            gpt_cond_latent.detach().cpu().contiguous(),
+            speaker_embedding.detach().cpu().contiguous()
+        )
+        self._remember(key, latents)
+
+        if self.cache_dir:
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            try:
+                import torch
+
+                torch.save({"gpt_cond_latent": latents[0], "speaker_embedding": latents[1]}, tmp_path)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                self.logger.warning(f"Não foi possível persistir latentes de condicionamento: {e}")
+        return latents
+
+    def _remember(self, key: str, latents: Tuple["torch.Tensor", "torch.Tensor"]):
+        with self._lock:
+            self._memory[key] = latents
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def get_or_compute(self,
+                       audio_path: str,
+                       params: Dict,
+                       compute_fn: Callable[[], Tuple["torch.Tensor", "torch.Tensor"]]) -> Tuple["torch.Tensor", "torch.Tensor"]:
+        """
+        Retorna os latentes do cache ou os calcula e armazena
+
+        Args:
+            audio_path: Arquivo de áudio de referência
+            params: Parâmetros de condicionamento que influenciam o resultado
+            compute_fn: Função que calcula (gpt_cond_latent, speaker_embedding)
+
+        Returns:
+            Tupla (gpt_cond_latent, speaker_embedding) em CPU
+        """
+        key = self.make_key(audio_path, params)
+        latents = self.get(key)
+        if latents is None:
+            gpt_cond_latent, speaker_embedding = compute_fn()
+            latents = self.put(key, gpt_cond_latent, speaker_embedding)
+        return latents
+
+    def clear(self, remove_files: bool = False):
+        """Limpa o cache em memória e, opcionalmente, os arquivos em disco"""
+        with self._lock:
+            self._memory.clear()
+            self._file_hashes.clear()
+        if remove_files and self.cache_dir and os.path.isdir(self.cache_dir):
+            for file_name in os.listdir(self.cache_dir):
+                if file_name.endswith(".pt"):
+                    os.remove(os.path.join(self.cache_dir, file_name))
+
+    def get_stats(self) -> Dict:
+        """Retorna estatísticas de acertos e falhas do cache"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._memory)
+        return stats
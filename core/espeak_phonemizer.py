@@ -0,0 +1,175 @@
+# Fonemizador espeak sem o pacote TTS, para o backend ONNX. O tratamento de
+# pontuação (Punctuation) foi copiado de TTS/tts/utils/text/punctuation.py do
+# Coqui TTS 0.22 (MPL-2.0) sem alterações de comportamento; o espeak é
+# chamado pelo libespeak-ng (core.phonemizer_pool.EspeakLibrary), com a mesma
+# saída do "espeak-ng -q --ipa=1" usado pelo fonemizador do Coqui. Importar o
+# fonemizador do Coqui carrega o módulo de texto inteiro do TTS (~6 s).
+import re
+import threading
+import collections
+from enum import Enum
+from typing import List, Optional, Tuple
+
+from core.phonemizer_pool import EspeakLibrary, find_espeak_library
+
+_DEF_PUNCS = ';:,.!?¡¿—…"«»“”'
+
+_PUNC_IDX = collections.namedtuple("_punc_index", ["punc", "position"])
+
+
+class PuncPosition(Enum):
+    """Enum for the punctuations positions"""
+
+    BEGIN = 0
+    END = 1
+    MIDDLE = 2
+
+
+class Punctuation:
+    """Handle punctuations in text.
+
+    Just strip punctuations from text or strip and restore them later.
+    """
+
+    def __init__(self, puncs: str = _DEF_PUNCS):
+        self.puncs = puncs
+
+    @staticmethod
+    def default_puncs():
+        """Return default set of punctuations."""
+        return _DEF_PUNCS
+
+    @property
+    def puncs(self):
+        return self._puncs
+
+    @puncs.setter
+    def puncs(self, value):
+        if not isinstance(value, str):
+            raise ValueError("[!] Punctuations must be of type str.")
+        self._puncs = "".join(list(dict.fromkeys(list(value))))  # remove duplicates without changing the oreder
+        self.puncs_regular_exp = re.compile(rf"(\s*[{re.escape(self._puncs)}]+\s*)+")
+
+    def strip(self, text):
+        """Remove all the punctuations by replacing with `space`."""
+        return re.sub(self.puncs_regular_exp, " ", text).rstrip().lstrip()
+
+    def strip_to_restore(self, text):
+        """Remove punctuations from text to restore them later."""
+        matches = list(re.finditer(self.puncs_regular_exp, text))
+        if not matches:
+            return [text], []
+        # the text is only punctuations
+        if len(matches) == 1 and matches[0].group() == text:
+            return [], [_PUNC_IDX(text, PuncPosition.BEGIN)]
+        # build a punctuation map to be used later to restore punctuations
+        puncs = []
+        for match in matches:
+            position = PuncPosition.MIDDLE
+            if match == matches[0] and text.startswith(match.group()):
+                position = PuncPosition.BEGIN
+            elif match == matches[-1] and text.endswith(match.group()):
+                position = PuncPosition.END
+            puncs.append(_PUNC_IDX(match.group(), position))
+        # convert str text to a List[str], each item is separated by a punctuation
+        splitted_text = []
+        for idx, punc in enumerate(puncs):
+            split = text.split(punc.punc)
+            prefix, suffix = split[0], punc.punc.join(split[1:])
+            text = suffix
+            if prefix == "":
+                # We don't want to insert an empty string in case of initial punctuation
+                continue
+            splitted_text.append(prefix)
+            # if the text does not end with a punctuation, add it to the last item
+            if idx == len(puncs) - 1 and len(suffix) > 0:
+                splitted_text.append(suffix)
+        return splitted_text, puncs
+
+    @classmethod
+    def restore(cls, text, puncs):
+        """Restore punctuation in a text."""
+        if not puncs:
+            return text
+
+        # nothing have been phonemized, returns the puncs alone
+        if not text:
+            return ["".join(m.punc for m in puncs)]
+
+        current = puncs[0]
+
+        if current.position == PuncPosition.BEGIN:
+            return cls.restore([current.punc + text[0]] + text[1:], puncs[1:])
+
+        if current.position == PuncPosition.END:
+            return [text[0] + current.punc] + cls.restore(text[1:], puncs[1:])
+
+        # POSITION == MIDDLE
+        if len(text) == 1:  # pragma: nocover
+            # a corner case where the final part of an intermediate
+            # mark (I) has not been phonemized
+            return cls.restore([text[0] + current.punc], puncs[1:])
+
+        return cls.restore([text[0] + current.punc + text[1]] + text[2:], puncs[1:])
+
+
+class EspeakPhonemizer:
+    """
+    Equivalente ao fonemizador "espeak" do Coqui (ESpeak com keep_puncs=True).
+
+    A pontuação é separada antes do espeak e restaurada depois, como no
+    Coqui; nome, backend e versão seguem os do Coqui, de modo que o
+    PhonemeCache e o PhonemizerPool tratam os dois da mesma forma.
+    """
+
+    def __init__(self, language: str, library_path: Optional[str] = None, keep_puncs: bool = True):
+        """
+        Args:
+            language: Voz do espeak (ex: "pt-br"; "en" e "zh-cn" são convertidos como no Coqui)
+            library_path: Caminho do libespeak-ng (padrão: localizado automaticamente)
+            keep_puncs: Se a pontuação é mantida na saída
+        """
+        library_path = library_path or find_espeak_library()
+        if library_path is None:
+            raise Exception("libespeak-ng não encontrado. Instale o espeak-ng.")
+        if language == "en":
+            language = "en-us"
+        if language == "zh-cn":
+            language = "cmn"
+        self._language = language
+        self._keep_puncs = keep_puncs
+        self._punctuator = Punctuation()
+        self._library = EspeakLibrary(library_path)
+        self._library.set_language(language)
+        self.backend = "espeak-ng" if "espeak-ng" in library_path else "espeak"
+        # O libespeak tem estado global e não é thread-safe
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def name() -> str:
+        return "espeak"
+
+    @property
+    def language(self) -> str:
+        return self._language
+
+    def version(self) -> str:
+        return self._library.version
+
+    def _phonemize_preprocess(self, text: str) -> Tuple[List[str], List]:
+        text = text.strip()
+        if self._keep_puncs:
+            return self._punctuator.strip_to_restore(text)
+        return [self._punctuator.strip(text)], []
+
+    def _phonemize_postprocess(self, phonemized: List[str], punctuations: List) -> str:
+        if self._keep_puncs:
+            return self._punctuator.restore(phonemized, punctuations)[0]
+        return phonemized[0]
+
+    def phonemize(self, text: str, separator: str = "|", language: Optional[str] = None) -> str:
+        """Fonemiza o texto (o idioma é o do construtor, como no Coqui)"""
+        segments, punctuations = self._phonemize_preprocess(text)
+        with self._lock:
+            phonemized = [self._library.phonemize(segment, self._language, separator) for segment in segments]
+        return self._phonemize_postprocess(phonemized, punctuations)
@@ -0,0 +1,236 @@
+import os
+import re
+import pickle
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Formato do vocabulário compilado; mudar ao alterar a estrutura gravada
+_COMPILED_FORMAT = 1
+
+# Pré-tokenizador "Whitespace" do tokenizers (Hugging Face)
+_WORD = re.compile(r"\w+|[^\w\s]+")
+
+DEFAULT_VOCAB_PATH = "./xtts_v2/vocab.json"
+
+
+def _compile_vocab(vocab_json: bytes) -> Dict:
+    """Lê o vocab.json do tokenizers e monta as tabelas usadas pelo FastXttsTokenizer"""
+    import json
+
+    data = json.loads(vocab_json)
+    model = data["model"]
+    if model.get("type") != "BPE":
+        raise ValueError(f"Tokenizer não suportado: {model.get('type')}")
+
+    merges = {}
+    for rank, merge in enumerate(model["merges"]):
+        left, right = merge.split(" ") if isinstance(merge, str) else merge
+        merges[(left, right)] = rank
+    return {
+        "format": _COMPILED_FORMAT,
+        "vocab": model["vocab"],
+        "merges": merges,
+        "added_tokens": {token["content"]: token["id"] for token in data.get("added_tokens", [])},
+        "unk_token": model.get("unk_token"),
+    }
+
+
+class FastXttsTokenizer:
+    """
+    Tokenizer BPE do XTTS (xtts_v2/vocab.json) com vocabulário pré-compilado.
+
+    Produz os mesmos ids que o VoiceBpeTokenizer do Coqui. O vocabulário e
+    as regras de merge são gravados em um arquivo binário (pickle) no cache,
+    indexado pelo hash do vocab.json, e carregados diretamente nas próximas
+    execuções. As codificações de sentenças recentes e de palavras ficam em
+    LRUs limitados, o que torna count_tokens() barato para planejar a
+    divisão de textos em gpt_max_text_tokens sem executar o modelo.
+
+    Atributos não implementados (decode, char_limits, tokenizer...) são
+    repassados ao tokenizer original do Coqui, quando informado.
+    """
+
+    def __init__(self,
+                 vocab_path: str = DEFAULT_VOCAB_PATH,
+                 compiled_dir: Optional[str] = "./cache/tokenizers",
+                 cache_size: int = 4096,
+                 word_cache_size: int = 65536,
+                 fallback=None,
+                 vocab_json: Optional[bytes] = None):
+        """
+        Args:
+            vocab_path: vocab.json do XTTS
+            compiled_dir: Diretório do vocabulário compilado (None = não gravar)
+            cache_size: Número máximo de sentenças memorizadas
+            word_cache_size: Número máximo de palavras memorizadas
+            fallback: VoiceBpeTokenizer original (opcional)
+            vocab_json: Conteúdo do vocab.json, se já estiver em memória (dispensa vocab_path)
+        """
+        self.vocab_path = vocab_path
+        self.compiled_dir = compiled_dir
+        self.cache_size = cache_size
+        self.word_cache_size = word_cache_size
+        self.fallback = fallback
+        self.logger = logging.getLogger(__name__)
+
+        if vocab_json is None:
+            with open(vocab_path, "rb") as f:
+                vocab_json = f.read()
+        tables = self._load(vocab_json)
+        self.vocab: Dict[str, int] = tables["vocab"]
+        self.merges: Dict[Tuple[str, str], int] = tables["merges"]
+        self.added_tokens: Dict[str, int] = tables["added_tokens"]
+        self.unk_id = self.vocab.get(tables["unk_token"], self.added_tokens.get(tables["unk_token"]))
+        # Os tokens especiais são separados antes do BPE; os mais longos primeiro
+        self._added_pattern = re.compile(
+            "|".join(re.escape(token) for token in sorted(self.added_tokens, key=len, reverse=True))
+        )
+
+        self._preprocessor = None
+        self._cache = OrderedDict()
+        self._word_cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    @classmethod
+    def from_coqui(cls, tokenizer, **kwargs) -> "FastXttsTokenizer":
+        """Cria a partir do VoiceBpeTokenizer de um modelo XTTS já carregado (mesmo vocabulário)"""
+        return cls(vocab_json=tokenizer.tokenizer.to_str().encode("utf-8"), fallback=tokenizer, **kwargs)
+
+    def _load(self, vocab_json: bytes) -> Dict:
+        """Carrega o vocabulário compilado do cache ou compila e grava o vocab.json"""
+        digest = hashlib.sha256(vocab_json).hexdigest()
+
+        compiled_path = os.path.join(self.compiled_dir, f"xtts_bpe_{digest[:16]}.pkl") if self.compiled_dir else None
+        if compiled_path and os.path.exists(compiled_path):
+            try:
+                with open(compiled_path, "rb") as f:
+                    tables = pickle.load(f)
+                if tables.get("format") == _COMPILED_FORMAT:
+                    return tables
+            except (OSError, pickle.UnpicklingError, EOFError) as e:
+                self.logger.warning(f"Vocabulário compilado inválido, recompilando: {e}")
+
+        tables = _compile_vocab(vocab_json)
+        if compiled_path:
+            try:
+                os.makedirs(self.compiled_dir, exist_ok=True)
+                tmp_path = f"{compiled_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    pickle.dump(tables, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, compiled_path)
+            except OSError as e:
+                self.logger.warning(f"Não foi possível gravar o vocabulário compilado: {e}")
+        return tables
+
+    def _bpe(self, word: str) -> Tuple[int, ...]:
+        """Aplica as regras de merge a uma palavra (memorizado por palavra)"""
+        with self._lock:
+            ids = self._word_cache.get(word)
+        if ids is not None:
+            return ids
+
+        symbols = list(word)
+        while len(symbols) > 1:
+            # Como no tokenizers: a cada passo, une apenas o par adjacente com a regra de
+            # menor posição na lista de merges (o mais à esquerda em caso de empate)
+            best_index = None
+            best_rank = None
+            for i, pair in enumerate(zip(symbols, symbols[1:])):
+                rank = self.merges.get(pair)
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_index, best_rank = i, rank
+            if best_index is None:
+                break
+            symbols[best_index:best_index + 2] = [symbols[best_index] + symbols[best_index + 1]]
+
+        ids = tuple(self.vocab.get(symbol, self.unk_id) for symbol in symbols)
+        with self._lock:
+            self._word_cache[word] = ids
+            if len(self._word_cache) > self.word_cache_size:
+                self._word_cache.popitem(last=False)
+        return ids
+
+    def _encode_raw(self, text: str) -> List[int]:
+        """Codifica um texto já pré-processado (tokens especiais, pré-tokenização e BPE)"""
+        ids = []
+        position = 0
+        for match in self._added_pattern.finditer(text):
+            for word in _WORD.findall(text[position:match.start()]):
+                ids.extend(self._bpe(word))
+            ids.append(self.added_tokens[match.group()])
+            position = match.end()
+        for word in _WORD.findall(text[position:]):
+            ids.extend(self._bpe(word))
+        return ids
+
+    def preprocess_text(self, text: str, lang: str) -> str:
+        """Normalização de texto do XTTS (números, abreviações, símbolos), a mesma do Coqui"""
+        if self._preprocessor is None:
+            if self.fallback is not None:
+                self._preprocessor = self.fallback.preprocess_text
+            else:
+                # Cópia da normalização do Coqui que não importa torch nem o TTS
+                from core.xtts_text import preprocess_text
+                self._preprocessor = preprocess_text
+        return self._preprocessor(text, lang)
+
+    def encode(self, txt: str, lang: str) -> List[int]:
+        """
+        Converte o texto em ids, como VoiceBpeTokenizer.encode
+
+        Args:
+            txt: Texto
+            lang: Código do idioma (ex: "pt")
+
+        Returns:
+            Lista de ids de tokens
+        """
+        lang = lang.split("-")[0]
+        key = (txt, lang)
+        with self._lock:
+            ids = self._cache.get(key)
+            if ids is not None:
+                self._cache.move_to_end(key)
+                self._stats["hits"] += 1
+                return list(ids)
+            self._stats["misses"] += 1
+
+        text = self.preprocess_text(txt, lang)
+        lang_token = "zh-cn" if lang == "zh" else lang
+        ids = tuple(self._encode_raw(f"[{lang_token}]{text}".replace(" ", "[SPACE]")))
+
+        with self._lock:
+            self._cache[key] = ids
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return list(ids)
+
+    def count_tokens(self, text: str, lang: str = "pt") -> int:
+        """Número de tokens de texto do XTTS (inclui o token de idioma, não os de início/fim)"""
+        return len(self.encode(text, lang))
+
+    def get_number_tokens(self) -> int:
+        return max(max(self.vocab.values()), max(self.added_tokens.values(), default=0)) + 1
+
+    def __len__(self) -> int:
+        return len(set(self.vocab.values()) | set(self.added_tokens.values()))
+
+    def get_stats(self) -> Dict:
+        """Retorna acertos e erros do cache de sentenças"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached_sentences"] = len(self._cache)
+            stats["cached_words"] = len(self._word_cache)
+        total = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / total if total else 0.0
+        return stats
+
+    def __getattr__(self, name):
+        fallback = self.__dict__.get("fallback")
+        if fallback is None:
+            raise AttributeError(name)
+        return getattr(fallback, name)
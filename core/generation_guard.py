@@ -0,0 +1,210 @@
+import re
+import math
+import logging
+import threading
+from typing import Dict, Optional
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList
+
+logger = logging.getLogger(__name__)
+
+# Ações quando a geração ultrapassa o limite previsto
+GUARD_ACTIONS = ("resample", "stop")
+
+# Limite superior estimado de tokens de áudio por token de texto, por idioma.
+# Um token de áudio do XTTS equivale a 1024 amostras a 22050 Hz (~46 ms). São
+# estimativas fixas, não calibradas: partem de caracteres por token do
+# vocab.json em cada idioma e de uma fala lenta (~70% da velocidade de
+# leitura), com folga para pausas. Fonte única da razão: o guarda limita a
+# geração com ela e TTSEngine.plan_chunks dimensiona os trechos com ela
+# (max_text_tokens), de modo que um trecho planejado nunca é cortado pelo
+# guarda. As maiores razões observadas em produção aparecem em
+# AudioTokenGuard.get_stats()["observed_rates"] para revisar a tabela.
+AUDIO_TOKENS_PER_TEXT_TOKEN = {
+    "pt": 4.0,
+    "en": 4.0,
+    "es": 3.8,
+    "fr": 3.8,
+    "de": 4.0,
+    "it": 3.8,
+    "pl": 4.2,
+    "tr": 4.0,
+    "ru": 4.2,
+    "nl": 4.0,
+    "cs": 4.2,
+    "ar": 5.0,
+    "zh-cn": 5.5,
+    "hu": 4.2,
+    "ko": 3.5,
+    "ja": 5.0,
+    "hi": 3.5,
+}
+DEFAULT_RATE = 4.5
+
+# Tokens de áudio sempre permitidos (silêncio inicial/final e respiração, ~1.9s)
+BASE_AUDIO_TOKENS = 40
+
+def max_text_tokens(audio_token_limit: int,
+                    language: Optional[str],
+                    rates: Optional[Dict[str, float]] = None,
+                    base_tokens: int = BASE_AUDIO_TOKENS) -> int:
+    """
+    Maior número de tokens de texto cujo limite previsto cabe em audio_token_limit
+
+    Args:
+        audio_token_limit: Limite do modelo (gpt_max_audio_tokens)
+        language: Idioma do XTTS (ex: "pt")
+        rates: Tokens de áudio por token de texto por idioma (padrão: AUDIO_TOKENS_PER_TEXT_TOKEN)
+        base_tokens: Tokens de áudio sempre permitidos
+
+    Returns:
+        Número máximo de tokens de texto
+    """
+    rate = (rates or AUDIO_TOKENS_PER_TEXT_TOKEN).get(language, DEFAULT_RATE)
+    return max(1, int((audio_token_limit - base_tokens) / rate))
+
+
+_LANGUAGE_TOKEN = re.compile(r"^\[([a-z]{2}(?:-[a-z]{2})?)\]$")
+
+
+def language_token_ids(tokenizer) -> Dict[int, str]:
+    """Mapeia o id dos tokens de idioma do tokenizer do XTTS ("[pt]", "[zh-cn]"...) para o idioma"""
+    added_tokens = getattr(tokenizer, "added_tokens", None)
+    if added_tokens is None:
+        # VoiceBpeTokenizer do Coqui
+        added_tokens = tokenizer.tokenizer.get_vocab()
+    languages = {}
+    for token, token_id in added_tokens.items():
+        match = _LANGUAGE_TOKEN.match(token)
+        if match:
+            languages[token_id] = match.group(1)
+    return languages
+
+
+class _AudioTokenLimit(StoppingCriteria):
+    """Interrompe a geração ao atingir um comprimento total de sequência"""
+
+    def __init__(self, max_length: int):
+        self.max_length = max_length
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> bool:
+        return input_ids.shape[-1] >= self.max_length
+
+
+class AudioTokenGuard:
+    """
+    Limite adaptativo de tokens de áudio gerados pelo GPT do XTTS.
+
+    Antes de cada sentença, prevê o número máximo de tokens de áudio a partir
+    do número de tokens de texto e do idioma. Se a geração atingir o limite
+    sem emitir o token de fim (o modelo "balbucia" até gpt_max_audio_tokens),
+    a sentença é amostrada de novo ("resample") ou o áudio é cortado no
+    limite ("stop"). Toda intervenção é registrada no log.
+    """
+
+    def __init__(self,
+                 action: str = "resample",
+                 max_resamples: int = 1,
+                 rates: Optional[Dict[str, float]] = None,
+                 base_tokens: int = BASE_AUDIO_TOKENS):
+        """
+        Args:
+            action: "resample" (nova amostragem, depois corte) ou "stop" (corte no limite)
+            max_resamples: Número máximo de novas amostragens por sentença
+            rates: Tokens de áudio por token de texto por idioma (sobrepõe AUDIO_TOKENS_PER_TEXT_TOKEN)
+            base_tokens: Tokens de áudio sempre permitidos
+        """
+        if action not in GUARD_ACTIONS:
+            raise ValueError(f"Ação não suportada: {action}. Use uma de {GUARD_ACTIONS}")
+        self.action = action
+        self.max_resamples = max_resamples
+        self.rates = dict(AUDIO_TOKENS_PER_TEXT_TOKEN)
+        self.rates.update(rates or {})
+        self.base_tokens = base_tokens
+        self._lock = threading.Lock()
+        self._stats = {"generations": 0, "exceeded": 0, "resampled": 0, "recovered": 0, "truncated": 0}
+        # Maior razão tokens de áudio / tokens de texto observada em gerações concluídas, por
+        # idioma; apenas informativa (get_stats), não altera os limites
+        self._observed: Dict[str, float] = {}
+
+    def max_audio_tokens(self, text_tokens: int, language: Optional[str], hard_limit: int) -> int:
+        """
+        Prevê o número máximo de tokens de áudio de uma sentença
+
+        Args:
+            text_tokens: Número de tokens de texto (incluindo o token de idioma)
+            language: Idioma do XTTS (ex: "pt")
+            hard_limit: Limite do modelo (gpt_max_audio_tokens)
+
+        Returns:
+            Limite de tokens de áudio
+        """
+        rate = self.rates.get(language, DEFAULT_RATE)
+        return min(hard_limit, self.base_tokens + math.ceil(rate * text_tokens))
+
+    def max_text_tokens(self, language: Optional[str], hard_limit: int) -> int:
+        """Maior número de tokens de texto de uma sentença que o limite deste guarda não corta"""
+        return max_text_tokens(hard_limit, language, self.rates, self.base_tokens)
+
+    def install(self, xtts):
+        """Aplica o limite às gerações do GPT de um modelo XTTS"""
+        gpt = xtts.gpt
+        if getattr(gpt.generate, "audio_token_guard", None) is not None:
+            return
+        languages = language_token_ids(xtts.tokenizer)
+        generate = gpt.generate
+
+        def guarded_generate(cond_latents, text_inputs, **hf_generate_kwargs):
+            return self._generate(gpt, generate, languages, cond_latents, text_inputs, hf_generate_kwargs)
+
+        guarded_generate.audio_token_guard = self
+        gpt.generate = guarded_generate
+
+    def _generate(self, gpt, generate, languages: Dict[int, str], cond_latents, text_inputs, hf_generate_kwargs):
+        text_tokens = text_inputs.shape[-1]
+        language = languages.get(int(text_inputs[0, 0]))
+        limit = self.max_audio_tokens(text_tokens, language, gpt.max_gen_mel_tokens)
+        # Sequência de entrada: latentes + [início] texto [fim] + token inicial de áudio
+        prompt_length = cond_latents.shape[1] + text_tokens + 3
+
+        stopping_criteria = StoppingCriteriaList(hf_generate_kwargs.pop("stopping_criteria", None) or [])
+        stopping_criteria.append(_AudioTokenLimit(prompt_length + limit))
+
+        resamples = self.max_resamples if self.action == "resample" and hf_generate_kwargs.get("do_sample") else 0
+        for attempt in range(resamples + 1):
+            result = generate(cond_latents, text_inputs, stopping_criteria=stopping_criteria, **hf_generate_kwargs)
+            codes = result[0] if isinstance(result, tuple) else result
+            exceeded = codes.shape[-1] >= limit and not bool((codes == gpt.stop_audio_token).any(dim=-1).all())
+
+            with self._lock:
+                if attempt == 0:
+                    self._stats["generations"] += 1
+                if not exceeded:
+                    if attempt > 0:
+                        self._stats["recovered"] += 1
+                    if language is not None:
+                        ratio = codes.shape[-1] / text_tokens
+                        self._observed[language] = max(self._observed.get(language, 0.0), ratio)
+                    return result
+                if attempt == 0:
+                    self._stats["exceeded"] += 1
+                if attempt < resamples:
+                    self._stats["resampled"] += 1
+
+            if attempt < resamples:
+                logger.warning(f"Geração do XTTS atingiu o limite de {limit} tokens de áudio "
+                               f"({text_tokens} tokens de texto, idioma {language}); amostrando novamente "
+                               f"({attempt + 1}/{resamples})")
+
+        with self._lock:
+            self._stats["truncated"] += 1
+        logger.warning(f"Geração do XTTS cortada em {limit} tokens de áudio "
+                       f"({text_tokens} tokens de texto, idioma {language}, limite do modelo {gpt.max_gen_mel_tokens})")
+        return result
+
+    def get_stats(self) -> Dict:
+        """Retorna o número de gerações, de intervenções e as maiores razões observadas por idioma"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["observed_rates"] = dict(self._observed)
+        return stats
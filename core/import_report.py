@@ -0,0 +1,67 @@
+import re
+import sys
+import subprocess
+from collections import defaultdict
+from typing import Dict, List
+
+_IMPORT_TIME_LINE = re.compile(r"import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)")
+
+
+def measure_imports(module: str) -> List[Dict]:
+    """
+    Mede o tempo de importação de um módulo e de todas as suas dependências
+
+    O módulo é importado em um interpretador novo com "-X importtime", para
+    que o resultado não dependa do que já foi importado pelo processo atual.
+
+    Args:
+        module: Nome do módulo (ex: "gui.main_window")
+
+    Returns:
+        Lista de {"module", "self_ms", "cumulative_ms", "depth"} na ordem de importação
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise Exception(f"Falha ao importar {module}: {result.stderr.strip().splitlines()[-1:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match:
+            entries.append({
+                "module": match.group(4),
+                "self_ms": int(match.group(1)) / 1000,
+                "cumulative_ms": int(match.group(2)) / 1000,
+                "depth": (len(match.group(3)) - 1) // 2
+            })
+    return entries
+
+
+def print_import_report(module: str, top: int = 15):
+    """
+    Imprime os módulos e pacotes que dominam o tempo de importação
+
+    Args:
+        module: Módulo de entrada (ex: "gui.main_window", "test_tts")
+        top: Quantidade de linhas de cada tabela
+    """
+    entries = measure_imports(module)
+    total_ms = sum(entry["self_ms"] for entry in entries)
+
+    packages = defaultdict(float)
+    for entry in entries:
+        packages[entry["module"].split(".")[0]] += entry["self_ms"]
+
+    print(f"\nTempo de importação de {module}: {total_ms:.0f} ms ({len(entries)} módulos)")
+
+    print("\nPacotes mais custosos:")
+    for package, self_ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {self_ms:9.1f} ms  {100 * self_ms / max(total_ms, 1e-9):5.1f}%  {package}")
+
+    print("\nMódulos mais custosos (tempo próprio):")
+    for entry in sorted(entries, key=lambda e: e["self_ms"], reverse=True)[:top]:
+        print(f"  {entry['self_ms']:9.1f} ms  (acumulado {entry['cumulative_ms']:9.1f} ms)  {entry['module']}")
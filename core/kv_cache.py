@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import torch
+from torch import nn
+
+logger = logging.getLogger(__name__)
+
+# Estado KV: uma tupla (chave, valor) por camada do GPT-2
+KVState = Tuple[Tuple[torch.Tensor, torch.Tensor], ...]
+
+
+def _kv_nbytes(past: KVState) -> int:
+    return sum(tensor.numel() * tensor.element_size() for layer in past for tensor in layer)
+
+
+def fingerprint(tensor: torch.Tensor) -> str:
+    """Hash do conteúdo de um tensor (identifica a voz pelos latentes de condicionamento)"""
+    data = tensor.detach().to("cpu", torch.float32).contiguous().numpy()
+    digest = hashlib.sha1(data.tobytes())
+    digest.update(str(tuple(data.shape)).encode("ascii"))
+    return digest.hexdigest()
+
+
+class PrefixKVCache:
+    """
+    Cache do estado KV do prefixo de condicionamento do GPT do XTTS.
+
+    O prefixo (latentes da voz clonada) é o mesmo em todas as sentenças e
+    requisições de uma voz; seu estado de atenção é calculado uma vez por
+    (modelo, voz) e reaproveitado. LRU limitado em bytes, compartilhado
+    entre os modelos do pool.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            max_bytes: Memória máxima ocupada pelos estados KV
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (modelo, voz) -> estado KV
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: Tuple[str, str]) -> Optional[KVState]:
+        with self._lock:
+            past = self._entries.get(key)
+            if past is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return past
+
+    def put(self, key: Tuple[str, str], past: KVState):
+        size = _kv_nbytes(past)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= _kv_nbytes(previous)
+            self._entries[key] = past
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= _kv_nbytes(old)
+                self._stats["evictions"] += 1
+
+    def clear(self, model_id: Optional[str] = None):
+        """Remove os estados de um modelo (ou todos), ex: quando o modelo sai do pool"""
+        with self._lock:
+            for key in [key for key in self._entries if model_id is None or key[0] == model_id]:
+                self._bytes -= _kv_nbytes(self._entries.pop(key))
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["memory_mb"] = self._bytes / 1024 / 1024
+        total = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / total if total else 0.0
+        return stats
+
+
+class PrefixCachedTransformer(nn.Module):
+    """
+    Envolve o GPT2Model do gpt_inference do XTTS.
+
+    No primeiro passo da geração (sem past_key_values) o transformer recebe
+    [latentes da voz | texto | início do áudio]. O estado KV das posições
+    dos latentes é buscado no PrefixKVCache (ou calculado e guardado) e
+    apenas o restante da sequência é processado. As posições do GPT do XTTS
+    não usam embeddings posicionais do GPT-2, então o estado do prefixo não
+    depende do texto que vem depois.
+    """
+
+    def __init__(self, transformer: nn.Module, cache: PrefixKVCache, model_id: str):
+        super().__init__()
+        self.transformer = transformer
+        self.cache = cache
+        self.model_id = model_id
+        # Prefixo da geração em andamento, definido por compute_embeddings (um por thread)
+        self._prefix = threading.local()
+
+    def set_prefix(self, cond_latents: torch.Tensor):
+        self._prefix.length = cond_latents.shape[1]
+        self._prefix.key = fingerprint(cond_latents) if cond_latents.shape[0] == 1 else None
+
+    def _prefix_state(self, prefix_emb: torch.Tensor) -> KVState:
+        key = (self.model_id, self._prefix.key)
+        past = self.cache.get(key)
+        if past is None:
+            output = self.transformer(inputs_embeds=prefix_emb, use_cache=True, return_dict=True)
+            past = tuple(tuple(tensor.detach() for tensor in layer) for layer in output.past_key_values)
+            self.cache.put(key, past)
+        return past
+
+    def forward(self, inputs_embeds=None, past_key_values=None, attention_mask=None, position_ids=None, **kwargs):
+        prefix_len = getattr(self._prefix, "length", 0)
+        if (past_key_values is not None or getattr(self._prefix, "key", None) is None or inputs_embeds is None
+                or inputs_embeds.shape[1] <= prefix_len or not kwargs.get("use_cache", True)):
+            return self.transformer(inputs_embeds=inputs_embeds, past_key_values=past_key_values,
+                                    attention_mask=attention_mask, position_ids=position_ids, **kwargs)
+
+        past = self._prefix_state(inputs_embeds[:1, :prefix_len])
+        batch_size = inputs_embeds.shape[0]
+        if batch_size > 1:
+            past = tuple(tuple(tensor.expand(batch_size, *tensor.shape[1:]) for tensor in layer) for layer in past)
+        return self.transformer(
+            inputs_embeds=inputs_embeds[:, prefix_len:],
+            past_key_values=past,
+            attention_mask=attention_mask,
+            position_ids=position_ids[:, prefix_len:] if position_ids is not None else None,
+            **kwargs
+        )
+
+
+def install_prefix_cache(xtts, cache: PrefixKVCache, model_id: str) -> bool:
+    """
+    Ativa o reaproveitamento do estado KV do prefixo em um modelo XTTS
+
+    Returns:
+        True se instalado (requer kv_cache ativo no gpt_inference)
+    """
+    gpt = xtts.gpt
+    inference_model = getattr(gpt, "gpt_inference", None)
+    if inference_model is None or not inference_model.kv_cache:
+        return False
+    if isinstance(inference_model.transformer, PrefixCachedTransformer):
+        return True
+
+    wrapper = PrefixCachedTransformer(inference_model.transformer, cache, model_id)
+    inference_model.transformer = wrapper
+    compute_embeddings = gpt.compute_embeddings
+
+    def compute_embeddings_with_prefix(cond_latents, text_inputs):
+        wrapper.set_prefix(cond_latents)
+        return compute_embeddings(cond_latents, text_inputs)
+
+    gpt.compute_embeddings = compute_embeddings_with_prefix
+    logger.info(f"Cache KV do prefixo de voz ativado para {model_id}")
+    return True
@@ -0,0 +1,156 @@
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# Engine carregado uma única vez em cada processo de trabalho
+_worker_engine = None
+
+
+def _init_worker(threads_per_worker: int, engine_config: Dict):
+    """
+    Inicializa o processo de trabalho com seu próprio TTSEngine
+
+    O engine herda a configuração do engine principal (cache de fonemas,
+    cache KV do prefixo, guarda de geração, decodificação em janelas,
+    diretório ONNX); precisão e backend vêm na chave do modelo. Os caches
+    de latentes e de resultados ficam desativados: os latentes chegam
+    prontos e o áudio final é guardado pelo processo principal.
+    """
+    global _worker_engine
+    import torch
+    from core.tts_engine import TTSEngine
+
+    torch.set_num_threads(threads_per_worker)
+    config = dict(engine_config)
+    if config.get("phonemizer_workers") is None:
+        # "Um processo do espeak por núcleo" passa a valer para os núcleos deste processo
+        config["phonemizer_workers"] = threads_per_worker
+    _worker_engine = TTSEngine(max_models=1, conditioning_cache_dir=None, result_cache_dir=None,
+                               thread_tuning_path=None, **config)
+
+
+def _synthesize_chunk(model_id: str,
+                      text: str,
+                      language: Optional[str],
+                      conditioning_latents,
+                      speed: float,
+                      sampling_params: Optional[Dict]) -> np.ndarray:
+    """Sintetiza um trecho no processo de trabalho"""
+    model = _worker_engine.model_pool.get(model_id)
+    return _worker_engine._synthesize_array(
+        model,
+        text,
+        language=language,
+        split_sentences=False,
+        speed=speed,
+        sampling_params=sampling_params,
+        conditioning_latents=conditioning_latents
+    )
+
+
+def crossfade_concat(wavs: List[np.ndarray], sample_rate: int, crossfade_ms: float = 20.0) -> np.ndarray:
+    """
+    Concatena trechos de áudio com crossfade de potência constante
+
+    Args:
+        wavs: Trechos de áudio em ordem
+        sample_rate: Taxa de amostragem
+        crossfade_ms: Duração de cada crossfade em milissegundos
+
+    Returns:
+        Áudio concatenado em float32
+    """
+    wavs = [np.asarray(wav, dtype=np.float32) for wav in wavs if len(wav)]
+    if not wavs:
+        return np.zeros(0, dtype=np.float32)
+
+    fade_len = int(sample_rate * crossfade_ms / 1000)
+    parts = []
+    tail = wavs[0]
+    for wav in wavs[1:]:
+        n = min(fade_len, len(tail), len(wav))
+        if n == 0:
+            parts.append(tail)
+            tail = wav
+            continue
+        t = np.linspace(0.0, 1.0, n, dtype=np.float32)
+        mixed = tail[-n:] * np.cos(t * np.pi / 2) + wav[:n] * np.sin(t * np.pi / 2)
+        parts.extend([tail[:-n], mixed])
+        tail = wav[n:]
+    parts.append(tail)
+    return np.concatenate(parts)
+
+
+class LongFormSynthesizer:
+    """
+    Pool de processos para síntese de textos longos.
+
+    Cada processo carrega o modelo uma única vez e sintetiza trechos
+    independentes; os resultados são devolvidos na ordem original para
+    serem costurados com crossfade.
+    """
+
+    def __init__(self,
+                 workers: Optional[int] = None,
+                 threads_per_worker: Optional[int] = None,
+                 engine_config: Optional[Dict] = None):
+        """
+        Args:
+            workers: Número de processos de trabalho (None ou 1: sem processos, opcional por
+                exigir uma cópia do modelo por processo)
+            threads_per_worker: Threads do torch por processo (padrão: núcleos / processos)
+            engine_config: Argumentos do TTSEngine de cada processo, vindos do engine principal
+        """
+        self.workers = max(1, workers or 1)
+        self.engine_config = dict(engine_config or {})
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers)
+        self.logger = logging.getLogger(__name__)
+        self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self.logger.info(f"Iniciando {self.workers} processos para síntese de textos longos")
+            # "spawn" evita herdar o estado de threads do torch do processo pai
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.threads_per_worker, self.engine_config)
+            )
+        return self._executor
+
+    def synthesize(self,
+                   model_id: str,
+                   chunks: List[str],
+                   language: Optional[str] = None,
+                   conditioning_latents: Optional[Tuple] = None,
+                   speed: float = 1.0,
+                   sampling_params: Optional[Dict] = None) -> List[np.ndarray]:
+        """
+        Sintetiza os trechos em paralelo
+
+        Returns:
+            Lista de formas de onda na mesma ordem dos trechos
+        """
+        executor = self._get_executor()
+        futures = [
+            executor.submit(_synthesize_chunk, model_id, chunk, language, conditioning_latents, speed, sampling_params)
+            for chunk in chunks
+        ]
+        try:
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            # Um processo morreu (ex: falta de memória); o pool é recriado na próxima chamada
+            self.logger.error("Processo de síntese de textos longos encerrado inesperadamente")
+            self._executor = None
+            raise
+
+    def shutdown(self):
+        """Encerra os processos de trabalho"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,282 @@
+import os
+import re
+import json
+import logging
+from typing import Dict, List, Optional
+import numpy as np
+import onnxruntime as ort
+
+from core.text_processing import split_sentences as split_text_sentences
+
+# Nomes dos arquivos gerados por TrainingManager.export_model
+VITS_GRAPH_NAME = "model.onnx"
+XTTS_DECODER_GRAPH_NAME = "xtts_decoder.onnx"
+METADATA_NAME = "model.json"
+
+# Provedores do onnxruntime em ordem de preferência (usados os disponíveis na instalação)
+PREFERRED_PROVIDERS = ("CUDAExecutionProvider", "CPUExecutionProvider")
+
+# Silêncio inserido entre sentenças (mesmo valor do Synthesizer do Coqui)
+SENTENCE_SILENCE_SAMPLES = 10000
+
+
+def _collapse_whitespace(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _basic_cleaners(text: str) -> str:
+    return _collapse_whitespace(text.lower())
+
+
+def _remove_aux_symbols(text: str) -> str:
+    return re.sub(r"[\<\>\(\)\[\]\"]+", "", text)
+
+
+def _multilingual_cleaners(text: str) -> str:
+    text = text.lower().replace(";", ",").replace("-", " ").replace(":", ",")
+    return _collapse_whitespace(_remove_aux_symbols(text))
+
+
+# Normalização de números e abreviações do inglês (TTS/tts/utils/text/english do Coqui)
+_EN_ABBREVIATIONS = [
+    (re.compile(rf"\b{abbreviation}\.", re.IGNORECASE), expansion)
+    for abbreviation, expansion in [
+        ("mrs", "misess"), ("mr", "mister"), ("dr", "doctor"), ("st", "saint"), ("co", "company"),
+        ("jr", "junior"), ("maj", "major"), ("gen", "general"), ("drs", "doctors"), ("rev", "reverend"),
+        ("lt", "lieutenant"), ("hon", "honorable"), ("sgt", "sergeant"), ("capt", "captain"),
+        ("esq", "esquire"), ("ltd", "limited"), ("col", "colonel"), ("ft", "fort"),
+    ]
+]
+_EN_CURRENCIES = {
+    "$": {0.01: "cent", 0.02: "cents", 1: "dollar", 2: "dollars"},
+    "£": {0.01: "penny", 0.02: "pence", 1: "pound sterling", 2: "pounds sterling"},
+    "¥": {0.02: "sen", 2: "yen"},
+}
+_EN_COMMA_NUMBER = re.compile(r"([0-9][0-9\,]+[0-9])")
+_EN_DECIMAL_NUMBER = re.compile(r"([0-9]+\.[0-9]+)")
+_EN_CURRENCY = re.compile(r"(£|\$|¥)([0-9\,\.]*[0-9]+)")
+_EN_ORDINAL = re.compile(r"[0-9]+(st|nd|rd|th)")
+_EN_NUMBER = re.compile(r"-?[0-9]+")
+_inflect = None
+
+
+def _en_expand_currency(match) -> str:
+    inflection = _EN_CURRENCIES[match.group(1)]
+    value = match.group(2)
+    parts = value.replace(",", "").split(".")
+    if len(parts) > 2:
+        return f"{value} {inflection[2]}"
+    text = []
+    integer = int(parts[0]) if parts[0] else 0
+    if integer > 0:
+        text.append(f"{integer} {inflection.get(integer, inflection[2])}")
+    fraction = int(parts[1]) if len(parts) > 1 and parts[1] else 0
+    if fraction > 0:
+        text.append(f"{fraction} {inflection.get(fraction / 100, inflection[0.02])}")
+    if not text:
+        return f"zero {inflection[2]}"
+    return " ".join(text)
+
+
+def _en_expand_number(match) -> str:
+    number = int(match.group(0))
+    if 1000 < number < 3000:
+        if number == 2000:
+            return "two thousand"
+        if 2000 < number < 2010:
+            return "two thousand " + _inflect.number_to_words(number % 100)
+        if number % 100 == 0:
+            return _inflect.number_to_words(number // 100) + " hundred"
+        return _inflect.number_to_words(number, andword="", zero="oh", group=2).replace(", ", " ")
+    return _inflect.number_to_words(number, andword="")
+
+
+def _en_normalize_numbers(text: str) -> str:
+    global _inflect
+    if _inflect is None:
+        import inflect
+        _inflect = inflect.engine()
+    text = _EN_COMMA_NUMBER.sub(lambda m: m.group(1).replace(",", ""), text)
+    text = _EN_CURRENCY.sub(_en_expand_currency, text)
+    text = _EN_DECIMAL_NUMBER.sub(lambda m: m.group(1).replace(".", " point "), text)
+    text = _EN_ORDINAL.sub(lambda m: _inflect.number_to_words(m.group(0)), text)
+    return _EN_NUMBER.sub(_en_expand_number, text)
+
+
+def _phoneme_cleaners(text: str) -> str:
+    # Sem conversão para minúsculas: o espeak trata a caixa
+    text = _en_normalize_numbers(text)
+    for regex, expansion in _EN_ABBREVIATIONS:
+        text = regex.sub(expansion, text)
+    text = text.replace(";", ",").replace("-", " ").replace(":", ",").replace("&", " and ")
+    return _collapse_whitespace(_remove_aux_symbols(text))
+
+
+# Limpadores de texto do Coqui reimplementados sem depender do pacote TTS;
+# modelos com outros limpadores não podem usar o backend ONNX
+TEXT_CLEANERS = {
+    None: lambda text: text,
+    "basic_cleaners": _basic_cleaners,
+    "multilingual_cleaners": _multilingual_cleaners,
+    "phoneme_cleaners": _phoneme_cleaners
+}
+
+
+def available_providers() -> List[str]:
+    """Provedores de PREFERRED_PROVIDERS disponíveis no onnxruntime instalado (CPU sempre incluído)"""
+    available = set(ort.get_available_providers())
+    return [provider for provider in PREFERRED_PROVIDERS if provider in available] or ["CPUExecutionProvider"]
+
+
+def create_session(graph_path: str, threads: Optional[int] = None) -> ort.InferenceSession:
+    """
+    Cria uma sessão do onnxruntime com otimizações de grafo habilitadas
+
+    Args:
+        graph_path: Arquivo .onnx
+        threads: Threads intra-op em CPU (padrão: todos os núcleos)
+    """
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads:
+        options.intra_op_num_threads = threads
+    return ort.InferenceSession(graph_path, sess_options=options, providers=available_providers())
+
+
+class OnnxVitsModel:
+    """
+    Modelo VITS exportado para ONNX, executado pelo onnxruntime.
+
+    Não depende do torch nem do pacote TTS: o vocabulário, o limpador de
+    texto e os parâmetros de inferência vêm do model.json gravado na
+    exportação, e o fonemizador espeak é o de core.espeak_phonemizer.
+    Expõe a mesma interface tts() usada pelo TTSEngine.
+    """
+
+    def __init__(self, model_dir: str, threads: Optional[int] = None):
+        """
+        Args:
+            model_dir: Diretório com model.onnx e model.json
+            threads: Threads do onnxruntime (padrão: todos os núcleos)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.model_dir = model_dir
+        with open(os.path.join(model_dir, METADATA_NAME), "r", encoding="utf-8") as f:
+            self.metadata = json.load(f)
+        if self.metadata.get("type") != "vits":
+            raise ValueError(f"Modelo ONNX não suportado: {self.metadata.get('type')}")
+
+        self.model_name = self.metadata.get("model_name", model_dir)
+        self.output_sample_rate = self.metadata["sample_rate"]
+        self.session = create_session(os.path.join(model_dir, VITS_GRAPH_NAME), threads)
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+        self._char_to_id = {char: i for i, char in enumerate(self.metadata["characters"])}
+        cleaner = self.metadata.get("text_cleaner")
+        if cleaner not in TEXT_CLEANERS:
+            raise ValueError(f"Limpador de texto não suportado: {cleaner}")
+        self._cleaner = TEXT_CLEANERS[cleaner]
+        self.phonemizer = None
+        if self.metadata.get("use_phonemes"):
+            if self.metadata["phonemizer"] == "espeak":
+                from core.espeak_phonemizer import EspeakPhonemizer
+
+                self.phonemizer = EspeakPhonemizer(self.metadata["phoneme_language"])
+            else:
+                # Outros fonemizadores (gruut, japonês...) só existem no pacote TTS
+                from TTS.tts.utils.text.phonemizers import get_phonemizer_by_name
+
+                self.phonemizer = get_phonemizer_by_name(
+                    self.metadata["phonemizer"],
+                    language=self.metadata["phoneme_language"]
+                )
+
+    def text_to_ids(self, text: str) -> List[int]:
+        """Converte o texto em ids de tokens (mesmo pipeline do TTSTokenizer do Coqui)"""
+        text = self._cleaner(text)
+        if self.phonemizer is not None:
+            text = self.phonemizer.phonemize(text, separator="")
+        ids = [self._char_to_id[char] for char in text if char in self._char_to_id]
+        if self.metadata.get("add_blank"):
+            blank = self.metadata["blank_id"]
+            interspersed = [blank] * (len(ids) * 2 + 1)
+            interspersed[1::2] = ids
+            ids = interspersed
+        if self.metadata.get("use_eos_bos"):
+            ids = [self.metadata["bos_id"]] + ids + [self.metadata["eos_id"]]
+        return ids
+
+    def infer(self, ids: List[int], speed: float = 1.0, speaker_id: Optional[int] = None) -> np.ndarray:
+        """Executa o grafo para uma sequência de ids"""
+        noise_scale, length_scale, noise_scale_dp = self.metadata["scales"]
+        inputs = {
+            "input": np.asarray([ids], dtype=np.int64),
+            "input_lengths": np.asarray([len(ids)], dtype=np.int64),
+            "scales": np.asarray([noise_scale, length_scale / speed, noise_scale_dp], dtype=np.float32)
+        }
+        if "sid" in self.input_names:
+            inputs["sid"] = np.asarray([speaker_id or 0], dtype=np.int64)
+        output = self.session.run(["output"], inputs)[0]
+        return output.reshape(-1).astype(np.float32)
+
+    def tts(self, text: str, split_sentences: bool = True, speed: float = 1.0, speaker: Optional[str] = None,
+            **kwargs) -> np.ndarray:
+        """
+        Sintetiza o texto
+
+        Args:
+            text: Texto para sintetizar
+            split_sentences: Se o texto deve ser sintetizado sentença a sentença
+            speed: Velocidade da fala (ajusta a escala de duração)
+            speaker: Nome do speaker em modelos multi-speaker (opcional)
+
+        Returns:
+            Forma de onda em float32
+        """
+        speaker_id = self.metadata.get("speakers", {}).get(speaker) if speaker else None
+        sentences = split_text_sentences(text) if split_sentences else [text]
+        silence = np.zeros(SENTENCE_SILENCE_SAMPLES, dtype=np.float32)
+        wavs = []
+        for sentence in sentences:
+            ids = self.text_to_ids(sentence)
+            if not ids:
+                continue
+            wavs.extend([self.infer(ids, speed, speaker_id), silence])
+        return np.concatenate(wavs) if wavs else np.zeros(0, dtype=np.float32)
+
+    @property
+    def speakers(self) -> List[str]:
+        return list(self.metadata.get("speakers", {}).keys())
+
+
+class OnnxHifiDecoder:
+    """
+    Decodificador HiFi-GAN do XTTS executado pelo onnxruntime.
+
+    Substitui xtts.hifigan_decoder mantendo a mesma assinatura
+    (latentes do GPT [B, T, 1024], embedding do speaker [B, 512, 1]). O
+    codificador de speaker original é preservado, pois é usado no cálculo
+    dos latentes de condicionamento.
+    """
+
+    def __init__(self, graph_path: str, speaker_encoder=None, threads: Optional[int] = None):
+        self.session = create_session(graph_path, threads)
+        self.speaker_encoder = speaker_encoder
+
+    def __call__(self, latents, g=None):
+        import torch
+
+        output = self.session.run(["wav"], {
+            "latents": latents.detach().cpu().numpy().astype(np.float32),
+            "speaker_embedding": g.detach().cpu().numpy().astype(np.float32)
+        })[0]
+        return torch.from_numpy(output).to(latents.device)
+
+    def inference(self, c, g):
+        return self(c, g=g)
+
+
+def read_metadata(model_dir: str) -> Dict:
+    """Lê o model.json de um diretório exportado"""
+    with open(os.path.join(model_dir, METADATA_NAME), "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,229 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.result_cache import canonicalize_text
+
+
+def phonemizer_id(phonemizer) -> str:
+    """
+    Identifica o fonemizador e sua versão (ex: "espeak-ng 1.51")
+
+    Faz parte da chave do cache, para que uma atualização do espeak não
+    reaproveite fonemas gerados pela versão anterior.
+    """
+    name = phonemizer.name() if callable(getattr(phonemizer, "name", None)) else type(phonemizer).__name__
+    backend = getattr(phonemizer, "backend", None)
+    try:
+        version = phonemizer.version()
+    except Exception:
+        version = "?"
+    return f"{backend or name} {version}"
+
+
+class PhonemeCache:
+    """
+    Cache persistente de fonemas da inferência, também preenchido pelo
+    TrainingManager.precompute_phonemes.
+
+    Os fonemas ficam em um banco SQLite indexado por (texto normalizado,
+    idioma, fonemizador + versão), com um LRU em memória na frente. O banco
+    tem um número máximo de entradas e, ao excedê-lo, descarta as usadas há
+    mais tempo. Vários processos (interface, servidor, treinamento) podem
+    usar o mesmo arquivo.
+    """
+
+    def __init__(self,
+                 path: Optional[str] = "./cache/phonemes.sqlite",
+                 memory_max_items: int = 4096,
+                 disk_max_items: int = 200000):
+        """
+        Args:
+            path: Arquivo do banco SQLite (None = apenas memória)
+            memory_max_items: Número máximo de entradas no LRU em memória
+            disk_max_items: Número máximo de entradas no banco
+        """
+        self.path = path
+        self.memory_max_items = memory_max_items
+        self.disk_max_items = disk_max_items
+        self.logger = logging.getLogger(__name__)
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._db = None
+        self._disk_items = 0
+
+        if self.path:
+            try:
+                self._open()
+            except sqlite3.Error as e:
+                self.logger.warning(f"Cache de fonemas em disco indisponível, usando apenas memória: {e}")
+                self._db = None
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS phonemes ("
+            " text TEXT NOT NULL, language TEXT NOT NULL, phonemizer TEXT NOT NULL,"
+            " phonemes TEXT NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (text, language, phonemizer))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS phonemes_last_used ON phonemes (last_used)")
+        self._disk_items = self._db.execute("SELECT COUNT(*) FROM phonemes").fetchone()[0]
+
+    @staticmethod
+    def make_key(text: str, language: Optional[str], phonemizer: str) -> Tuple[str, str, str]:
+        """Gera a chave do cache (texto normalizado, idioma, fonemizador)"""
+        return canonicalize_text(text), language or "", phonemizer
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[str]:
+        """Busca os fonemas de um texto; retorna None se não estiverem no cache"""
+        with self._lock:
+            phonemes = self._memory.get(key)
+            if phonemes is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return phonemes
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT phonemes FROM phonemes WHERE text = ? AND language = ? AND phonemizer = ?", key
+                    ).fetchone()
+                    if row is not None:
+                        self._db.execute(
+                            "UPDATE phonemes SET last_used = ? WHERE text = ? AND language = ? AND phonemizer = ?",
+                            (time.time(), *key)
+                        )
+                except sqlite3.Error as e:
+                    self.logger.warning(f"Erro ao ler o cache de fonemas: {e}")
+                    row = None
+                if row is not None:
+                    self._stats["disk_hits"] += 1
+                    self._remember(key, row[0])
+                    return row[0]
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: Tuple[str, str, str], phonemes: str):
+        """Armazena os fonemas de um texto nos dois níveis"""
+        self.put_many([(key, phonemes)])
+
+    def put_many(self, items: Iterable[Tuple[Tuple[str, str, str], str]]):
+        """Armazena vários textos em uma única transação"""
+        items = list(items)
+        with self._lock:
+            for key, phonemes in items:
+                self._remember(key, phonemes)
+            if self._db is None or not items:
+                return
+            now = time.time()
+            try:
+                self._db.execute("BEGIN")
+                for key, phonemes in items:
+                    inserted = self._db.execute(
+                        "INSERT OR IGNORE INTO phonemes (text, language, phonemizer, phonemes, last_used)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (*key, phonemes, now)
+                    ).rowcount
+                    self._disk_items += inserted
+                self._db.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+                self.logger.warning(f"Não foi possível gravar no cache de fonemas: {e}")
+                return
+            if self._disk_items > self.disk_max_items:
+                self._evict_disk()
+
+    def _remember(self, key: Tuple[str, str, str], phonemes: str):
+        """Insere no LRU em memória (deve ser chamado com o lock)"""
+        self._memory[key] = phonemes
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """Descarta as entradas usadas há mais tempo até 90% do limite (deve ser chamado com o lock)"""
+        try:
+            # Outros processos também inserem: recontar antes de decidir quanto apagar
+            self._disk_items = self._db.execute("SELECT COUNT(*) FROM phonemes").fetchone()[0]
+            excess = self._disk_items - int(self.disk_max_items * 0.9)
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM phonemes WHERE rowid IN"
+                    " (SELECT rowid FROM phonemes ORDER BY last_used LIMIT ?)", (excess,)
+                )
+                self._disk_items -= excess
+        except sqlite3.Error as e:
+            self.logger.warning(f"Erro ao limpar o cache de fonemas: {e}")
+
+    def wrap(self, phonemizer) -> "CachedPhonemizer":
+        """Envolve um fonemizador do Coqui para que consulte este cache"""
+        if isinstance(phonemizer, CachedPhonemizer):
+            return phonemizer
+        return CachedPhonemizer(phonemizer, self)
+
+    def get_stats(self) -> Dict:
+        """Retorna acertos, erros, taxa de acerto e ocupação dos dois níveis"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_items"] = len(self._memory)
+            stats["disk_items"] = self._disk_items if self._db is not None else 0
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        total = hits + stats["misses"]
+        stats["hit_rate"] = hits / total if total else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class CachedPhonemizer:
+    """
+    Fonemizador do Coqui com cache.
+
+    Substitui tokenizer.phonemizer: phonemize() consulta o PhonemeCache antes
+    de chamar o espeak; os demais atributos são repassados ao original.
+    """
+
+    def __init__(self, phonemizer, cache: PhonemeCache):
+        self.phonemizer = phonemizer
+        self.cache = cache
+        self.phonemizer_id = phonemizer_id(phonemizer)
+        self.default_language = getattr(phonemizer, "language", None)
+
+    def phonemize(self, text: str, separator: str = "|", language: Optional[str] = None) -> str:
+        return self.phonemize_batch([text], separator, language)[0]
+
+    def phonemize_batch(self, texts: List[str], separator: str = "|", language: Optional[str] = None) -> List[str]:
+        """Fonemiza várias sentenças; só as ausentes do cache vão ao fonemizador, em um único lote"""
+        phonemizer = f"{self.phonemizer_id} sep={separator!r}"
+        keys = [self.cache.make_key(text, language or self.default_language, phonemizer) for text in texts]
+        results = [self.cache.get(key) for key in keys]
+        missing = [i for i, phonemes in enumerate(results) if phonemes is None]
+        if missing:
+            pending = [keys[i][0] for i in missing]
+            if hasattr(self.phonemizer, "phonemize_batch"):
+                phonemized = self.phonemizer.phonemize_batch(pending, separator=separator, language=language)
+            else:
+                phonemized = [self.phonemizer.phonemize(text, separator=separator, language=language) for text in pending]
+            for i, phonemes in zip(missing, phonemized):
+                results[i] = phonemes
+            self.cache.put_many((keys[i], results[i]) for i in missing)
+        return results
+
+    def __getattr__(self, name):
+        return getattr(self.phonemizer, name)
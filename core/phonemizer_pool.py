@@ -0,0 +1,212 @@
+import os
+import re
+import ctypes
+import ctypes.util
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+# Constantes da API do libespeak-ng (speak_lib.h)
+_AUDIO_OUTPUT_SYNCHRONOUS = 0x02
+_ESPEAK_CHARS_UTF8 = 1
+_PHONEMES_IPA = 0x02
+
+# Marcadores de troca de idioma do espeak-ng, ex: "(en)fˈʊtbɔːl(pt)"
+_LANGUAGE_FLAGS = re.compile(r"\(.+?\)")
+
+# Biblioteca do espeak carregada uma única vez em cada processo de trabalho
+_worker_espeak = None
+
+
+def find_espeak_library() -> Optional[str]:
+    """Localiza o libespeak-ng (ou libespeak); PHONEMIZER_ESPEAK_LIBRARY tem precedência"""
+    path = os.environ.get("PHONEMIZER_ESPEAK_LIBRARY")
+    if path and os.path.exists(path):
+        return path
+    return ctypes.util.find_library("espeak-ng") or ctypes.util.find_library("espeak")
+
+
+class EspeakLibrary:
+    """
+    Acesso direto ao libespeak-ng via ctypes.
+
+    Inicializado uma vez, evita criar um processo do espeak a cada trecho
+    de texto, como faz o fonemizador de linha de comando do Coqui. A
+    biblioteca tem estado global e não é thread-safe: use uma instância
+    por processo.
+    """
+
+    def __init__(self, library_path: str):
+        self.library = ctypes.cdll.LoadLibrary(library_path)
+        if self.library.espeak_Initialize(_AUDIO_OUTPUT_SYNCHRONOUS, 0, None, 0) <= 0:
+            raise Exception(f"Falha ao inicializar o espeak: {library_path}")
+
+        self.library.espeak_TextToPhonemes.restype = ctypes.c_char_p
+        self.library.espeak_TextToPhonemes.argtypes = [ctypes.POINTER(ctypes.c_char_p), ctypes.c_int, ctypes.c_int]
+        self.library.espeak_SetVoiceByName.argtypes = [ctypes.c_char_p]
+        self.library.espeak_Info.restype = ctypes.c_char_p
+        self.library.espeak_Info.argtypes = [ctypes.c_void_p]
+        self.version = self.library.espeak_Info(None).decode("utf-8").split()[0]
+        self.language = None
+
+    def set_language(self, language: str):
+        if language == self.language:
+            return
+        if self.library.espeak_SetVoiceByName(language.encode("utf-8")) != 0:
+            raise ValueError(f"Idioma não suportado pelo espeak: {language}")
+        self.language = language
+
+    def phonemize(self, text: str, language: str, separator: str = "") -> str:
+        """Fonemiza um trecho sem pontuação (mesma saída que "espeak-ng -q --ipa=1")"""
+        self.set_language(language)
+        # O espeak separa os fonemas com "_"; como no Coqui, o separador é aplicado depois
+        mode = ord("_") << 8 | _PHONEMES_IPA
+        encoded = text.encode("utf-8")
+        text_ptr = ctypes.pointer(ctypes.c_char_p(encoded))
+        phonemes = ""
+        # A cada chamada o espeak devolve uma oração e avança o ponteiro (NULL no fim do texto)
+        while text_ptr.contents.value is not None:
+            clause = self.library.espeak_TextToPhonemes(text_ptr, _ESPEAK_CHARS_UTF8, mode)
+            if clause:
+                phonemes += _LANGUAGE_FLAGS.sub("", clause.decode("utf-8")).strip()
+        return phonemes.replace("_", separator)
+
+
+def _init_worker(library_path: str):
+    """Carrega o espeak no processo de trabalho"""
+    global _worker_espeak
+    _worker_espeak = EspeakLibrary(library_path)
+
+
+def _phonemize_segments(segments: List[str], language: str, separator: str) -> List[str]:
+    """Fonemiza um lote de trechos no processo de trabalho"""
+    return [_worker_espeak.phonemize(segment, language, separator) for segment in segments]
+
+
+class PhonemizerPool:
+    """
+    Pool de processos do espeak para o front-end de texto.
+
+    Cada processo carrega o libespeak-ng uma única vez e atende lotes de
+    trechos; as respostas voltam na ordem dos trechos. Se um processo morrer
+    (o espeak pode encerrar o processo em entradas patológicas), o pool é
+    recriado e o lote é reenviado uma vez.
+    """
+
+    def __init__(self, workers: Optional[int] = None, library_path: Optional[str] = None):
+        """
+        Args:
+            workers: Número de processos (padrão: número de núcleos)
+            library_path: Caminho do libespeak-ng (padrão: localizado automaticamente)
+        """
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.library_path = library_path or find_espeak_library()
+        self.logger = logging.getLogger(__name__)
+        self._executor = None
+        self._restarts = 0
+
+    @property
+    def available(self) -> bool:
+        """True se o libespeak foi encontrado"""
+        return self.library_path is not None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if not self.available:
+            raise Exception("libespeak-ng não encontrado. Instale o espeak-ng.")
+        if self._executor is None:
+            self.logger.info(f"Iniciando {self.workers} processos do fonemizador")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.library_path,)
+            )
+        return self._executor
+
+    def _run(self, segments: List[str], language: str, separator: str) -> List[str]:
+        executor = self._get_executor()
+        # Um lote contíguo por processo, para preservar a ordem com o mínimo de mensagens
+        size = -(-len(segments) // self.workers)
+        futures = [
+            executor.submit(_phonemize_segments, segments[start:start + size], language, separator)
+            for start in range(0, len(segments), size)
+        ]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def phonemize(self, segments: List[str], language: str, separator: str = "") -> List[str]:
+        """
+        Fonemiza um lote de trechos (sem pontuação) em paralelo
+
+        Args:
+            segments: Trechos de texto
+            language: Voz do espeak (ex: "pt-br")
+            separator: Separador entre fonemas
+
+        Returns:
+            Fonemas de cada trecho, na mesma ordem
+        """
+        if not segments:
+            return []
+        for attempt in range(2):
+            try:
+                return self._run(segments, language, separator)
+            except BrokenProcessPool:
+                self.logger.error("Processo do fonemizador encerrado inesperadamente; reiniciando o pool")
+                self._executor = None
+                self._restarts += 1
+        raise Exception("O fonemizador encerrou o processo duas vezes com o mesmo lote")
+
+    def wrap(self, phonemizer) -> "PooledPhonemizer":
+        """Faz um fonemizador espeak do Coqui usar este pool"""
+        if isinstance(phonemizer, PooledPhonemizer):
+            return phonemizer
+        return PooledPhonemizer(phonemizer, self)
+
+    def get_stats(self) -> Dict:
+        """Retorna o número de processos e de reinícios do pool"""
+        return {"workers": self.workers, "running": self._executor is not None, "restarts": self._restarts}
+
+    def shutdown(self):
+        """Encerra os processos de trabalho"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+class PooledPhonemizer:
+    """
+    Fonemizador espeak do Coqui executado no PhonemizerPool.
+
+    Usa o pré e o pós-processamento de pontuação do fonemizador original,
+    de modo que a saída é a mesma; apenas a chamada ao espeak muda. Os
+    demais atributos são repassados ao original.
+    """
+
+    def __init__(self, phonemizer, pool: PhonemizerPool):
+        self.phonemizer = phonemizer
+        self.pool = pool
+
+    def phonemize_batch(self, texts: List[str], separator: str = "|", language: Optional[str] = None) -> List[str]:
+        """Fonemiza várias sentenças com uma única ida ao pool; retorna os fonemas na ordem"""
+        prepared = [self.phonemizer._phonemize_preprocess(text) for text in texts]
+        segments = [segment for parts, _ in prepared for segment in parts]
+        phonemized = self.pool.phonemize(segments, self.phonemizer.language, separator)
+
+        results = []
+        position = 0
+        for parts, punctuations in prepared:
+            results.append(self.phonemizer._phonemize_postprocess(phonemized[position:position + len(parts)],
+                                                                  punctuations))
+            position += len(parts)
+        return results
+
+    def phonemize(self, text: str, separator: str = "|", language: Optional[str] = None) -> str:
+        return self.phonemize_batch([text], separator, language)[0]
+
+    def __getattr__(self, name):
+        return getattr(self.phonemizer, name)
@@ -0,0 +1,117 @@
+import io
+import logging
+from typing import Dict, Optional
+import numpy as np
+import torch
+from torch import nn
+
+logger = logging.getLogger(__name__)
+
+# Camadas convertidas para int8 pela quantização dinâmica
+DYNAMIC_QUANT_LAYERS = {nn.Linear, nn.LSTM, nn.LSTMCell, nn.GRU, nn.GRUCell}
+
+
+def _replace_hf_conv1d(module: nn.Module) -> int:
+    """
+    Substitui as camadas Conv1D do HuggingFace (usadas pelo GPT-2 do XTTS) por nn.Linear
+
+    A Conv1D do transformers é uma camada linear com o peso transposto; sem a
+    conversão, a quantização dinâmica ignoraria toda a atenção e o MLP do GPT.
+
+    Returns:
+        Número de camadas substituídas
+    """
+    replaced = 0
+    for parent in module.modules():
+        for name, child in list(parent.named_children()):
+            if type(child).__name__ != "Conv1D" or not hasattr(child, "nf"):
+                continue
+            in_features, out_features = child.weight.shape
+            linear = nn.Linear(in_features, out_features, bias=child.bias is not None)
+            linear.weight.data = child.weight.data.t().contiguous()
+            if child.bias is not None:
+                linear.bias.data = child.bias.data
+            setattr(parent, name, linear)
+            replaced += 1
+    return replaced
+
+
+def quantize_model(tts) -> None:
+    """
+    Aplica quantização dinâmica int8 às camadas Linear/LSTM de um modelo TTS carregado (in-place)
+
+    No XTTS apenas o GPT é quantizado (30 camadas x 1024 canais, o maior custo
+    em CPU); o decodificador HiFi-GAN é convolucional e permanece em fp32. Nos
+    demais modelos (Tacotron2, VITS) o modelo inteiro é percorrido.
+
+    Args:
+        tts: Instância TTS (TTS.api) já carregada em CPU
+    """
+    tts_model = tts.synthesizer.tts_model
+    if next(tts_model.parameters()).device.type != "cpu":
+        raise ValueError("A quantização int8 dinâmica só é suportada em CPU")
+
+    targets = [tts_model.gpt] if type(tts_model).__name__ == "Xtts" else [tts_model]
+    vocoder = getattr(tts.synthesizer, "vocoder_model", None)
+    if vocoder is not None:
+        targets.append(vocoder)
+
+    for target in targets:
+        replaced = _replace_hf_conv1d(target)
+        if replaced:
+            logger.info(f"{replaced} camadas Conv1D convertidas para Linear antes da quantização")
+        torch.ao.quantization.quantize_dynamic(target, DYNAMIC_QUANT_LAYERS, dtype=torch.qint8, inplace=True)
+
+
+class _ByteCounter(io.RawIOBase):
+    """Destino de escrita que apenas conta os bytes (evita copiar o modelo serializado)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.count += len(data)
+        return len(data)
+
+
+def model_size_bytes(module: nn.Module) -> int:
+    """Retorna o tamanho serializado dos pesos do módulo (inclui pesos int8 empacotados)"""
+    counter = _ByteCounter()
+    torch.save(module.state_dict(), counter)
+    return counter.count
+
+
+def log_mel_distance(reference: np.ndarray, candidate: np.ndarray, sample_rate: int) -> float:
+    """Distância L1 média entre os log-mel espectrogramas de dois áudios (alinhados pelo início)"""
+    import librosa
+
+    length = min(len(reference), len(candidate))
+    if length == 0:
+        return float("inf")
+    mels = [
+        np.log(librosa.feature.melspectrogram(y=wav[:length], sr=sample_rate, n_mels=80) + 1e-5)
+        for wav in (reference, candidate)
+    ]
+    return float(np.mean(np.abs(mels[0] - mels[1])))
+
+
+def snr_db(reference: np.ndarray, candidate: np.ndarray) -> Optional[float]:
+    """Relação sinal-ruído entre a referência e o candidato, se tiverem o mesmo comprimento"""
+    if len(reference) != len(candidate):
+        return None
+    noise = np.sum((reference - candidate) ** 2)
+    if noise == 0:
+        return float("inf")
+    return float(10 * np.log10(np.sum(reference ** 2) / noise))
+
+
+def compare_outputs(reference: np.ndarray, candidate: np.ndarray, sample_rate: int) -> Dict:
+    """Compara a saída int8 com a saída fp32 do mesmo texto"""
+    return {
+        "duration_ratio": len(candidate) / max(len(reference), 1),
+        "log_mel_l1": log_mel_distance(reference, candidate, sample_rate),
+        "snr_db": snr_db(reference, candidate)
+    }
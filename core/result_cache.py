@@ -0,0 +1,222 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+
+def canonicalize_text(text: str) -> str:
+    """Normaliza o texto para comparação (Unicode NFC e espaços colapsados)"""
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class ResultCache:
+    """
+    Cache de áudios sintetizados em dois níveis (memória + disco).
+
+    O nível em memória é um LRU limitado em bytes. O nível em disco tem uma
+    cota em bytes e, ao excedê-la, descarta primeiro as entradas com maior
+    produto idade x tamanho, preservando áudios curtos e usados com frequência.
+    O módulo não depende do torch: um acerto não toca no modelo.
+    """
+
+    def __init__(self,
+                 cache_dir: Optional[str] = "./cache/audio",
+                 memory_max_bytes: int = 64 * 1024 * 1024,
+                 disk_max_bytes: int = 1024 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Diretório do nível em disco (None = apenas memória)
+            memory_max_bytes: Tamanho máximo do nível em memória
+            disk_max_bytes: Cota do nível em disco
+        """
+        self.cache_dir = cache_dir
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.logger = logging.getLogger(__name__)
+
+        self._memory = OrderedDict()  # chave -> (áudio, taxa de amostragem)
+        self._memory_bytes = 0
+        self._disk_index: Dict[str, Tuple[int, float]] = {}  # chave -> (bytes, último acesso)
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bytes_saved": 0}
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._scan_disk()
+
+    def make_key(self,
+                 text: str,
+                 model: str,
+                 language: Optional[str] = None,
+                 speaker_hash: Optional[str] = None,
+                 speed: float = 1.0,
+                 sampling_params: Optional[Dict] = None) -> str:
+        """Gera a chave do cache a partir de todos os parâmetros que afetam o áudio"""
+        payload = json.dumps({
+            "text": canonicalize_text(text),
+            "model": model,
+            "language": language,
+            "speaker": speaker_hash,
+            "speed": float(speed),
+            "sampling": sampling_params or {}
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def _scan_disk(self):
+        """Reconstrói o índice do nível em disco a partir dos arquivos existentes"""
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(".npz"):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, file_name))
+            self._disk_index[file_name[:-4]] = (stat.st_size, stat.st_mtime)
+            self._disk_bytes += stat.st_size
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Busca um áudio no cache
+
+        Returns:
+            Tupla (áudio float32, taxa de amostragem) ou None
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                self._stats["bytes_saved"] += entry[0].nbytes
+                return entry
+            on_disk = key in self._disk_index
+
+        if on_disk:
+            path = self._disk_path(key)
+            try:
+                with np.load(path) as data:
+                    entry = (data["audio"], int(data["sample_rate"]))
+                entry[0].flags.writeable = False
+                now = time.time()
+                os.utime(path, (now, now))
+                with self._lock:
+                    if key in self._disk_index:
+                        self._disk_index[key] = (self._disk_index[key][0], now)
+                    self._stats["disk_hits"] += 1
+                    self._stats["bytes_saved"] += entry[0].nbytes
+                self._remember(key, entry)
+                return entry
+            except (OSError, KeyError, ValueError) as e:
+                self.logger.warning(f"Entrada de cache de áudio inválida ({key}): {e}")
+                self._remove_from_disk(key)
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, audio: np.ndarray, sample_rate: int):
+        """Armazena um áudio nos dois níveis do cache"""
+        # Cópia somente leitura: o array é compartilhado entre todos os acertos
+        stored = np.array(audio, dtype=np.float32, copy=True)
+        stored.flags.writeable = False
+        entry = (stored, int(sample_rate))
+        self._remember(key, entry)
+
+        if self.cache_dir:
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    np.savez(f, audio=entry[0], sample_rate=np.int32(entry[1]))
+                os.replace(tmp_path, path)
+                size = os.path.getsize(path)
+            except OSError as e:
+                self.logger.warning(f"Não foi possível gravar áudio no cache: {e}")
+                return
+
+            with self._lock:
+                previous = self._disk_index.get(key)
+                if previous:
+                    self._disk_bytes -= previous[0]
+                self._disk_index[key] = (size, time.time())
+                self._disk_bytes += size
+                victims = self._select_disk_victims()
+
+            for victim in victims:
+                self._remove_from_disk(victim)
+
+    def _remember(self, key: str, entry: Tuple[np.ndarray, int]):
+        """Insere no nível em memória, descartando as entradas menos recentes se necessário"""
+        size = entry[0].nbytes
+        if size > self.memory_max_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= previous[0].nbytes
+            self._memory[key] = entry
+            self._memory_bytes += size
+            while self._memory_bytes > self.memory_max_bytes:
+                _, (old_audio, _) = self._memory.popitem(last=False)
+                self._memory_bytes -= old_audio.nbytes
+
+    def _select_disk_victims(self) -> list:
+        """Escolhe as entradas do disco a descartar (deve ser chamado com o lock)"""
+        if self._disk_bytes <= self.disk_max_bytes:
+            return []
+
+        # Descarta até 90% da cota para não repetir a varredura a cada inserção
+        target = self.disk_max_bytes * 0.9
+        now = time.time()
+        ranked = sorted(
+            self._disk_index.items(),
+            key=lambda item: (now - item[1][1]) * item[1][0],
+            reverse=True
+        )
+        victims = []
+        remaining = self._disk_bytes
+        for key, (size, _) in ranked:
+            if remaining <= target:
+                break
+            victims.append(key)
+            remaining -= size
+        return victims
+
+    def _remove_from_disk(self, key: str):
+        with self._lock:
+            entry = self._disk_index.pop(key, None)
+            if entry:
+                self._disk_bytes -= entry[0]
+        try:
+            os.remove(self._disk_path(key))
+        except OSError:
+            pass
+
+    def clear(self, remove_files: bool = False):
+        """Limpa o nível em memória e, opcionalmente, o nível em disco"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            keys = list(self._disk_index.keys()) if remove_files else []
+        for key in keys:
+            self._remove_from_disk(key)
+
+    def get_stats(self) -> Dict:
+        """Retorna contadores de acertos, falhas, bytes economizados e ocupação"""
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+            stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+            stats["memory_bytes"] = self._memory_bytes
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_bytes"] = self._disk_bytes
+            stats["disk_entries"] = len(self._disk_index)
+        return stats
@@ -0,0 +1,318 @@
+import os
+import re
+import json
+import time
+import heapq
+import itertools
+import logging
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from core.tts_engine import TTSEngine, AudioChunk
+
+# Classes de prioridade: jobs em lote só passam na frente de respostas
+# interativas depois de esperarem o deslocamento da sua classe
+PRIORITY_CLASSES = ("interactive", "batch")
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    """Contagem aproximada de tokens (palavras e pontuação), independente do modelo"""
+    return len(_TOKEN.findall(text))
+
+
+class CostModel:
+    """
+    Prevê o custo (segundos de CPU/GPU) de uma síntese.
+
+    custo = tokens x segundos de áudio por token x RTF do modelo
+
+    Os segundos de áudio por token e o RTF (tempo de síntese / duração do
+    áudio) são médias móveis exponenciais por modelo, atualizadas a cada
+    síntese concluída (acertos de cache e requisições coalescidas não contam)
+    e persistidas em JSON no máximo a cada save_interval segundos e em flush().
+    """
+
+    def __init__(self,
+                 path: Optional[str] = "./cache/cost_model.json",
+                 default_audio_per_token: float = 0.25,
+                 default_rtf: float = 1.0,
+                 smoothing: float = 0.2,
+                 save_interval: float = 30.0):
+        """
+        Args:
+            path: Arquivo JSON do histórico (None = apenas memória)
+            default_audio_per_token: Segundos de áudio por token para modelos sem histórico
+            default_rtf: RTF para modelos sem histórico
+            smoothing: Peso de cada nova observação na média móvel
+            save_interval: Intervalo mínimo em segundos entre gravações do arquivo
+        """
+        self.path = path
+        self.default_audio_per_token = default_audio_per_token
+        self.default_rtf = default_rtf
+        self.smoothing = smoothing
+        self.save_interval = save_interval
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._models: Dict[str, Dict] = {}
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._models = json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Histórico de custo inválido, ignorando: {e}")
+
+    def predict(self, model_id: str, tokens: int) -> float:
+        """Retorna o custo previsto em segundos"""
+        with self._lock:
+            stats = self._models.get(model_id, {})
+        audio_per_token = stats.get("audio_per_token", self.default_audio_per_token)
+        rtf = stats.get("rtf", self.default_rtf)
+        return max(tokens, 1) * audio_per_token * rtf
+
+    def update(self, model_id: str, tokens: int, audio_seconds: float, elapsed: float):
+        """Registra um job concluído"""
+        if tokens <= 0 or audio_seconds <= 0:
+            return
+        with self._lock:
+            stats = self._models.setdefault(model_id, {"samples": 0})
+            observed = {"audio_per_token": audio_seconds / tokens, "rtf": elapsed / audio_seconds}
+            for name, value in observed.items():
+                previous = stats.get(name)
+                stats[name] = value if previous is None else previous + self.smoothing * (value - previous)
+            stats["samples"] += 1
+            self._dirty = True
+            if time.monotonic() - self._last_save < self.save_interval:
+                return
+        self.flush()
+
+    def flush(self):
+        """Grava o histórico se houver observações ainda não salvas"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._last_save = time.monotonic()
+            snapshot = json.loads(json.dumps(self._models))
+        self._save(snapshot)
+
+    def _save(self, snapshot: Dict):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, indent=4)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f"Não foi possível salvar o histórico de custo: {e}")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return json.loads(json.dumps(self._models))
+
+
+@dataclass
+class ScheduledJob:
+    """Job aguardando uma thread de síntese"""
+    text: str
+    speaker_wav: Optional[str]
+    language: Optional[str]
+    model_name: Optional[str]
+    speed: float
+    sampling_params: Optional[Dict]
+    priority: str
+    model_id: str
+    tokens: int
+    predicted_cost: float
+    enqueued_at: float
+    future: Future = field(default_factory=Future)
+
+
+class SynthesisScheduler:
+    """
+    Escalonador de sínteses: menor custo previsto primeiro, com envelhecimento.
+
+    A fila é um heap ordenado por
+
+        custo previsto + deslocamento da classe + taxa de envelhecimento x instante de chegada
+
+    Como "custo - taxa x tempo de espera" difere desse valor apenas por um
+    termo comum a todos os jobs, a ordem do heap equivale a descontar do
+    custo de cada job o tempo que ele já esperou: um parágrafo longo acaba
+    passando na frente de confirmações curtas que chegaram muito depois,
+    sem sofrer inanição. Jobs da classe "batch" recebem um deslocamento fixo.
+    """
+
+    def __init__(self,
+                 engine: TTSEngine,
+                 workers: int = 1,
+                 aging_rate: float = 1.0,
+                 batch_offset: float = 30.0,
+                 cost_model: Optional[CostModel] = None,
+                 token_counter: Callable[[str], int] = count_tokens):
+        """
+        Args:
+            engine: TTSEngine que executa as sínteses
+            workers: Número de threads de síntese
+            aging_rate: Segundos de custo descontados por segundo de espera
+            batch_offset: Custo extra (segundos) dos jobs da classe "batch"
+            cost_model: Modelo de custo (padrão: CostModel persistido em ./cache)
+            token_counter: Função que conta os tokens de um texto
+        """
+        self.engine = engine
+        self.workers = max(1, workers)
+        self.aging_rate = aging_rate
+        self.class_offsets = {"interactive": 0.0, "batch": batch_offset}
+        self.cost_model = cost_model or CostModel()
+        self.token_counter = token_counter
+        self.logger = logging.getLogger(__name__)
+
+        self._heap: List = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+        self._stats = {name: {"submitted": 0, "completed": 0, "failed": 0, "total_wait": 0.0}
+                       for name in PRIORITY_CLASSES}
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"tts-scheduler-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self,
+               text: str,
+               speaker_wav: Optional[str] = None,
+               language: Optional[str] = None,
+               model_name: Optional[str] = None,
+               speed: float = 1.0,
+               sampling_params: Optional[Dict] = None,
+               priority: str = "interactive") -> Future:
+        """
+        Enfileira uma síntese
+
+        Args:
+            text: Texto para sintetizar
+            speaker_wav: Arquivo de áudio do speaker para clonagem de voz (opcional)
+            language: Código do idioma (opcional)
+            model_name: Modelo a usar (opcional, padrão: modelo atual)
+            speed: Velocidade da fala
+            sampling_params: Parâmetros de amostragem do XTTS (opcional)
+            priority: "interactive" ou "batch"
+
+        Returns:
+            Future que recebe um AudioChunk
+        """
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Classe de prioridade inválida: {priority}")
+
+        model_id = self.engine._model_identity(model_name, language)
+
+        # Acertos do cache de resultados não ocupam a fila
+        key = self.engine._result_key(text, model_id, language, speaker_wav, speed, sampling_params)
+        cached = self.engine.result_cache.get(key)
+        if cached is not None:
+            future = Future()
+            future.set_result(AudioChunk(audio=cached[0], sample_rate=cached[1], index=0, text=text))
+            return future
+
+        tokens = self.token_counter(text)
+        job = ScheduledJob(
+            text=text,
+            speaker_wav=speaker_wav,
+            language=language,
+            model_name=model_name,
+            speed=speed,
+            sampling_params=sampling_params,
+            priority=priority,
+            model_id=model_id,
+            tokens=tokens,
+            predicted_cost=self.cost_model.predict(model_id, tokens),
+            enqueued_at=time.monotonic()
+        )
+        key = job.predicted_cost + self.class_offsets[priority] + self.aging_rate * job.enqueued_at
+
+        with self._condition:
+            if self._closed:
+                raise Exception("Escalonador encerrado")
+            self._ensure_started()
+            heapq.heappush(self._heap, (key, next(self._sequence), job))
+            self._stats[priority]["submitted"] += 1
+            self._condition.notify()
+        return job.future
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._heap and not self._closed:
+                    self._condition.wait()
+                if not self._heap:
+                    return
+                _, _, job = heapq.heappop(self._heap)
+
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            self._run(job)
+
+    def _run(self, job: ScheduledJob):
+        started = time.monotonic()
+        try:
+            wav, sample_rate, source = self.engine._synthesize_with_source(
+                job.text, job.speaker_wav, job.language, job.model_name,
+                speed=job.speed, sampling_params=job.sampling_params
+            )
+        except Exception as e:
+            self.logger.error(f"Erro na síntese escalonada: {e}")
+            with self._condition:
+                self._stats[job.priority]["failed"] += 1
+            job.future.set_exception(e)
+            return
+
+        elapsed = time.monotonic() - started
+        if source == "synthesized":
+            # Tempos de acertos de cache e de requisições coalescidas não refletem o custo do modelo
+            self.cost_model.update(job.model_id, job.tokens, len(wav) / sample_rate, elapsed)
+        with self._condition:
+            stats = self._stats[job.priority]
+            stats["completed"] += 1
+            stats["total_wait"] += started - job.enqueued_at
+        job.future.set_result(AudioChunk(audio=wav, sample_rate=sample_rate, index=0, text=job.text))
+
+    def queue_depth(self) -> Dict[str, int]:
+        """Número de jobs aguardando por classe de prioridade"""
+        with self._condition:
+            depth = {name: 0 for name in PRIORITY_CLASSES}
+            for _, _, job in self._heap:
+                depth[job.priority] += 1
+        return depth
+
+    def get_stats(self) -> Dict:
+        """Retorna contadores e espera média por classe, além do histórico do modelo de custo"""
+        with self._condition:
+            classes = {}
+            for name, stats in self._stats.items():
+                classes[name] = dict(stats)
+                classes[name]["avg_wait"] = stats["total_wait"] / stats["completed"] if stats["completed"] else 0.0
+        return {"classes": classes, "queue_depth": self.queue_depth(), "cost_model": self.cost_model.get_stats()}
+
+    def shutdown(self, wait: bool = True):
+        """Encerra as threads depois de esvaziar a fila"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            threads, self._threads = self._threads, []
+        if wait:
+            for thread in threads:
+                thread.join()
+        self.cost_model.flush()
@@ -0,0 +1,320 @@
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional, Tuple
+
+from core.tts_engine import TTSEngine, AudioChunk, encode_pcm16
+from core.audio_encoding import DEFAULT_ENCODING_RATE, encode_chunks
+
+AUDIO_CONTENT_TYPES = {
+    "wav": "audio/wav",
+    "opus": "audio/ogg",
+    "vorbis": "audio/ogg",
+    "flac": "audio/flac",
+}
+
+
+@dataclass
+class SynthesisRequest:
+    """Requisição recebida pelo servidor, aguardando o dispatcher"""
+    text: str
+    model_name: Optional[str] = None
+    language: Optional[str] = None
+    speaker_wav: Optional[str] = None
+    speed: float = 1.0
+    sampling_params: Optional[Dict] = None
+    future: Future = field(default_factory=Future)
+
+    @property
+    def batchable(self) -> bool:
+        """Só requisições sem clonagem de voz e com parâmetros padrão podem ir para generate_batch"""
+        return not self.speaker_wav and self.speed == 1.0 and not self.sampling_params
+
+    @property
+    def batch_key(self) -> Tuple[Optional[str], Optional[str]]:
+        return self.model_name, self.language
+
+
+class MicroBatchDispatcher:
+    """
+    Agrupa requisições concorrentes em lotes.
+
+    A primeira requisição abre uma janela de alguns milissegundos; tudo o
+    que chegar nesse intervalo para o mesmo (modelo, idioma) é sintetizado
+    em uma única chamada a TTSEngine.generate_batch. Requisições com
+    clonagem de voz ou parâmetros próprios são sintetizadas individualmente
+    em um pool de threads, para que uma síntese lenta (ex: XTTS) não atrase
+    os lotes e as requisições seguintes.
+    """
+
+    def __init__(self,
+                 engine: TTSEngine,
+                 window_ms: float = 5.0,
+                 max_batch_size: int = 16,
+                 single_workers: int = 4):
+        """
+        Args:
+            engine: TTSEngine com os modelos carregados uma única vez
+            window_ms: Janela de coleta de requisições em milissegundos
+            max_batch_size: Número máximo de requisições por lote
+            single_workers: Threads para as requisições sintetizadas individualmente
+        """
+        self.engine = engine
+        self.window = window_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self.single_workers = max(1, single_workers)
+        self.logger = logging.getLogger(__name__)
+
+        self._requests = queue.Queue()
+        self._thread = None
+        self._singles = None
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "batches": 0, "batched_requests": 0, "max_batch": 0, "errors": 0}
+
+    def start(self):
+        if self._thread is None:
+            self._singles = ThreadPoolExecutor(max_workers=self.single_workers, thread_name_prefix="tts-single")
+            self._thread = threading.Thread(target=self._run, name="tts-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._requests.put(None)
+            self._thread.join()
+            self._thread = None
+            self._singles.shutdown(wait=True)
+            self._singles = None
+
+    def submit(self, request: SynthesisRequest) -> Future:
+        """Enfileira a requisição; o Future recebe (AudioChunk, tamanho do lote)"""
+        with self._lock:
+            self._stats["requests"] += 1
+        self._requests.put(request)
+        return request.future
+
+    def _collect(self, first: SynthesisRequest) -> List[SynthesisRequest]:
+        """Coleta as requisições que chegarem dentro da janela iniciada pela primeira"""
+        collected = [first]
+        deadline = time.monotonic() + self.window
+        while len(collected) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self._requests.put(None)
+                break
+            collected.append(request)
+        return collected
+
+    def _run(self):
+        while True:
+            first = self._requests.get()
+            if first is None:
+                break
+            requests = self._collect(first)
+
+            groups: Dict[Tuple, List[SynthesisRequest]] = {}
+            for request in requests:
+                if request.batchable:
+                    groups.setdefault(request.batch_key, []).append(request)
+                else:
+                    self._singles.submit(self._run_single, request)
+            for (model_name, language), group in groups.items():
+                self._run_batch(model_name, language, group)
+
+    def _run_single(self, request: SynthesisRequest):
+        try:
+            wav, sample_rate = self.engine._synthesize_cached(
+                request.text, request.speaker_wav, request.language, request.model_name,
+                speed=request.speed, sampling_params=request.sampling_params
+            )
+            chunk = AudioChunk(audio=wav, sample_rate=sample_rate, index=0, text=request.text)
+            request.future.set_result((chunk, 1))
+        except Exception as e:
+            self._fail([request], e)
+
+    def _run_batch(self, model_name: Optional[str], language: Optional[str], group: List[SynthesisRequest]):
+        try:
+            chunks = self.engine.generate_batch([r.text for r in group], language=language, model_name=model_name)
+        except Exception as e:
+            self._fail(group, e)
+            return
+
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["batched_requests"] += len(group)
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(group))
+        for request, chunk in zip(group, chunks):
+            request.future.set_result((chunk, len(group)))
+
+    def _fail(self, requests: List[SynthesisRequest], error: Exception):
+        self.logger.error(f"Erro ao sintetizar {len(requests)} requisição(ões): {error}")
+        with self._lock:
+            self._stats["errors"] += len(requests)
+        for request in requests:
+            request.future.set_exception(error)
+
+    def get_stats(self) -> Dict:
+        """Retorna contadores de requisições, lotes e tamanho médio de lote"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._requests.qsize()
+        stats["avg_batch"] = stats["batched_requests"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+
+class SynthesisHandler(BaseHTTPRequestHandler):
+    """
+    Rotas:
+        POST /synthesize  {"text", "model_name"?, "language"?, "speaker_wav"?, "speed"?, "sampling_params"?,
+                           "format"?}
+                          -> audio/wav, ou audio/ogg / audio/flac (48 kHz) se "format" for "opus", "vorbis" ou "flac"
+        GET  /health      -> estado do servidor, modelos residentes, estatísticas do dispatcher,
+                             das requisições coalescidas e do cache de fonemas
+    """
+
+    dispatcher: MicroBatchDispatcher = None
+    request_timeout: float = 300.0
+
+    def _send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": "Rota não encontrada"})
+            return
+        engine = self.dispatcher.engine
+        self._send_json(200, {
+            "status": "ok",
+            "current_model": engine.current_model_name,
+            "resident_models": engine.list_resident_models(),
+            "dispatcher": self.dispatcher.get_stats(),
+            "coalescing": engine.get_coalescing_stats(),
+            "phoneme_cache": engine.get_phoneme_cache_stats(),
+            "prefix_kv_cache": engine.get_prefix_kv_cache_stats(),
+            "audio_token_guard": engine.get_audio_token_guard_stats()
+        })
+
+    def do_POST(self):
+        if self.path != "/synthesize":
+            self._send_json(404, {"error": "Rota não encontrada"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            text = payload.get("text")
+            if not isinstance(text, str) or not text.strip():
+                raise ValueError("Campo 'text' obrigatório")
+            output_format = payload.get("format", "wav")
+            if output_format not in AUDIO_CONTENT_TYPES:
+                raise ValueError(f"Formato não suportado: {output_format}")
+            request = SynthesisRequest(
+                text=text,
+                model_name=payload.get("model_name"),
+                language=payload.get("language"),
+                speaker_wav=payload.get("speaker_wav"),
+                speed=float(payload.get("speed", 1.0)),
+                sampling_params=payload.get("sampling_params")
+            )
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            chunk, batch_size = self.dispatcher.submit(request).result(timeout=self.request_timeout)
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+
+        sample_rate = chunk.sample_rate
+        if output_format == "wav":
+            body = encode_pcm16(chunk.audio, sample_rate)
+        else:
+            try:
+                body = encode_chunks([chunk], [output_format])[output_format]
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+                return
+            sample_rate = DEFAULT_ENCODING_RATE
+
+        self.send_response(200)
+        self.send_header("Content-Type", AUDIO_CONTENT_TYPES[output_format])
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Sample-Rate", str(sample_rate))
+        self.send_header("X-Batch-Size", str(batch_size))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(f"{self.address_string()} - {format % args}")
+
+
+def create_server(engine: TTSEngine,
+                  host: str = "127.0.0.1",
+                  port: int = 8020,
+                  window_ms: float = 5.0,
+                  max_batch_size: int = 16) -> ThreadingHTTPServer:
+    """
+    Cria o servidor HTTP (o dispatcher já iniciado)
+
+    Returns:
+        Servidor pronto para serve_forever(); server.dispatcher expõe o dispatcher
+    """
+    dispatcher = MicroBatchDispatcher(engine, window_ms=window_ms, max_batch_size=max_batch_size)
+    dispatcher.start()
+    handler = type("BoundSynthesisHandler", (SynthesisHandler,), {"dispatcher": dispatcher})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.dispatcher = dispatcher
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor HTTP local de síntese de voz")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Endereço de escuta (padrão: apenas local)")
+    parser.add_argument("--port", type=int, default=8020, help="Porta de escuta")
+    parser.add_argument("--model", type=str, default="VITS", help="Modelo carregado na inicialização")
+    parser.add_argument("--language", type=str, default="pt-br", help="Idioma do modelo inicial")
+    parser.add_argument("--window-ms", type=float, default=5.0, help="Janela de agrupamento das requisições")
+    parser.add_argument("--max-batch", type=int, default=16, help="Número máximo de requisições por lote")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger(__name__)
+
+    # Os modelos são carregados uma única vez e compartilhados por todas as requisições.
+    # Nenhuma chamada externa é feita: os modelos devem estar no cache local do Coqui.
+    engine = TTSEngine()
+    if not engine.load_model(args.model, args.language):
+        raise SystemExit(f"Não foi possível carregar o modelo {args.model} ({args.language})")
+
+    server = create_server(engine, args.host, args.port, args.window_ms, args.max_batch)
+    logger.info(f"Servidor de síntese em http://{args.host}:{args.port} (POST /synthesize, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.dispatcher.stop()
+        engine.shutdown()
+
+
+if __name__ == "__main__":
+    main()
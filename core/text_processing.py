@@ -0,0 +1,108 @@
+import re
+from typing import List, Callable, Optional
+
+# Abreviações comuns que não devem encerrar uma sentença
+ABBREVIATIONS = {
+    "sr", "sra", "srta", "dr", "dra", "prof", "profa", "exmo", "exma", "av", "nº", "n",
+    "mr", "mrs", "ms", "st", "etc", "ex", "pág", "p", "vol", "cap"
+}
+
+_SENTENCE_END = re.compile(r"([.!?…]+[\"'”’)\]]*)\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Divide um texto em sentenças
+
+    Quebra em pontuação final (. ! ? …) seguida de espaço e em quebras de
+    linha, ignorando abreviações conhecidas como "Sr." e "Dr.".
+
+    Args:
+        text: Texto a dividir
+
+    Returns:
+        Lista de sentenças sem espaços nas extremidades
+    """
+    sentences = []
+    for paragraph in re.split(r"\n+", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+
+        start = 0
+        for match in _SENTENCE_END.finditer(paragraph):
+            candidate = paragraph[start:match.end(1)]
+            last_word = candidate[:-len(match.group(1))].rsplit(None, 1)[-1:] or [""]
+            if match.group(1) == "." and last_word[0].lower() in ABBREVIATIONS:
+                continue
+            sentences.append(candidate.strip())
+            start = match.end()
+
+        tail = paragraph[start:].strip()
+        if tail:
+            sentences.append(tail)
+    return sentences
+
+
+_CLAUSE_BREAK = re.compile(r"(?<=[,;:—–])\s+")
+
+
+def _pack(pieces: List[str], fits: Callable[[str], bool]) -> List[str]:
+    """Agrupa trechos consecutivos enquanto o resultado couber no limite"""
+    chunks = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current} {piece}" if current else piece
+        if current and not fits(candidate):
+            chunks.append(current)
+            current = piece
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split_oversized(sentence: str, fits: Callable[[str], bool]) -> List[str]:
+    """Divide uma sentença que excede o limite em orações e, se preciso, em palavras"""
+    if fits(sentence):
+        return [sentence]
+
+    pieces = []
+    for clause in _CLAUSE_BREAK.split(sentence):
+        if fits(clause):
+            pieces.append(clause)
+        else:
+            pieces.extend(_pack(clause.split(), fits))
+    return _pack(pieces, fits)
+
+
+def chunk_text(text: str,
+               max_tokens: int,
+               count_tokens: Callable[[str], int],
+               max_chars: Optional[int] = None) -> List[str]:
+    """
+    Divide um texto longo em trechos que respeitam o limite de tokens do modelo
+
+    Sentenças inteiras são agrupadas enquanto couberem no limite; sentenças
+    maiores que o limite são quebradas em orações (, ; : —) e, em último
+    caso, entre palavras.
+
+    Args:
+        text: Texto a dividir
+        max_tokens: Número máximo de tokens por trecho
+        count_tokens: Função que conta os tokens de um texto
+        max_chars: Número máximo de caracteres por trecho (opcional)
+
+    Returns:
+        Lista de trechos, na ordem do texto original
+    """
+    def fits(candidate: str) -> bool:
+        if max_chars is not None and len(candidate) > max_chars:
+            return False
+        return count_tokens(candidate) <= max_tokens
+
+    pieces = []
+    for sentence in split_sentences(text):
+        pieces.extend(_split_oversized(sentence, fits))
+    return _pack(pieces, fits)
@@ -3,10 +3,10 @@ import json
 import logging
 from typing import Dict, List, Optional
 from dataclasses import dataclass
-import torch
-from TTS.config import load_config
-from TTS.trainer import Trainer, TrainingArgs
-from TTS.utils.audio import AudioProcessor
+from core.phoneme_cache import PhonemeCache
+
+# torch e TTS são importados apenas nos métodos que os usam, para não
+# pesar na inicialização da interface e dos scripts
 
 @dataclass
 class TrainingConfig:
@@ -26,6 +26,10 @@ class TrainingManager:
         self.models_dir = os.path.join(base_path, "models")
         self.datasets_dir = os.path.join(base_path, "datasets")
         self.output_dir = os.path.join(base_path, "outputs")
+
+        # Mesmo cache de fonemas usado pelo TTSEngine na inferência (o Trainer do Coqui
+        # não o consulta: mantém o próprio phoneme_cache_path)
+        self.phoneme_cache = PhonemeCache(path=os.path.join(base_path, "cache", "phonemes.sqlite"))
         
         # Configurações padrão por modelo
         self.model_configs = {
@@ -145,11 +149,15 @@ class TrainingManager:
             # Verificar requisitos específicos do modelo
             if model_config["requires_phonemes"] and not dataset_info["has_phonemes"]:
                 self.logger.warning("Dataset não possui informações de fonemas. Será feita conversão automática.")
+                self.precompute_phonemes(config.dataset_path, config.language,
+                                         text_cleaner=self._text_cleaner_of(config.model_name))
             
             if model_config["supports_multi_speaker"] and not dataset_info["has_speaker_info"]:
                 self.logger.warning("Dataset não possui informações de speaker. Treinamento será single-speaker.")
             
             # Verificar GPU
+            import torch
+
             if config.use_cuda and not torch.cuda.is_available():
                 self.logger.warning("GPU não disponível. Usando CPU para treinamento.")
                 config.use_cuda = False
@@ -160,6 +168,69 @@ class TrainingManager:
             self.logger.error(f"Erro ao preparar treinamento: {e}")
             return False
     
+    def _text_cleaner_of(self, model_name: str) -> Optional[str]:
+        """Retorna o text_cleaner da configuração de treinamento do modelo (ex: "basic_cleaners")"""
+        config_path = os.path.join(self.base_path, self.model_configs[model_name]["config_path"])
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Não foi possível ler o text_cleaner de {config_path}: {e}")
+            return None
+        for section in (config, config.get("model_params", {})):
+            if section.get("text_cleaner"):
+                return section["text_cleaner"]
+        return None
+
+    def precompute_phonemes(self,
+                            dataset_path: str,
+                            language: str = "pt-br",
+                            phonemizer_name: str = "espeak",
+                            text_cleaner: Optional[str] = None) -> Dict:
+        """
+        Fonemiza os textos do dataset e grava o resultado no cache de fonemas
+
+        Os textos passam antes pelo text_cleaner do modelo, como no
+        TTSTokenizer, para que a inferência de modelos com o mesmo cleaner
+        encontre as entradas. Textos que já estão no cache não passam pelo
+        espeak novamente. O Trainer do Coqui não lê este cache.
+
+        Args:
+            dataset_path: Diretório do dataset (com metadata.csv)
+            language: Idioma dos fonemas
+            phonemizer_name: Fonemizador do Coqui
+            text_cleaner: Nome do cleaner do Coqui (ex: "basic_cleaners"); None = texto sem limpeza
+
+        Returns:
+            Dict com o total de textos e quantos precisaram ser fonemizados
+        """
+        try:
+            import pandas as pd
+            from TTS.tts.utils.text import cleaners
+            from TTS.tts.utils.text.phonemizers import get_phonemizer_by_name
+
+            metadata = pd.read_csv(os.path.join(dataset_path, "metadata.csv"), sep="|")
+            phonemizer = self.phoneme_cache.wrap(get_phonemizer_by_name(phonemizer_name, language=language))
+            misses_before = self.phoneme_cache.get_stats()["misses"]
+            texts = metadata["text"].dropna().astype(str).tolist()
+            if text_cleaner:
+                clean = getattr(cleaners, text_cleaner, None)
+                if clean is None:
+                    raise ValueError(f"text_cleaner desconhecido: {text_cleaner}")
+                texts = [clean(text) for text in texts]
+            for text in texts:
+                # Mesmo separador usado pelo TTSTokenizer, para que a inferência reaproveite o resultado
+                phonemizer.phonemize(text, separator="", language=language)
+
+            phonemized = self.phoneme_cache.get_stats()["misses"] - misses_before
+            self.logger.info(f"Fonemas do dataset: {len(texts)} textos, {phonemized} fonemizados, "
+                             f"{len(texts) - phonemized} do cache")
+            return {"status": "success", "total": len(texts), "phonemized": phonemized}
+
+        except Exception as e:
+            self.logger.error(f"Erro ao pré-calcular fonemas: {e}")
+            return {"status": "error", "error": str(e)}
+
     def start_training(self, config: TrainingConfig, progress_callback=None):
         """
         Inicia o treinamento de um modelo
@@ -173,6 +244,9 @@ class TrainingManager:
             if not self.prepare_training(config):
                 raise ValueError("Falha ao preparar treinamento")
             
+            from TTS.config import load_config
+            from TTS.trainer import Trainer, TrainingArgs
+
             # Carregar configuração do modelo
             model_config = load_config(self.model_configs[config.model_name]["config_path"])
             
@@ -215,13 +289,187 @@ class TrainingManager:
             "time_elapsed": 0
         }
     
-    def export_model(self, output_path: str, format: str = "tflite"):
+    def _load_export_source(self, model_path: str):
+        """
+        Carrega o modelo a exportar
+
+        Args:
+            model_path: Diretório de um treinamento (config.json + checkpoint .pth)
+                ou nome de um modelo do Coqui (ex: "tts_models/pt/cv/vits")
+
+        Returns:
+            Modelo Coqui (Vits, Xtts, ...) em modo de avaliação, na CPU
+        """
+        if not os.path.isdir(model_path):
+            from TTS.api import TTS
+            return TTS(model_path).synthesizer.tts_model.cpu().eval()
+
+        from TTS.config import load_config
+        from TTS.tts.models import setup_model
+
+        config = load_config(os.path.join(model_path, "config.json"))
+        model = setup_model(config)
+        if type(model).__name__ == "Xtts":
+            model.load_checkpoint(config, checkpoint_dir=model_path, eval=True)
+            return model.cpu()
+
+        checkpoints = [f for f in os.listdir(model_path) if f.endswith(".pth")]
+        if not checkpoints:
+            raise ValueError(f"Nenhum checkpoint .pth encontrado em: {model_path}")
+        best = "best_model.pth" if "best_model.pth" in checkpoints else max(
+            checkpoints, key=lambda f: os.path.getmtime(os.path.join(model_path, f)))
+        model.load_checkpoint(config, os.path.join(model_path, best), eval=True)
+        return model.cpu()
+
+    def _onnx_export(self, module, args, path: str, **kwargs):
+        """Chama torch.onnx.export com o exportador TorchScript (suporta os eixos dinâmicos do VITS)"""
+        import inspect
+        import torch
+
+        if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+            kwargs["dynamo"] = False
+        with torch.no_grad():
+            torch.onnx.export(module, args, path, opset_version=15, **kwargs)
+
+    def _export_vits_onnx(self, model, output_path: str, model_name: str):
+        """Exporta um VITS completo (texto -> forma de onda) e grava o model.json"""
+        import torch
+        from core.onnx_backend import VITS_GRAPH_NAME, METADATA_NAME
+
+        class VitsOnnxWrapper(torch.nn.Module):
+            """Expõe as escalas de ruído e duração como entradas do grafo"""
+
+            def __init__(self, vits):
+                super().__init__()
+                self.vits = vits
+
+            def forward(self, text, text_lengths, scales, sid=None):
+                self.vits.inference_noise_scale = scales[0]
+                self.vits.length_scale = scales[1]
+                self.vits.inference_noise_scale_dp = scales[2]
+                aux_input = {"x_lengths": text_lengths, "d_vectors": None, "speaker_ids": sid,
+                             "language_ids": None, "durations": None}
+                return self.vits.inference(text, aux_input=aux_input)["model_outputs"]
+
+        scales = [model.inference_noise_scale, model.length_scale, model.inference_noise_scale_dp]
+        disc = getattr(model, "disc", None)
+        model.disc = None
+        model.eval()
+
+        text = torch.randint(low=0, high=2, size=(1, 100), dtype=torch.long)
+        args = (text, torch.LongTensor([text.size(1)]), torch.FloatTensor(scales))
+        input_names = ["input", "input_lengths", "scales"]
+        if model.num_speakers > 0:
+            args += (torch.LongTensor([0]),)
+            input_names.append("sid")
+        try:
+            self._onnx_export(
+                VitsOnnxWrapper(model),
+                args,
+                os.path.join(output_path, VITS_GRAPH_NAME),
+                input_names=input_names,
+                output_names=["output"],
+                dynamic_axes={
+                    "input": {0: "batch_size", 1: "text_length"},
+                    "input_lengths": {0: "batch_size"},
+                    "output": {0: "batch_size", 2: "audio_length"}
+                }
+            )
+        finally:
+            model.inference_noise_scale, model.length_scale, model.inference_noise_scale_dp = scales
+            model.disc = disc
+
+        tokenizer = model.tokenizer
+        characters = tokenizer.characters
+        speakers = {}
+        if model.speaker_manager is not None and model.speaker_manager.name_to_id:
+            speakers = dict(model.speaker_manager.name_to_id)
+        metadata = {
+            "type": "vits",
+            "model_name": model_name,
+            "sample_rate": model.config.audio.sample_rate,
+            "characters": list(characters.vocab),
+            "blank_id": characters.blank_id,
+            "bos_id": characters.bos_id,
+            "eos_id": characters.eos_id,
+            "add_blank": tokenizer.add_blank,
+            "use_eos_bos": tokenizer.use_eos_bos,
+            "use_phonemes": tokenizer.use_phonemes,
+            "phonemizer": tokenizer.phonemizer.name() if tokenizer.use_phonemes else None,
+            "phoneme_language": model.config.phoneme_language,
+            "text_cleaner": model.config.text_cleaner,
+            "scales": scales,
+            "speakers": speakers
+        }
+        with open(os.path.join(output_path, METADATA_NAME), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=4, ensure_ascii=False)
+
+    def _export_xtts_decoder_onnx(self, model, output_path: str, model_name: str):
+        """Exporta o decodificador HiFi-GAN do XTTS (latentes do GPT -> forma de onda)"""
+        import torch
+        from core.onnx_backend import XTTS_DECODER_GRAPH_NAME, METADATA_NAME
+
+        decoder = model.hifigan_decoder.eval()
+        latents = torch.randn(1, 50, model.args.gpt_n_model_channels)
+        speaker_embedding = torch.randn(1, model.args.d_vector_dim, 1)
+        self._onnx_export(
+            decoder,
+            (latents, speaker_embedding),
+            os.path.join(output_path, XTTS_DECODER_GRAPH_NAME),
+            input_names=["latents", "speaker_embedding"],
+            output_names=["wav"],
+            dynamic_axes={
+                "latents": {0: "batch_size", 1: "latent_length"},
+                "speaker_embedding": {0: "batch_size"},
+                "wav": {0: "batch_size", 2: "audio_length"}
+            }
+        )
+
+        metadata = {
+            "type": "xtts_decoder",
+            "model_name": model_name,
+            "sample_rate": model.args.output_sample_rate
+        }
+        with open(os.path.join(output_path, METADATA_NAME), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=4, ensure_ascii=False)
+
+    def export_model(self, output_path: str, format: str = "onnx", model_path: Optional[str] = None) -> str:
         """
         Exporta modelo treinado para formato específico
-        
+
+        Para VITS o grafo exportado cobre toda a inferência (ids de texto ->
+        forma de onda); para XTTS apenas o decodificador HiFi-GAN é exportado,
+        pois o GPT autoregressivo continua no PyTorch. Os eixos de comprimento
+        do texto e do áudio são dinâmicos.
+
         Args:
-            output_path: Caminho para salvar modelo
-            format: Formato de exportação (tflite, onnx, etc)
+            output_path: Diretório para salvar o modelo (ex: "models/onnx/tts_models--pt--cv--vits",
+                o diretório procurado pelo TTSEngine com backend="onnx")
+            format: Formato de exportação (apenas "onnx")
+            model_path: Diretório de um treinamento ou nome de um modelo do Coqui
+
+        Returns:
+            Diretório com o grafo exportado e o model.json
         """
-        # TODO: Implementar exportação de modelo
-        pass 
\ No newline at end of file
+        if format != "onnx":
+            raise ValueError(f"Formato de exportação não suportado: {format}")
+        if not model_path:
+            raise ValueError("Informe o modelo a exportar (model_path)")
+
+        try:
+            os.makedirs(output_path, exist_ok=True)
+            model = self._load_export_source(model_path)
+            model_type = type(model).__name__
+            self.logger.info(f"Exportando {model_type} ({model_path}) para ONNX em {output_path}")
+
+            if model_type == "Vits":
+                self._export_vits_onnx(model, output_path, model_path)
+            elif model_type == "Xtts":
+                self._export_xtts_decoder_onnx(model, output_path, model_path)
+            else:
+                raise ValueError(f"Exportação ONNX não suportada para o modelo: {model_type}")
+            return output_path
+
+        except Exception as e:
+            self.logger.error(f"Erro ao exportar modelo: {e}")
+            raise
\ No newline at end of file
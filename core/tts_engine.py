@@ -1,16 +1,512 @@
-from TTS.api import TTS
-import torch
 import os
+import sys
+import gc
+import time
+import json
+import uuid
+import struct
+import platform
+import statistics
 import threading
-from typing import Optional, Dict, List
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Callable, Any, Tuple, Iterator, TYPE_CHECKING
 import logging
+import numpy as np
+from core.conditioning_cache import ConditioningCache
+from core.result_cache import ResultCache
+from core.phoneme_cache import PhonemeCache
+from core.phonemizer_pool import PhonemizerPool
+from core.fast_tokenizer import FastXttsTokenizer, DEFAULT_VOCAB_PATH
+from core.long_form import LongFormSynthesizer, crossfade_concat
+from core.text_processing import split_sentences, chunk_text
+
+# torch e TTS são importados sob demanda: importar este módulo não deve
+# custar o carregamento do PyTorch (a interface gráfica abre antes)
+if TYPE_CHECKING:
+    import torch
+
+# Precisões suportadas por load_model
+SUPPORTED_PRECISIONS = ("fp32", "int8")
+
+# Backends de inferência: PyTorch ou grafos ONNX exportados por TrainingManager.export_model
+SUPPORTED_BACKENDS = ("torch", "onnx")
+
+# Sentença fixa usada para calibrar o número de threads
+THREAD_PROBE_SENTENCE = "Olá, este é um teste de calibração do sintetizador de voz em português."
+
+def _current_rss_bytes() -> Optional[int]:
+    """Retorna a memória residente (RSS) do processo atual em bytes, se disponível"""
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _model_size_bytes(model) -> int:
+    """
+    Estima a memória de um modelo pelo tamanho serializado do state_dict (0 se não for um módulo torch)
+
+    parameters() e buffers() não incluem os pesos empacotados das camadas
+    int8 dinâmicas; o state_dict serializado inclui.
+    """
+    torch = sys.modules.get("torch")
+    if torch is None or not isinstance(model, torch.nn.Module):
+        return 0
+    from core.quantization import model_size_bytes
+
+    return model_size_bytes(model)
+
+
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+
+def encode_pcm16(wav: np.ndarray, sample_rate: int, wav_header: bool = True) -> bytearray:
+    """
+    Converte a forma de onda em PCM 16 bits, normalizada como no Coqui TTS
+
+    As amostras são escritas diretamente no buffer de saída, sem cópias
+    intermediárias do áudio.
+
+    Args:
+        wav: Forma de onda float32
+        sample_rate: Taxa de amostragem
+        wav_header: Se True, inclui o cabeçalho WAV (RIFF); senão, apenas o PCM cru
+
+    Returns:
+        Buffer com o WAV (ou o PCM little-endian) pronto para envio ou gravação
+    """
+    wav = np.asarray(wav, dtype=np.float32)
+    peak = max(0.01, float(np.max(np.abs(wav)))) if wav.size else 1.0
+    data_size = 2 * wav.size
+    offset = _WAV_HEADER.size if wav_header else 0
+
+    buffer = bytearray(offset + data_size)
+    if wav_header:
+        _WAV_HEADER.pack_into(buffer, 0, b"RIFF", 36 + data_size, b"WAVE", b"fmt ", 16, 1, 1,
+                              sample_rate, sample_rate * 2, 2, 16, b"data", data_size)
+    pcm = np.frombuffer(buffer, dtype="<i2", offset=offset)
+    np.multiply(wav, 32767 / peak, out=pcm, casting="unsafe")
+    return buffer
+
+
+def write_wav(path: str, wav: np.ndarray, sample_rate: int):
+    """Grava a forma de onda como WAV PCM 16 bits, normalizada como no Coqui TTS"""
+    with open(path, "wb") as f:
+        f.write(encode_pcm16(wav, sample_rate))
+
+
+def make_output_path(output_dir: str = "./outputs", prefix: str = "tts", extension: str = "wav") -> str:
+    """Gera um caminho de arquivo único, para que requisições simultâneas não sobrescrevam umas às outras"""
+    os.makedirs(output_dir, exist_ok=True)
+    file_name = f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.{extension}"
+    return os.path.join(output_dir, file_name)
+
+
+def _cpu_model_name() -> str:
+    """Retorna o nome do modelo da CPU"""
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+class ThreadTuner:
+    """
+    Persiste e aplica a melhor configuração de threads do torch por modelo.
+
+    As configurações são indexadas por (modelo, CPU, número de núcleos), de
+    modo que um arquivo copiado para outra máquina não é reaproveitado.
+    """
+
+    def __init__(self, path: Optional[str] = "./cache/thread_tuning.json"):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._configs: Dict[str, Dict] = {}
+        self._interop_applied = False
+        # A CPU não muda durante a execução: /proc/cpuinfo é lido uma única vez
+        self._machine_id = f"{_cpu_model_name()}|{os.cpu_count()}"
+
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._configs = json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Arquivo de calibração de threads inválido: {e}")
+
+    def make_key(self, model_id: str) -> str:
+        """Gera a chave (modelo, CPU, núcleos) da configuração"""
+        return f"{model_id}|{self._machine_id}"
+
+    def get(self, model_id: str) -> Optional[Dict]:
+        """Retorna a configuração calibrada para o modelo nesta máquina"""
+        with self._lock:
+            return self._configs.get(self.make_key(model_id))
+
+    def save(self, model_id: str, config: Dict):
+        """Armazena a configuração calibrada e a persiste em disco"""
+        with self._lock:
+            self._configs[self.make_key(model_id)] = config
+            if not self.path:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._configs, f, indent=4)
+            os.replace(tmp_path, self.path)
+
+    def apply(self, model_id: str) -> bool:
+        """Aplica a configuração calibrada do modelo, se existir"""
+        config = self.get(model_id)
+        if not config:
+            return False
+
+        import torch
+
+        if torch.get_num_threads() != config["num_threads"]:
+            self.logger.info(f"Usando {config['num_threads']} threads para {model_id}")
+            torch.set_num_threads(config["num_threads"])
+
+        # As threads inter-op só podem ser definidas uma vez, antes do primeiro uso
+        interop = config.get("num_interop_threads")
+        if interop and not self._interop_applied:
+            self._interop_applied = True
+            try:
+                if torch.get_num_interop_threads() != interop:
+                    torch.set_num_interop_threads(interop)
+            except RuntimeError:
+                self.logger.debug("Threads inter-op já inicializadas; mantendo o valor atual")
+        return True
+
+
+@dataclass
+class AudioChunk:
+    """Trecho de áudio sintetizado (PCM float32 mono)"""
+    audio: np.ndarray
+    sample_rate: int
+    index: int
+    text: str
+
+
+class SingleFlight:
+    """
+    Coalescência de chamadas idênticas em andamento (singleflight).
+
+    Enquanto uma chamada para uma chave está em execução, chamadas
+    posteriores com a mesma chave aguardam e recebem o mesmo resultado (ou
+    a mesma exceção) em vez de repetir o trabalho.
+    """
 
-class TTSEngine:
     def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "coalesced": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Executa fn para a chave, ou aguarda a execução já em andamento"""
+        return self.do_with_role(key, fn)[0]
+
+    def do_with_role(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Como do(), mas retorna também se esta chamada executou fn (True) ou aguardou outra (False)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = Future()
+                self._calls[key] = call
+                self._stats["leaders"] += 1
+                leader = True
+            else:
+                self._stats["coalesced"] += 1
+                leader = False
+
+        if not leader:
+            return call.result(), False
+
+        try:
+            result = fn()
+            call.set_result(result)
+            return result, True
+        except BaseException as e:
+            # Inclui KeyboardInterrupt/SystemExit: quem aguarda não pode ficar bloqueado
+            call.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def get_stats(self) -> Dict:
+        """Retorna chamadas executadas, chamadas coalescidas e chamadas em andamento"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        total = stats["leaders"] + stats["coalesced"]
+        stats["coalesced_ratio"] = stats["coalesced"] / total if total else 0.0
+        return stats
+
+
+class ModelPool:
+    """
+    Pool de modelos TTS residentes em memória.
+
+    Mantém vários modelos carregados ao mesmo tempo e descarta os menos
+    usados recentemente (LRU) quando o número máximo de modelos, o orçamento
+    de memória ou o tempo de ociosidade são excedidos. O orçamento é comparado
+    com a soma dos tamanhos medidos no carregamento de cada modelo (o RSS do
+    processo não cai logo após o descarte). Os limites são aplicados a cada
+    get() e, com idle_timeout, também por uma thread periódica. O modelo
+    fixado com pin() (o modelo atual do TTSEngine) nunca é descartado.
+    """
+
+    def __init__(self,
+                 loader: Callable[[str], Any],
+                 max_models: Optional[int] = 3,
+                 memory_budget_mb: Optional[float] = None,
+                 idle_timeout: Optional[float] = None):
+        """
+        Args:
+            loader: Função que recebe a chave do modelo e retorna o modelo carregado
+            max_models: Número máximo de modelos residentes (None = sem limite)
+            memory_budget_mb: Orçamento de memória dos modelos residentes em MB (None = sem limite)
+            idle_timeout: Segundos sem uso após os quais um modelo é descartado (None = nunca)
+        """
+        self.loader = loader
+        self.max_models = max_models
+        self.memory_budget_mb = memory_budget_mb
+        self.idle_timeout = idle_timeout
+        self.logger = logging.getLogger(__name__)
+
+        self._models = OrderedDict()  # chave -> modelo, da menos para a mais recente
+        self._last_used: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}  # chave -> bytes estimados no carregamento
+        self._pinned: Optional[str] = None
+        self._lock = threading.Lock()
+        self._loading_locks: Dict[str, threading.Lock] = {}
+        self._stats = {"hits": 0, "loads": 0, "evictions": 0}
+
+        self._stop_sweeper = threading.Event()
+        self._sweeper = None
+        if idle_timeout is not None:
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="model-pool-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def _sweep_loop(self):
+        interval = max(1.0, self.idle_timeout / 2)
+        while not self._stop_sweeper.wait(interval):
+            self.sweep()
+
+    def pin(self, key: Optional[str]):
+        """Fixa um modelo no pool (não é descartado pelos limites); None remove a fixação"""
+        with self._lock:
+            self._pinned = key
+
+    def get(self, key: str) -> Any:
+        """Retorna o modelo da chave, carregando-o se ainda não estiver residente"""
+        with self._lock:
+            model = self._touch(key)
+            if model is not None:
+                self._stats["hits"] += 1
+                self._enforce_limits(keep=key)
+                return model
+            loading_lock = self._loading_locks.setdefault(key, threading.Lock())
+
+        # Carregamento fora do lock global para não bloquear os modelos já residentes
+        with loading_lock:
+            with self._lock:
+                model = self._touch(key)
+                if model is not None:
+                    self._stats["hits"] += 1
+                    return model
+
+            self.logger.info(f"Carregando modelo no pool: {key}")
+            rss_before = _current_rss_bytes()
+            model = self.loader(key)
+            size = _model_size_bytes(model)
+            if not size and rss_before is not None:
+                # Modelos sem pesos torch (ONNX): aumento de RSS durante o carregamento
+                size = max(0, (_current_rss_bytes() or rss_before) - rss_before)
+
+            with self._lock:
+                self._models[key] = model
+                self._sizes[key] = size
+                self._last_used[key] = time.monotonic()
+                self._stats["loads"] += 1
+                self._loading_locks.pop(key, None)
+                self._enforce_limits(keep=key)
+            return model
+
+    def _touch(self, key: str) -> Any:
+        """Marca o modelo como usado recentemente (deve ser chamado com o lock)"""
+        model = self._models.get(key)
+        if model is not None:
+            self._models.move_to_end(key)
+            self._last_used[key] = time.monotonic()
+        return model
+
+    def _enforce_limits(self, keep: Optional[str] = None):
+        """Descarta modelos ociosos e, em seguida, os menos usados até respeitar os limites"""
+        protected = {keep, self._pinned}
+        if self.idle_timeout is not None:
+            now = time.monotonic()
+            for key in list(self._models.keys()):
+                if key not in protected and now - self._last_used[key] > self.idle_timeout:
+                    self._evict(key, "ociosidade")
+
+        # Candidatos ao descarte, do menos para o mais recente
+        candidates = [key for key in self._models if key not in protected]
+        while self.max_models is not None and len(self._models) > self.max_models and candidates:
+            self._evict(candidates.pop(0), "limite de modelos")
+
+        if self.memory_budget_mb is not None:
+            budget = self.memory_budget_mb * 1024 * 1024
+            while candidates and sum(self._sizes.values()) > budget:
+                used = sum(self._sizes.values())
+                self._evict(candidates.pop(0), f"orçamento de memória ({used / 1024 / 1024:.0f} MB)")
+
+    def _evict(self, key: str, reason: str):
+        """Remove um modelo do pool e libera a memória associada"""
+        self._models.pop(key, None)
+        self._last_used.pop(key, None)
+        self._sizes.pop(key, None)
+        self._stats["evictions"] += 1
+        self.logger.info(f"Descartando modelo {key} do pool ({reason})")
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def sweep(self):
+        """Aplica os limites de ociosidade e memória sem carregar nenhum modelo"""
+        with self._lock:
+            self._enforce_limits()
+
+    def evict(self, key: str) -> bool:
+        """Remove explicitamente um modelo do pool"""
+        with self._lock:
+            if key not in self._models or key == self._pinned:
+                return False
+            self._evict(key, "remoção explícita")
+            return True
+
+    def clear(self):
+        """Remove todos os modelos do pool, exceto o fixado"""
+        with self._lock:
+            for key in list(self._models.keys()):
+                if key != self._pinned:
+                    self._evict(key, "limpeza do pool")
+
+    def close(self):
+        """Encerra a thread de descarte por ociosidade"""
+        self._stop_sweeper.set()
+
+    def resident_models(self) -> List[str]:
+        """Lista as chaves dos modelos residentes, do menos para o mais recente"""
+        with self._lock:
+            return list(self._models.keys())
+
+    def get_stats(self) -> Dict:
+        """Retorna estatísticas de uso do pool"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["resident"] = len(self._models)
+            stats["models_mb"] = sum(self._sizes.values()) / 1024 / 1024
+        rss = _current_rss_bytes()
+        stats["rss_mb"] = rss / 1024 / 1024 if rss is not None else None
+        return stats
+
+
+class TTSEngine:
+    def __init__(self,
+                 max_models: Optional[int] = 3,
+                 memory_budget_mb: Optional[float] = None,
+                 idle_timeout: Optional[float] = None,
+                 conditioning_cache_dir: Optional[str] = "./cache/conditioning",
+                 result_cache_dir: Optional[str] = "./cache/audio",
+                 phoneme_cache_path: Optional[str] = "./cache/phonemes.sqlite",
+                 phonemizer_workers: Optional[int] = None,
+                 prefix_kv_cache_mb: Optional[float] = 256,
+                 audio_token_guard: Optional[str] = "resample",
+                 decoder_window: Optional[int] = None,
+                 long_form_workers: Optional[int] = None,
+                 crossfade_ms: float = 20.0,
+                 thread_tuning_path: Optional[str] = "./cache/thread_tuning.json",
+                 onnx_models_dir: str = "./models/onnx"):
         self.current_model = None
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.current_model_name = None
+        self.current_language = None
+        self.precision = "fp32"
+        self.backend = "torch"
+        self.onnx_models_dir = onnx_models_dir
+        self._device = None
         self.logger = logging.getLogger(__name__)
-        
+
+        # Pool de modelos residentes, compartilhado entre as requisições
+        self.model_pool = ModelPool(
+            loader=self._load_tts,
+            max_models=max_models,
+            memory_budget_mb=memory_budget_mb,
+            idle_timeout=idle_timeout
+        )
+
+        # Cache dos latentes de condicionamento das vozes clonadas (XTTS)
+        self.conditioning_cache = ConditioningCache(cache_dir=conditioning_cache_dir)
+
+        # Cache dos áudios já sintetizados (memória + disco)
+        self.result_cache = ResultCache(cache_dir=result_cache_dir)
+
+        # Cache persistente de fonemas (espeak), compartilhado com o TrainingManager
+        self.phoneme_cache = PhonemeCache(path=phoneme_cache_path)
+
+        # Estado KV do prefixo de voz do GPT do XTTS, reaproveitado entre sentenças e requisições
+        self.prefix_kv_cache_mb = prefix_kv_cache_mb
+        self.prefix_kv_cache = None
+
+        # Limite de tokens de áudio do XTTS previsto pelo texto ("resample", "stop" ou None)
+        self.audio_token_guard_action = audio_token_guard
+        self.audio_token_guard = None
+
+        # Decodificação do HiFi-GAN em janelas de N quadros (memória constante; None = sequência inteira)
+        self.decoder_window = decoder_window
+
+        # Tokenizer do XTTS para contar tokens sem carregar o modelo (criado sob demanda)
+        self._text_tokenizer = None
+
+        # Processos persistentes do espeak (um por núcleo; 0 desativa e usa o espeak do Coqui)
+        self.phonemizer_pool = PhonemizerPool(workers=phonemizer_workers) if phonemizer_workers != 0 else None
+
+        # Síntese paralela de textos longos (opcional: cada processo carrega sua própria cópia
+        # do modelo; None ou 1 sintetiza os trechos neste processo)
+        self.long_form = LongFormSynthesizer(
+            workers=long_form_workers,
+            engine_config={
+                "phoneme_cache_path": phoneme_cache_path,
+                "phonemizer_workers": phonemizer_workers,
+                "prefix_kv_cache_mb": prefix_kv_cache_mb,
+                "audio_token_guard": audio_token_guard,
+                "decoder_window": decoder_window,
+                "onnx_models_dir": onnx_models_dir
+            }
+        )
+        self.crossfade_ms = crossfade_ms
+
+        # Configuração de threads calibrada por modelo (apenas em CPU)
+        self.thread_tuner = ThreadTuner(thread_tuning_path)
+
+        # Requisições idênticas simultâneas compartilham a mesma síntese
+        self.inflight = SingleFlight()
+
         # Modelos pré-definidos por idioma
         self.available_models = {
             "pt-br": {
@@ -30,7 +526,7 @@ class TTSEngine:
                 "XTTS v2": "tts_models/multilingual/multi-dataset/xtts_v2"
             }
         }
-        
+
         # Configurações específicas por modelo
         self.model_configs = {
             "XTTS v2": {
@@ -54,84 +550,1141 @@ class TTSEngine:
                 "languages": ["en"]
             }
         }
-    
-    def load_model(self, model_name: str, language: str = "pt-br") -> bool:
-        """Carrega um modelo TTS específico"""
+
+    @property
+    def device(self) -> str:
+        """Dispositivo de inferência (resolvido no primeiro uso, pois exige importar o torch)"""
+        if self._device is None:
+            import torch
+            self._device = "cuda" if torch.cuda.is_available() else "cpu"
+        return self._device
+
+    def _make_model_key(self, model_path: str, precision: str = "fp32", backend: str = "torch") -> str:
+        """
+        Gera a chave do pool para um modelo em uma precisão e backend
+
+        Ex: "tts_models/pt/cv/vits", "tts_models/pt/cv/vits@int8", "onnx:tts_models/pt/cv/vits"
+        """
+        if backend == "onnx":
+            return f"onnx:{model_path}"
+        return model_path if precision == "fp32" else f"{model_path}@{precision}"
+
+    def _parse_model_key(self, key: str) -> Tuple[str, str, str]:
+        """Separa a chave do pool em (caminho do modelo, precisão, backend)"""
+        if key.startswith("onnx:"):
+            return key[len("onnx:"):], "fp32", "onnx"
+        model_path, _, precision = key.partition("@")
+        return model_path, precision or "fp32", "torch"
+
+    def get_onnx_model_dir(self, model_path: str) -> str:
+        """Diretório onde o TTSEngine procura o modelo exportado para ONNX"""
+        return os.path.join(self.onnx_models_dir, model_path.replace("/", "--"))
+
+    def _load_onnx(self, model_path: str):
+        """
+        Carrega um modelo exportado para ONNX
+
+        VITS roda inteiramente no onnxruntime; no XTTS o GPT continua no
+        PyTorch e apenas o decodificador HiFi-GAN é substituído pelo grafo ONNX.
+        """
+        from core.onnx_backend import (OnnxVitsModel, OnnxHifiDecoder, read_metadata,
+                                       XTTS_DECODER_GRAPH_NAME)
+
+        model_dir = self.get_onnx_model_dir(model_path)
+        if not os.path.isdir(model_dir):
+            raise ValueError(f"Modelo ONNX não encontrado em {model_dir} (exporte com TrainingManager.export_model)")
+
+        metadata = read_metadata(model_dir)
+        # Threads intra-op da sessão: a calibração do modelo, se houver (o torch não é usado)
+        threads = (self.thread_tuner.get(self._make_model_key(model_path, backend="onnx")) or {}).get("num_threads")
+        if metadata["type"] == "vits":
+            return OnnxVitsModel(model_dir, threads=threads)
+
+        if metadata["type"] == "xtts_decoder":
+            from TTS.api import TTS
+
+            model = TTS(model_path).to("cpu")
+            xtts = self._get_xtts(model)
+            xtts.hifigan_decoder = OnnxHifiDecoder(
+                os.path.join(model_dir, XTTS_DECODER_GRAPH_NAME),
+                speaker_encoder=xtts.hifigan_decoder.speaker_encoder,
+                threads=threads
+            )
+            return model
+
+        raise ValueError(f"Modelo ONNX não suportado: {metadata['type']}")
+
+    def _key_of(self, model) -> str:
+        """Retorna a chave do pool de um modelo carregado"""
+        return getattr(model, "pool_key", None) or getattr(model, "model_name", None) or str(self.current_model_name)
+
+    def _load_tts(self, key: str):
+        """Instancia um modelo TTS no dispositivo atual (usado pelo pool)"""
+        model_path, precision, backend = self._parse_model_key(key)
+        if backend == "onnx":
+            model = self._load_onnx(model_path)
+            self._attach_text_frontend(model)
+            model.pool_key = key
+            model.inference_lock = threading.Lock()
+            return model
+
+        # Valida a combinação antes de carregar o modelo no dispositivo
+        if precision == "int8" and self.device != "cpu":
+            raise ValueError("A precisão int8 só é suportada em CPU")
+
+        from TTS.api import TTS
+
+        model = TTS(model_path).to(self.device)
+        if precision == "int8":
+            from core.quantization import quantize_model
+
+            self.logger.info(f"Aplicando quantização dinâmica int8 em {model_path}")
+            quantize_model(model)
+        self._attach_text_frontend(model)
+        self._attach_prefix_cache(model, key)
+        self._attach_audio_token_guard(model)
+        self._attach_chunked_decoder(model)
+        model.pool_key = key
+        # O GPT do XTTS guarda estado por chamada (store_prefix_emb, estado KV da geração):
+        # inferências simultâneas no mesmo modelo são serializadas
+        model.inference_lock = threading.Lock()
+        return model
+
+    def _wrap_phonemizer(self, phonemizer):
+        """Coloca o fonemizador atrás do cache de fonemas e, se for o espeak, do pool de processos"""
+        if self.phonemizer_pool is not None and self.phonemizer_pool.available and phonemizer.name() == "espeak":
+            phonemizer = self.phonemizer_pool.wrap(phonemizer)
+        return self.phoneme_cache.wrap(phonemizer)
+
+    def _attach_text_frontend(self, model):
+        """Troca o fonemizador do modelo (se houver) pelo front-end com cache e pool de processos"""
+        xtts = self._get_xtts(model)
+        if xtts is not None and xtts.tokenizer is not None and not isinstance(xtts.tokenizer, FastXttsTokenizer):
+            # XTTS não usa fonemas: o front-end é o tokenizer BPE compilado e memorizado
+            xtts.tokenizer = FastXttsTokenizer.from_coqui(xtts.tokenizer)
+            return
+
+        synthesizer = getattr(model, "synthesizer", None)
+        tokenizer = getattr(getattr(synthesizer, "tts_model", None), "tokenizer", None)
+        if tokenizer is not None and getattr(tokenizer, "use_phonemes", False) and tokenizer.phonemizer is not None:
+            tokenizer.phonemizer = self._wrap_phonemizer(tokenizer.phonemizer)
+        elif getattr(model, "phonemizer", None) is not None:
+            # OnnxVitsModel
+            model.phonemizer = self._wrap_phonemizer(model.phonemizer)
+
+    def _attach_prefix_cache(self, model, key: str):
+        """Ativa o cache KV do prefixo de voz no GPT de um modelo XTTS"""
+        xtts = self._get_xtts(model)
+        if xtts is None or not self.prefix_kv_cache_mb:
+            return
+        from core.kv_cache import PrefixKVCache, install_prefix_cache
+
+        if self.prefix_kv_cache is None:
+            self.prefix_kv_cache = PrefixKVCache(max_bytes=int(self.prefix_kv_cache_mb * 1024 * 1024))
+        install_prefix_cache(xtts, self.prefix_kv_cache, key)
+
+    def _attach_audio_token_guard(self, model):
+        """Limita os tokens de áudio gerados pelo GPT de um modelo XTTS de acordo com o texto"""
+        xtts = self._get_xtts(model)
+        if xtts is None or not self.audio_token_guard_action:
+            return
+        from core.generation_guard import AudioTokenGuard
+
+        if self.audio_token_guard is None:
+            self.audio_token_guard = AudioTokenGuard(action=self.audio_token_guard_action)
+        self.audio_token_guard.install(xtts)
+
+    def _attach_chunked_decoder(self, model):
+        """Faz o decodificador de forma de onda (VITS ou XTTS) processar janelas de decoder_window quadros"""
+        if not self.decoder_window:
+            return
+        from core.chunked_decoding import install_chunked_decoder
+
+        xtts = self._get_xtts(model)
+        owner = xtts.hifigan_decoder if xtts is not None else getattr(getattr(model, "synthesizer", None), "tts_model", None)
+        if owner is not None:
+            install_chunked_decoder(owner, window=self.decoder_window)
+
+    def _prephonemize(self, tokenizer, sentences: List[str]):
+        """Fonemiza as sentenças de um lote em uma única chamada; text_to_ids passa a acertar o cache"""
+        phonemizer = tokenizer.phonemizer
+        if not tokenizer.use_phonemes or not hasattr(phonemizer, "phonemize_batch"):
+            return
+        if tokenizer.text_cleaner is not None:
+            sentences = [tokenizer.text_cleaner(sentence) for sentence in sentences]
+        phonemizer.phonemize_batch(sentences, separator="")
+
+    def _resolve_model_path(self, model_name: str, language: str) -> Optional[str]:
+        """Resolve o caminho do modelo para um par (modelo, idioma)"""
+        model_path = self.available_models.get(language, {}).get(model_name)
+        if not model_path:
+            # Modelos multilíngues atendem qualquer idioma suportado
+            model_path = self.available_models["multilingual"].get(model_name)
+        return model_path
+
+    def get_model(self,
+                  model_name: str,
+                  language: str = "pt-br",
+                  precision: Optional[str] = None,
+                  backend: Optional[str] = None):
+        """
+        Retorna o modelo para um par (modelo, idioma), usando o pool de modelos residentes
+
+        Args:
+            model_name: Nome do modelo (ex: "VITS", "XTTS v2")
+            language: Código do idioma
+            precision: "fp32" ou "int8" (padrão: precisão definida em load_model)
+            backend: "torch" ou "onnx" (padrão: backend definido em load_model)
+
+        Returns:
+            Instância do modelo TTS ou None se o par não for conhecido
+        """
+        model_path = self._resolve_model_path(model_name, language)
+        if not model_path:
+            return None
+        key = self._make_model_key(model_path, precision or self.precision, backend or self.backend)
+        return self.model_pool.get(key)
+
+    def _get_xtts(self, model):
+        """Retorna o modelo Xtts interno se o TTS carregado for um XTTS, senão None"""
+        synthesizer = getattr(model, "synthesizer", None)
+        tts_model = getattr(synthesizer, "tts_model", None)
+        if tts_model is not None and type(tts_model).__name__ == "Xtts":
+            return tts_model
+        return None
+
+    def _xtts_language(self, language: Optional[str]) -> str:
+        """Converte o código de idioma da interface para o código usado pelo XTTS"""
+        if not language:
+            return "pt"
+        language = language.lower()
+        return language if language == "zh-cn" else language.split("-")[0]
+
+    def get_conditioning_latents(self, model, speaker_wav: str) -> Tuple["torch.Tensor", "torch.Tensor"]:
+        """
+        Retorna os latentes de condicionamento do XTTS para um áudio de referência, usando o cache
+
+        Args:
+            model: Modelo TTS (XTTS) carregado
+            speaker_wav: Arquivo de áudio de referência
+
+        Returns:
+            Tupla (gpt_cond_latent, speaker_embedding) no dispositivo do modelo
+        """
+        xtts = self._get_xtts(model)
+        if xtts is None:
+            raise ValueError("O modelo atual não suporta clonagem de voz")
+
+        params = {
+            "model": self._key_of(model),
+            "gpt_cond_len": xtts.config.gpt_cond_len,
+            "gpt_cond_chunk_len": xtts.config.gpt_cond_chunk_len,
+            "max_ref_len": xtts.config.max_ref_len,
+            "sound_norm_refs": xtts.config.sound_norm_refs
+        }
+
+        def compute():
+            self.logger.info(f"Calculando latentes de condicionamento para {speaker_wav}")
+            return xtts.get_conditioning_latents(
+                audio_path=speaker_wav,
+                max_ref_length=params["max_ref_len"],
+                gpt_cond_len=params["gpt_cond_len"],
+                gpt_cond_chunk_len=params["gpt_cond_chunk_len"],
+                sound_norm_refs=params["sound_norm_refs"]
+            )
+
+        gpt_cond_latent, speaker_embedding = self.conditioning_cache.get_or_compute(speaker_wav, params, compute)
+        return gpt_cond_latent.to(xtts.device), speaker_embedding.to(xtts.device)
+
+    def get_conditioning_stats(self) -> Dict:
+        """Retorna estatísticas do cache de latentes de condicionamento"""
+        return self.conditioning_cache.get_stats()
+
+    def load_model(self,
+                   model_name: str,
+                   language: str = "pt-br",
+                   precision: str = "fp32",
+                   backend: str = "torch",
+                   compile_mode: Optional[str] = None) -> bool:
+        """
+        Carrega um modelo TTS específico e o torna o modelo atual
+
+        Args:
+            model_name: Nome do modelo (ex: "VITS", "XTTS v2")
+            language: Código do idioma
+            precision: "fp32" ou "int8" (quantização dinâmica das camadas Linear/LSTM, apenas CPU)
+            backend: "torch" ou "onnx" (grafo exportado executado pelo onnxruntime em CPU)
+            compile_mode: None, "trace" (TorchScript) ou "compile" (torch.compile) para
+                compilar o decodificador e aquecê-lo ainda no carregamento
+
+        Returns:
+            True se o modelo foi carregado
+        """
+        if precision not in SUPPORTED_PRECISIONS:
+            raise ValueError(f"Precisão não suportada: {precision}")
+        if backend not in SUPPORTED_BACKENDS:
+            raise ValueError(f"Backend não suportado: {backend}")
+        if backend == "onnx" and precision != "fp32":
+            raise ValueError("O backend ONNX não suporta quantização int8")
+        if precision == "int8" and self.device != "cpu":
+            raise ValueError("A precisão int8 só é suportada em CPU")
+        if compile_mode is not None:
+            from core.compilation import COMPILE_MODES
+
+            if compile_mode not in COMPILE_MODES:
+                raise ValueError(f"Modo de compilação não suportado: {compile_mode}")
         try:
             if language in self.available_models:
                 model_path = self.available_models[language].get(model_name)
                 if model_path:
-                    self.logger.info(f"Carregando modelo {model_name} para {language}")
-                    self.current_model = TTS(model_path).to(self.device)
+                    self.logger.info(f"Carregando modelo {model_name} para {language} ({precision}, {backend})")
+                    key = self._make_model_key(model_path, precision, backend)
+                    self.current_model = self.model_pool.get(key)
+                    self.model_pool.pin(key)
+                    self.current_model_name = model_name
+                    self.current_language = language
+                    self.precision = precision
+                    self.backend = backend
+                    self._apply_thread_config(self.current_model)
+                    if compile_mode:
+                        self._compile_and_warmup(self.current_model, compile_mode)
                     return True
             return False
         except Exception as e:
             self.logger.error(f"Erro ao carregar modelo: {e}")
             return False
-    
-    def generate_speech(self, 
-                       text: str, 
-                       output_path: str = "output.wav",
-                       speaker_wav: Optional[str] = None,
-                       language: Optional[str] = None) -> str:
+
+    def _compile_and_warmup(self, model, compile_mode: str):
+        """
+        Compila o decodificador do modelo e faz o aquecimento antes da primeira requisição
+
+        O decodificador é pré-compilado para comprimentos em buckets; em
+        modelos sem clonagem de voz uma síntese completa aquece também o
+        restante do pipeline (codificador de texto, duração, fluxo).
+        """
+        if getattr(model, "compile_mode", None):
+            return
+        if not hasattr(model, "synthesizer"):
+            self.logger.warning("Modo compilado ignorado: o backend ONNX já executa um grafo otimizado")
+            return
+
+        from core.compilation import compile_model
+
+        compile_model(model, mode=compile_mode)
+        model.compile_mode = compile_mode
+        if self._get_xtts(model) is None:
+            start = time.perf_counter()
+            self._synthesize_array(model, THREAD_PROBE_SENTENCE, split_sentences=False)
+            self.logger.info(f"Aquecimento do pipeline completo em {time.perf_counter() - start:.1f}s")
+
+    def _select_model(self, model_name: Optional[str], language: Optional[str]):
+        """Seleciona o modelo da requisição: o informado ou o modelo atual"""
+        if model_name:
+            model = self.get_model(model_name, language or self.current_language or "pt-br")
+            if not model:
+                raise ValueError(f"Modelo não encontrado: {model_name} ({language})")
+        else:
+            model = self.current_model
+
+        if not model:
+            raise Exception("Nenhum modelo carregado")
+        self._apply_thread_config(model)
+        return model
+
+    def _apply_thread_config(self, model):
+        """Aplica a configuração de threads calibrada para o modelo (apenas em CPU)"""
+        if getattr(model, "synthesizer", None) is None:
+            # Modelo inteiramente em ONNX: as threads são as da sessão, definidas no carregamento
+            return
+        if self.device == "cpu":
+            self.thread_tuner.apply(self._key_of(model))
+
+    def calibrate_threads(self,
+                          model_name: str,
+                          language: str = "pt-br",
+                          speaker_wav: Optional[str] = None,
+                          candidates: Optional[List[int]] = None,
+                          repeats: int = 3) -> Dict:
+        """
+        Mede o desempenho do modelo com diferentes números de threads e salva o melhor
+
+        Cada configuração sintetiza uma sentença fixa várias vezes; a métrica é a
+        mediana do fator de tempo real (tempo de síntese / duração do áudio),
+        que não depende do comprimento variável das saídas do XTTS. As threads
+        inter-op do torch só podem ser definidas antes do primeiro uso e, por
+        isso, são registradas com o valor em vigor no processo.
+
+        Args:
+            model_name: Nome do modelo (ex: "VITS", "XTTS v2")
+            language: Código do idioma
+            speaker_wav: Áudio de referência (obrigatório para XTTS)
+            candidates: Números de threads a testar (padrão: potências de 2 até o número de núcleos)
+            repeats: Repetições por configuração
+
+        Returns:
+            Configuração escolhida, com os resultados de cada candidato
+        """
+        model = self.get_model(model_name, language)
+        if not model:
+            raise ValueError(f"Modelo não encontrado: {model_name} ({language})")
+        if self._get_xtts(model) is not None and not speaker_wav:
+            raise ValueError("A calibração do XTTS requer um áudio de referência (speaker_wav)")
+
+        cores = os.cpu_count() or 1
+        if not candidates:
+            candidates = sorted({min(2 ** i, cores) for i in range(cores.bit_length() + 1)} | {cores, max(1, cores // 2)})
+
+        import torch
+
+        sample_rate = self._get_sample_rate(model)
+        original_threads = torch.get_num_threads()
+        results = {}
+        try:
+            # Aquecimento: a primeira chamada inclui alocações e inicializações
+            self._synthesize_array(model, THREAD_PROBE_SENTENCE, speaker_wav, language, split_sentences=False)
+
+            for num_threads in candidates:
+                torch.set_num_threads(num_threads)
+                rtfs = []
+                for _ in range(repeats):
+                    torch.manual_seed(0)
+                    start = time.perf_counter()
+                    wav = self._synthesize_array(model, THREAD_PROBE_SENTENCE, speaker_wav, language,
+                                                 split_sentences=False)
+                    elapsed = time.perf_counter() - start
+                    rtfs.append(elapsed / max(len(wav) / sample_rate, 1e-3))
+                results[num_threads] = statistics.median(rtfs)
+                self.logger.info(f"Calibração {model_name}: {num_threads} threads -> RTF {results[num_threads]:.3f}")
+        finally:
+            torch.set_num_threads(original_threads)
+
+        best_threads = min(results, key=results.get)
+        config = {
+            "num_threads": best_threads,
+            "num_interop_threads": torch.get_num_interop_threads(),
+            "rtf": results[best_threads],
+            "results": {str(n): rtf for n, rtf in results.items()}
+        }
+        self.thread_tuner.save(self._key_of(model), config)
+        self._apply_thread_config(model)
+        return config
+
+    def _get_sample_rate(self, model) -> int:
+        """Retorna a taxa de amostragem de saída do modelo"""
+        synthesizer = getattr(model, "synthesizer", None)
+        return synthesizer.output_sample_rate if synthesizer is not None else model.output_sample_rate
+
+    def _synthesize_array(self,
+                          model,
+                          text: str,
+                          speaker_wav: Optional[str] = None,
+                          language: Optional[str] = None,
+                          split_sentences: bool = True,
+                          speed: float = 1.0,
+                          sampling_params: Optional[Dict] = None,
+                          conditioning_latents: Optional[Tuple] = None) -> np.ndarray:
         """
-        Gera fala a partir do texto
-        
+        Sintetiza o texto em memória
+
         Args:
+            model: Modelo TTS a usar
             text: Texto para sintetizar
-            output_path: Caminho para salvar o áudio
             speaker_wav: Arquivo de áudio do speaker para clonagem de voz (opcional)
             language: Código do idioma (opcional)
-        
+            split_sentences: Se o modelo deve dividir o texto em sentenças internamente
+            speed: Velocidade da fala
+            sampling_params: Parâmetros de amostragem do XTTS (temperature, top_k, ...)
+            conditioning_latents: Latentes do XTTS já calculados (opcional, dispensa speaker_wav)
+
         Returns:
-            Caminho do arquivo de áudio gerado
+            Forma de onda em float32
         """
+        xtts = self._get_xtts(model)
+        if xtts is not None and (speaker_wav or conditioning_latents):
+            # Clonagem de voz com latentes de condicionamento em cache
+            if conditioning_latents:
+                gpt_cond_latent, speaker_embedding = conditioning_latents
+            else:
+                gpt_cond_latent, speaker_embedding = self.get_conditioning_latents(model, speaker_wav)
+            sampling = {
+                "temperature": xtts.config.temperature,
+                "length_penalty": xtts.config.length_penalty,
+                "repetition_penalty": xtts.config.repetition_penalty,
+                "top_k": xtts.config.top_k,
+                "top_p": xtts.config.top_p
+            }
+            sampling.update(sampling_params or {})
+            with model.inference_lock:
+                outputs = xtts.inference(
+                    text,
+                    self._xtts_language(language),
+                    gpt_cond_latent,
+                    speaker_embedding,
+                    speed=speed,
+                    enable_text_splitting=split_sentences,
+                    **sampling
+                )
+            return np.asarray(outputs["wav"], dtype=np.float32)
+
+        kwargs = {"text": text, "split_sentences": split_sentences}
+
+        # Adiciona parâmetros específicos se necessário
+        if speaker_wav and hasattr(model, "speakers"):
+            kwargs["speaker_wav"] = speaker_wav
+
+        if language and "multilingual" in model.model_name:
+            kwargs["language"] = language
+
+        if speed != 1.0:
+            kwargs["speed"] = speed
+
+        if xtts is not None:
+            with model.inference_lock:
+                return np.asarray(model.tts(**kwargs), dtype=np.float32)
+        return np.asarray(model.tts(**kwargs), dtype=np.float32)
+
+    def _model_identity(self, model_name: Optional[str], language: Optional[str]) -> str:
+        """Identifica o modelo da requisição sem carregá-lo (usado nas chaves de cache)"""
+        if model_name:
+            model_path = self._resolve_model_path(model_name, language or self.current_language or "pt-br")
+            if not model_path:
+                raise ValueError(f"Modelo não encontrado: {model_name} ({language})")
+            return self._make_model_key(model_path, self.precision, self.backend)
         if not self.current_model:
             raise Exception("Nenhum modelo carregado")
-        
+        return self._key_of(self.current_model)
+
+    def _result_key(self,
+                    text: str,
+                    model_id: str,
+                    language: Optional[str],
+                    speaker_wav: Optional[str],
+                    speed: float,
+                    sampling_params: Optional[Dict]) -> str:
+        """Gera a chave do cache de resultados para uma requisição"""
+        speaker_hash = self.conditioning_cache.hash_audio(speaker_wav) if speaker_wav else None
+        return self.result_cache.make_key(text, model_id, language, speaker_hash, speed, sampling_params)
+
+    def _synthesize_cached(self,
+                           text: str,
+                           speaker_wav: Optional[str],
+                           language: Optional[str],
+                           model_name: Optional[str],
+                           split_sentences: bool = True,
+                           speed: float = 1.0,
+                           sampling_params: Optional[Dict] = None) -> Tuple[np.ndarray, int]:
+        """Sintetiza o texto consultando antes o cache de resultados"""
+        wav, sample_rate, _ = self._synthesize_with_source(text, speaker_wav, language, model_name,
+                                                           split_sentences, speed, sampling_params)
+        return wav, sample_rate
+
+    def _synthesize_with_source(self,
+                                text: str,
+                                speaker_wav: Optional[str],
+                                language: Optional[str],
+                                model_name: Optional[str],
+                                split_sentences: bool = True,
+                                speed: float = 1.0,
+                                sampling_params: Optional[Dict] = None) -> Tuple[np.ndarray, int, str]:
+        """
+        Como _synthesize_cached, informando também a origem do áudio
+
+        Returns:
+            Tupla (forma de onda, taxa de amostragem, origem), com origem "cache",
+            "coalesced" (resultado de uma síntese idêntica em andamento) ou "synthesized"
+        """
+        key = self._result_key(text, self._model_identity(model_name, language), language,
+                               speaker_wav, speed, sampling_params)
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            return cached[0], cached[1], "cache"
+
+        def synthesize():
+            # O líder anterior pode ter gravado o resultado entre a consulta acima e a entrada
+            # em inflight (já fora do mapa de chamadas em andamento)
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                return cached[0], cached[1], "cache"
+            model = self._select_model(model_name, language)
+            chunks = self.plan_chunks(model, text, language) if split_sentences else [text]
+            if len(chunks) > 1:
+                wav = self._synthesize_long_form(model, chunks, speaker_wav, language, speed, sampling_params)
+            else:
+                wav = self._synthesize_array(model, text, speaker_wav, language, split_sentences, speed,
+                                             sampling_params)
+            sample_rate = self._get_sample_rate(model)
+            self.result_cache.put(key, wav, sample_rate)
+            return wav, sample_rate, "synthesized"
+
+        # A mesma chave do cache identifica requisições idênticas em andamento
+        (wav, sample_rate, source), leader = self.inflight.do_with_role(key, synthesize)
+        return wav, sample_rate, source if leader else "coalesced"
+
+    def plan_chunks(self, model, text: str, language: Optional[str] = None) -> List[str]:
+        """
+        Divide um texto longo em trechos que cabem nos limites do XTTS
+
+        Usa a contagem real de tokens do tokenizer do modelo (vocab.json),
+        respeitando gpt_max_text_tokens, o limite de caracteres do idioma e
+        uma estimativa de gpt_max_audio_tokens. Outros modelos não são divididos.
+
+        Returns:
+            Lista de trechos na ordem do texto
+        """
+        xtts = self._get_xtts(model)
+        if xtts is None:
+            return [text]
+
+        from core.generation_guard import max_text_tokens
+
+        lang = self._xtts_language(language)
+        # A fala do trecho deve caber em gpt_max_audio_tokens (605 tokens ~ 28 s) segundo a
+        # mesma tabela de tokens de áudio por token de texto usada pelo guarda de geração
+        if self.audio_token_guard is not None:
+            audio_limited = self.audio_token_guard.max_text_tokens(lang, xtts.args.gpt_max_audio_tokens)
+        else:
+            audio_limited = max_text_tokens(xtts.args.gpt_max_audio_tokens, lang)
+        max_tokens = min(
+            xtts.args.gpt_max_text_tokens - 2,  # tokens de início e fim de texto
+            audio_limited
+        )
+        max_chars = xtts.tokenizer.char_limits.get(lang)
+
+        def count_tokens(chunk: str) -> int:
+            return self.count_tokens(chunk, lang, tokenizer=xtts.tokenizer)
+
+        return chunk_text(text, max_tokens, count_tokens, max_chars) or [text]
+
+    def get_text_tokenizer(self) -> FastXttsTokenizer:
+        """Tokenizer do XTTS: o do modelo carregado ou, sem modelo, um criado a partir de xtts_v2/vocab.json"""
+        xtts = self._get_xtts(self.current_model) if self.current_model is not None else None
+        if xtts is not None and isinstance(xtts.tokenizer, FastXttsTokenizer):
+            return xtts.tokenizer
+        if self._text_tokenizer is None:
+            self._text_tokenizer = FastXttsTokenizer(DEFAULT_VOCAB_PATH)
+        return self._text_tokenizer
+
+    def count_tokens(self, text: str, language: Optional[str] = None, tokenizer=None) -> int:
+        """
+        Conta os tokens de texto do XTTS sem executar o modelo
+
+        Permite planejar a divisão de textos em gpt_max_text_tokens. As
+        contagens de sentenças recentes são memorizadas.
+
+        Args:
+            text: Texto
+            language: Código do idioma (opcional)
+            tokenizer: Tokenizer a usar (padrão: get_text_tokenizer())
+
+        Returns:
+            Número de tokens, incluindo o token de idioma
+        """
+        tokenizer = tokenizer or self.get_text_tokenizer()
+        text = text.strip().lower()
+        lang = self._xtts_language(language)
+        if isinstance(tokenizer, FastXttsTokenizer):
+            return tokenizer.count_tokens(text, lang)
+        return len(tokenizer.encode(text, lang=lang))
+
+    def _synthesize_long_form(self,
+                              model,
+                              chunks: List[str],
+                              speaker_wav: Optional[str],
+                              language: Optional[str],
+                              speed: float,
+                              sampling_params: Optional[Dict]) -> np.ndarray:
+        """Sintetiza os trechos de um texto longo em paralelo e os une com crossfade"""
+        conditioning_latents = None
+        if speaker_wav and self._get_xtts(model) is not None:
+            gpt_cond_latent, speaker_embedding = self.get_conditioning_latents(model, speaker_wav)
+            conditioning_latents = (gpt_cond_latent.cpu(), speaker_embedding.cpu())
+
+        self.logger.info(f"Texto longo dividido em {len(chunks)} trechos")
+        if self.long_form.workers > 1:
+            wavs = self.long_form.synthesize(self._key_of(model), chunks, language, conditioning_latents, speed, sampling_params)
+        else:
+            wavs = [
+                self._synthesize_array(model, chunk, speaker_wav, language, False, speed, sampling_params,
+                                       conditioning_latents)
+                for chunk in chunks
+            ]
+        return crossfade_concat(wavs, self._get_sample_rate(model), self.crossfade_ms)
+
+    def shutdown(self):
+        """Encerra os processos auxiliares do engine"""
+        self.model_pool.close()
+        self.long_form.shutdown()
+        if self.phonemizer_pool is not None:
+            self.phonemizer_pool.shutdown()
+        self.phoneme_cache.close()
+
+    def synthesize(self,
+                   text: str,
+                   speaker_wav: Optional[str] = None,
+                   language: Optional[str] = None,
+                   model_name: Optional[str] = None,
+                   speed: float = 1.0,
+                   sampling_params: Optional[Dict] = None) -> AudioChunk:
+        """
+        Sintetiza o texto em memória, sem gravar arquivos
+
+        O array retornado é o mesmo guardado no cache de resultados (somente
+        leitura), sem cópias.
+
+        Args:
+            text: Texto para sintetizar
+            speaker_wav: Arquivo de áudio do speaker para clonagem de voz (opcional)
+            language: Código do idioma (opcional)
+            model_name: Modelo a usar nesta requisição (opcional, padrão: modelo atual)
+            speed: Velocidade da fala (default: 1.0)
+            sampling_params: Parâmetros de amostragem do XTTS (opcional)
+
+        Returns:
+            AudioChunk com o PCM float32 e a taxa de amostragem
+        """
+        try:
+            wav, sample_rate = self._synthesize_cached(text, speaker_wav, language, model_name,
+                                                       speed=speed, sampling_params=sampling_params)
+            return AudioChunk(audio=wav, sample_rate=sample_rate, index=0, text=text)
+        except Exception as e:
+            self.logger.error(f"Erro ao gerar fala: {e}")
+            raise
+
+    def synthesize_bytes(self,
+                         text: str,
+                         speaker_wav: Optional[str] = None,
+                         language: Optional[str] = None,
+                         model_name: Optional[str] = None,
+                         speed: float = 1.0,
+                         sampling_params: Optional[Dict] = None,
+                         wav_header: bool = True) -> bytearray:
+        """
+        Sintetiza o texto e retorna o áudio codificado em memória
+
+        Args:
+            wav_header: True para um WAV completo, False para PCM 16 bits cru
+            (demais argumentos como em synthesize)
+
+        Returns:
+            Buffer com o WAV ou o PCM 16 bits
+        """
+        chunk = self.synthesize(text, speaker_wav, language, model_name, speed, sampling_params)
+        return encode_pcm16(chunk.audio, chunk.sample_rate, wav_header=wav_header)
+
+    def generate_speech(self,
+                       text: str,
+                       output_path: Optional[str] = None,
+                       speaker_wav: Optional[str] = None,
+                       language: Optional[str] = None,
+                       model_name: Optional[str] = None,
+                       speed: float = 1.0,
+                       sampling_params: Optional[Dict] = None) -> str:
+        """
+        Gera fala a partir do texto e grava em arquivo
+
+        Args:
+            text: Texto para sintetizar
+            output_path: Caminho para salvar o áudio (padrão: caminho único em ./outputs)
+            speaker_wav: Arquivo de áudio do speaker para clonagem de voz (opcional)
+            language: Código do idioma (opcional)
+            model_name: Modelo a usar nesta requisição (opcional, padrão: modelo atual)
+            speed: Velocidade da fala (default: 1.0)
+            sampling_params: Parâmetros de amostragem do XTTS (opcional)
+
+        Returns:
+            Caminho do arquivo de áudio gerado
+        """
+        chunk = self.synthesize(text, speaker_wav, language, model_name, speed, sampling_params)
         try:
-            kwargs = {"text": text, "file_path": output_path}
-            
-            # Adiciona parâmetros específicos se necessário
-            if speaker_wav and hasattr(self.current_model, "speakers"):
-                kwargs["speaker_wav"] = speaker_wav
-            
-            if language and "multilingual" in self.current_model.model_name:
-                kwargs["language"] = language
-            
-            self.current_model.tts_to_file(**kwargs)
+            output_path = output_path or make_output_path()
+            write_wav(output_path, chunk.audio, chunk.sample_rate)
             return output_path
-            
+
         except Exception as e:
             self.logger.error(f"Erro ao gerar fala: {e}")
             raise
-    
+
+    def generate_speech_stream(self,
+                               text: str,
+                               speaker_wav: Optional[str] = None,
+                               language: Optional[str] = None,
+                               model_name: Optional[str] = None,
+                               speed: float = 1.0,
+                               sampling_params: Optional[Dict] = None) -> Iterator[AudioChunk]:
+        """
+        Gera fala sentença por sentença, entregando cada trecho assim que fica pronto
+
+        O tempo até o primeiro áudio fica limitado à síntese da primeira
+        sentença, em vez do texto inteiro.
+
+        Args:
+            text: Texto para sintetizar
+            speaker_wav: Arquivo de áudio do speaker para clonagem de voz (opcional)
+            language: Código do idioma (opcional)
+            model_name: Modelo a usar nesta requisição (opcional, padrão: modelo atual)
+            speed: Velocidade da fala (default: 1.0)
+            sampling_params: Parâmetros de amostragem do XTTS (opcional)
+
+        Yields:
+            AudioChunk com o PCM float32 de cada sentença e a taxa de amostragem
+        """
+        index = 0
+        for sentence in split_sentences(text):
+            try:
+                # Sentenças além dos limites do XTTS são divididas como nos textos longos
+                chunks = self.plan_chunks(self._select_model(model_name, language), sentence, language)
+            except Exception as e:
+                self.logger.error(f"Erro ao gerar fala (sentença {index + 1}): {e}")
+                raise
+            for chunk in chunks:
+                try:
+                    wav, sample_rate = self._synthesize_cached(chunk, speaker_wav, language, model_name,
+                                                               split_sentences=False, speed=speed,
+                                                               sampling_params=sampling_params)
+                except Exception as e:
+                    self.logger.error(f"Erro ao gerar fala (trecho {index + 1}): {e}")
+                    raise
+                yield AudioChunk(audio=wav, sample_rate=sample_rate, index=index, text=chunk)
+                index += 1
+
+    def generate_speech_encoded(self,
+                                text: str,
+                                formats: Optional[List[str]] = None,
+                                output_dir: Optional[str] = None,
+                                speaker_wav: Optional[str] = None,
+                                language: Optional[str] = None,
+                                model_name: Optional[str] = None,
+                                speed: float = 1.0,
+                                sampling_params: Optional[Dict] = None,
+                                sample_rate: int = 48000) -> Dict[str, Any]:
+        """
+        Gera fala já codificada em OGG/Opus, OGG/Vorbis e/ou FLAC
+
+        O áudio é reamostrado e codificado sentença por sentença em uma thread
+        própria enquanto as sentenças seguintes são sintetizadas. Vários
+        formatos saem de uma única síntese.
+
+        Args:
+            text: Texto para sintetizar
+            formats: Formatos de saída (padrão: ["opus"], o das notas de voz do WhatsApp)
+            output_dir: Se informado, grava um arquivo de nome único por formato neste
+                diretório; senão o áudio codificado é retornado em memória
+            speaker_wav: Arquivo de áudio do speaker para clonagem de voz (opcional)
+            language: Código do idioma (opcional)
+            model_name: Modelo a usar nesta requisição (opcional, padrão: modelo atual)
+            speed: Velocidade da fala (default: 1.0)
+            sampling_params: Parâmetros de amostragem do XTTS (opcional)
+            sample_rate: Taxa de amostragem da saída (padrão: 48 kHz)
+
+        Returns:
+            Formato -> caminho do arquivo gravado ou bytes codificados
+        """
+        from core.audio_encoding import ENCODING_FORMATS, encode_chunks
+
+        formats = formats or ["opus"]
+        output_paths = {}
+        if output_dir:
+            # Um nome único por síntese; o formato entra no nome porque Opus e Vorbis usam .ogg
+            base_path = os.path.splitext(make_output_path(output_dir))[0]
+            for name in formats:
+                extension = ENCODING_FORMATS.get(name, {}).get("extension", name)
+                output_paths[name] = f"{base_path}.{name}.{extension}"
+
+        stream = self.generate_speech_stream(text, speaker_wav, language, model_name, speed, sampling_params)
+        try:
+            return encode_chunks(stream, formats, output_paths, output_rate=sample_rate)
+        except Exception as e:
+            self.logger.error(f"Erro ao codificar fala: {e}")
+            raise
+        finally:
+            stream.close()
+
+    def _get_vits(self, model):
+        """Retorna o modelo Vits interno se ele puder ser usado em lote, senão None"""
+        synthesizer = getattr(model, "synthesizer", None)
+        tts_model = getattr(synthesizer, "tts_model", None)
+        if tts_model is None or type(tts_model).__name__ != "Vits":
+            return None
+        # Modelos multi-speaker/multilíngues exigem ids por item; ficam no caminho item a item
+        if model.is_multi_speaker or model.is_multi_lingual:
+            return None
+        return tts_model
+
+    def _vits_batch_inference(self, model, sentences: List[str]) -> List[np.ndarray]:
+        """Executa o VITS em um único forward sobre um lote de sentenças com padding"""
+        import torch
+
+        vits = self._get_vits(model)
+        device = next(vits.parameters()).device
+        token_ids = [vits.tokenizer.text_to_ids(sentence) for sentence in sentences]
+
+        x = torch.zeros(len(token_ids), max(len(ids) for ids in token_ids), dtype=torch.long)
+        for i, ids in enumerate(token_ids):
+            x[i, :len(ids)] = torch.as_tensor(ids, dtype=torch.long)
+        x_lengths = torch.tensor([len(ids) for ids in token_ids], dtype=torch.long)
+
+        with torch.inference_mode():
+            outputs = vits.inference(
+                x.to(device),
+                aux_input={"x_lengths": x_lengths.to(device), "d_vectors": None, "speaker_ids": None,
+                           "language_ids": None, "durations": None}
+            )
+
+        # Separa as saídas usando os comprimentos previstos (y_mask) de cada item
+        waveforms = outputs["model_outputs"].squeeze(1).cpu().numpy()
+        y_mask = outputs["y_mask"]
+        samples_per_frame = waveforms.shape[-1] // y_mask.shape[-1]
+        frames = y_mask.sum(dim=[1, 2]).long().tolist()
+        lengths = [min(n * samples_per_frame, waveforms.shape[-1]) for n in frames]
+
+        # Nos itens mais curtos que o lote, o HiFi-GAN lê os quadros mascarados (zeros mais o
+        # bias das convoluções) perto do fim; o final é recalculado sem o padding, como em
+        # core.compilation.BucketedDecoder
+        from core.compilation import TAIL_CONTEXT
+
+        with torch.inference_mode():
+            for i, n in enumerate(frames):
+                if n >= y_mask.shape[-1]:
+                    continue
+                start = max(0, n - 2 * TAIL_CONTEXT)
+                tail = vits.waveform_decoder(outputs["z"][i:i + 1, :, start:n], g=None)
+                tail = tail.reshape(-1).cpu().numpy()
+                # Substitui os últimos TAIL_CONTEXT quadros (ou o item inteiro, se for curto)
+                cut = (start + TAIL_CONTEXT if start > 0 else 0) * samples_per_frame
+                waveforms[i, cut:lengths[i]] = tail[len(tail) - (lengths[i] - cut):]
+
+        audio_config = model.synthesizer.tts_config.audio
+        trim = "do_trim_silence" in audio_config and audio_config["do_trim_silence"]
+        if trim:
+            from TTS.tts.utils.synthesis import trim_silence
+
+        wavs = []
+        for i, length in enumerate(lengths):
+            wav = waveforms[i, :length]
+            if trim:
+                wav = trim_silence(wav, vits.ap)
+            wavs.append(np.asarray(wav, dtype=np.float32))
+        return wavs
+
+    def _vits_generate_batch(self, model, texts: List[str], batch_size: int) -> List[np.ndarray]:
+        """Sintetiza vários textos agrupando as sentenças de todos eles por comprimento"""
+        vits = self._get_vits(model)
+        items = []  # (índice do texto, índice da sentença, sentença, comprimento)
+        sentences_per_text = []
+        split_texts = []
+        for text in texts:
+            sentences = [s for s in model.synthesizer.split_into_sentences(text) if s.strip()]
+            sentences_per_text.append(len(sentences))
+            split_texts.append(sentences)
+        self._prephonemize(vits.tokenizer, [sentence for sentences in split_texts for sentence in sentences])
+        for text_index, sentences in enumerate(split_texts):
+            for sentence_index, sentence in enumerate(sentences):
+                items.append((text_index, sentence_index, sentence, len(vits.tokenizer.text_to_ids(sentence))))
+
+        # Ordena por comprimento para minimizar o padding dentro de cada lote
+        items.sort(key=lambda item: item[3])
+        outputs = {}
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            wavs = self._vits_batch_inference(model, [item[2] for item in batch])
+            for item, wav in zip(batch, wavs):
+                outputs[(item[0], item[1])] = wav
+
+        # Remonta cada texto como o Synthesizer faz: sentenças seguidas de silêncio
+        silence = np.zeros(10000, dtype=np.float32)
+        results = []
+        for text_index, count in enumerate(sentences_per_text):
+            parts = []
+            for sentence_index in range(count):
+                parts.extend([outputs[(text_index, sentence_index)], silence])
+            results.append(np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32))
+        return results
+
+    def generate_batch(self,
+                       texts: List[str],
+                       language: Optional[str] = None,
+                       model_name: Optional[str] = None,
+                       batch_size: int = 16) -> List[AudioChunk]:
+        """
+        Sintetiza vários textos de uma vez
+
+        Para VITS, as sentenças de todos os textos são agrupadas por comprimento
+        e processadas em lotes com padding em um único forward, diluindo o custo
+        fixo de cada chamada. Os demais modelos (Tacotron2, XTTS, VITS
+        multi-speaker) são sintetizados item a item. Textos repetidos e já
+        presentes no cache de resultados não são sintetizados novamente.
+
+        Args:
+            texts: Textos para sintetizar
+            language: Código do idioma (opcional)
+            model_name: Modelo a usar (opcional, padrão: modelo atual)
+            batch_size: Número máximo de sentenças por forward
+
+        Returns:
+            Lista de AudioChunk na mesma ordem dos textos
+        """
+        model_id = self._model_identity(model_name, language)
+        keys = [self._result_key(text, model_id, language, None, 1.0, None) for text in texts]
+
+        audios = {}
+        pending = []
+        pending_keys = set()
+        for text, key in zip(texts, keys):
+            if key in audios or key in pending_keys:
+                continue
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                audios[key] = cached
+            else:
+                pending.append((key, text))
+                pending_keys.add(key)
+
+        if pending:
+            model = self._select_model(model_name, language)
+            sample_rate = self._get_sample_rate(model)
+            pending_texts = [text for _, text in pending]
+            try:
+                if self._get_vits(model) is not None:
+                    wavs = self._vits_generate_batch(model, pending_texts, batch_size)
+                else:
+                    self.logger.info("Modelo sem inferência em lote; sintetizando item a item")
+                    wavs = [self._synthesize_array(model, text, language=language) for text in pending_texts]
+            except Exception as e:
+                self.logger.error(f"Erro ao gerar fala em lote: {e}")
+                raise
+
+            for (key, _), wav in zip(pending, wavs):
+                self.result_cache.put(key, wav, sample_rate)
+                audios[key] = (wav, sample_rate)
+
+        return [
+            AudioChunk(audio=audios[key][0], sample_rate=audios[key][1], index=index, text=text)
+            for index, (text, key) in enumerate(zip(texts, keys))
+        ]
+
+    def precision_report(self,
+                         model_name: str,
+                         language: str = "pt-br",
+                         speaker_wav: Optional[str] = None,
+                         text: str = THREAD_PROBE_SENTENCE,
+                         repeats: int = 3) -> Dict:
+        """
+        Compara o modelo em int8 com o modelo em fp32 (velocidade, memória e fidelidade)
+
+        Os dois modelos sintetizam o mesmo texto com a mesma semente. A
+        fidelidade é medida pela distância entre log-mel espectrogramas, pela
+        razão de durações e, quando os comprimentos coincidem (modelos
+        determinísticos), pela SNR da forma de onda.
+
+        Args:
+            model_name: Nome do modelo (ex: "VITS", "XTTS v2")
+            language: Código do idioma
+            speaker_wav: Áudio de referência (obrigatório para XTTS)
+            text: Texto usado na comparação
+            repeats: Repetições para medir a latência
+
+        Returns:
+            Dicionário com os resultados de cada precisão e a comparação entre elas
+        """
+        import torch
+        from core.quantization import model_size_bytes, compare_outputs
+
+        report = {}
+        outputs = {}
+        for precision in SUPPORTED_PRECISIONS:
+            model = self.get_model(model_name, language, precision=precision, backend="torch")
+            if not model:
+                raise ValueError(f"Modelo não encontrado: {model_name} ({language})")
+            sample_rate = self._get_sample_rate(model)
+
+            timings = []
+            for _ in range(repeats):
+                torch.manual_seed(0)
+                start = time.perf_counter()
+                wav = self._synthesize_array(model, text, speaker_wav, language, split_sentences=False)
+                timings.append(time.perf_counter() - start)
+            outputs[precision] = wav
+
+            latency = statistics.median(timings)
+            report[precision] = {
+                "latency_s": latency,
+                "rtf": latency / max(len(wav) / sample_rate, 1e-3),
+                "model_bytes": model_size_bytes(model.synthesizer.tts_model)
+            }
+
+        report["speedup"] = report["fp32"]["latency_s"] / max(report["int8"]["latency_s"], 1e-9)
+        report["size_ratio"] = report["int8"]["model_bytes"] / max(report["fp32"]["model_bytes"], 1)
+        report["accuracy"] = compare_outputs(outputs["fp32"], outputs["int8"], sample_rate)
+        self.logger.info(f"Relatório int8 x fp32 para {model_name}: {report}")
+        return report
+
     def get_model_info(self, model_name: str) -> Dict:
         """Retorna informações sobre um modelo específico"""
         return self.model_configs.get(model_name, {})
-    
+
+    def find_model(self, model_path: str) -> Optional[Tuple[str, str]]:
+        """
+        Localiza um modelo pelo caminho do Coqui (ex: "tts_models/pt/cv/vits")
+
+        Returns:
+            Tupla (nome do modelo, idioma) ou None se o caminho não for conhecido
+        """
+        for language, models in self.available_models.items():
+            for model_name, path in models.items():
+                if path == model_path:
+                    return model_name, language
+        return None
+
     def list_available_models(self, language: Optional[str] = None) -> Dict:
         """Lista modelos disponíveis para um idioma específico ou todos"""
         if language:
             return self.available_models.get(language, {})
         return self.available_models
-    
+
+    def list_resident_models(self) -> List[str]:
+        """Lista os modelos atualmente carregados no pool"""
+        return self.model_pool.resident_models()
+
+    def get_coalescing_stats(self) -> Dict:
+        """Retorna quantas requisições idênticas simultâneas foram atendidas por uma síntese já em andamento"""
+        return self.inflight.get_stats()
+
+    def get_phoneme_cache_stats(self) -> Dict:
+        """Retorna acertos, erros e taxa de acerto do cache de fonemas"""
+        return self.phoneme_cache.get_stats()
+
+    def get_prefix_kv_cache_stats(self) -> Optional[Dict]:
+        """Retorna acertos, erros e memória do cache KV do prefixo de voz (None se nenhum XTTS foi carregado)"""
+        return self.prefix_kv_cache.get_stats() if self.prefix_kv_cache is not None else None
+
+    def get_audio_token_guard_stats(self) -> Optional[Dict]:
+        """Retorna gerações e intervenções do limite de tokens de áudio (None se nenhum XTTS foi carregado)"""
+        return self.audio_token_guard.get_stats() if self.audio_token_guard is not None else None
+
+    def get_result_cache_stats(self) -> Dict:
+        """Retorna estatísticas do cache de áudios sintetizados"""
+        return self.result_cache.get_stats()
+
+    def get_pool_stats(self) -> Dict:
+        """Retorna estatísticas do pool de modelos (hits, carregamentos, descartes, RSS)"""
+        return self.model_pool.get_stats()
+
     def list_speakers(self) -> List[str]:
         """Lista speakers disponíveis no modelo atual"""
         if self.current_model and hasattr(self.current_model, "speakers"):
             return self.current_model.speakers
         return []
-    
+
     def supports_voice_cloning(self) -> bool:
         """Verifica se o modelo atual suporta clonagem de voz"""
         if not self.current_model:
             return False
         return "xtts" in self.current_model.model_name.lower()
-    
+
     def get_model_languages(self) -> List[str]:
         """Retorna os idiomas suportados pelo modelo atual"""
         if not self.current_model:
             return []
         if "multilingual" in self.current_model.model_name:
             return ["pt-br", "en", "es"]  # XTTS v2 suporta múltiplos idiomas
-        return [self.current_model.language] if hasattr(self.current_model, "language") else [] 
\ No newline at end of file
+        return [self.current_model.language] if hasattr(self.current_model, "language") else []
\ No newline at end of file
@@ -1,9 +1,10 @@
 import customtkinter as ctk
 from tkinter import messagebox, filedialog
 import threading
-from core.tts_engine import TTSEngine
+from core.tts_engine import TTSEngine, encode_pcm16, make_output_path
 from core.model_manager import ModelManager
 import os
+import io
 import json
 import pygame
 import logging
@@ -30,14 +31,25 @@ class MainWindow(ctk.CTk):
         pygame.mixer.init()
         
         # Estado da aplicação
-        self.current_audio_file = None
+        # Último áudio gerado, mantido em memória (AudioChunk); só vai para disco ao salvar
+        self.current_audio = None
+        self.current_sound = None
         self.is_playing = False
         self.training_in_progress = False
+        self.app_config = {}
+        
+        # Carregamentos de modelo em série; cada pré-carregamento recebe uma geração e
+        # só o da seleção mais recente atualiza o indicador
+        self._model_lock = threading.Lock()
+        self._preload_generation = 0
         
         # Criar interface
         self.create_widgets()
         self.load_config()
         
+        # Carregar o modelo padrão em segundo plano, com a janela já visível
+        self.after(100, self.preload_default_model)
+        
     def create_widgets(self):
         # Criar notebook para abas
         self.tabview = ctk.CTkTabview(self, width=1150, height=750)
@@ -69,6 +81,10 @@ class MainWindow(ctk.CTk):
         )
         self.model_dropdown.pack(anchor="w", padx=10, pady=5)
         
+        # Indicador de prontidão do modelo
+        self.model_status_label = ctk.CTkLabel(model_frame, text="● Nenhum modelo carregado", text_color="gray")
+        self.model_status_label.pack(anchor="w", padx=10, pady=5)
+        
         # Frame para clonagem de voz (XTTS)
         self.voice_clone_frame = ctk.CTkFrame(tab_tts)
         self.voice_clone_frame.pack(fill="x", padx=20, pady=10)
@@ -297,6 +313,62 @@ class MainWindow(ctk.CTk):
             self.voice_clone_frame.pack_forget()
         
         self.status_label.configure(text=f"Modelo selecionado: {choice}")
+        
+        # Aquecer o modelo escolhido antes do clique em "Gerar Áudio"
+        model_language = choice.split(" (")[1].rstrip(")")
+        self.start_model_preload(model_name, model_language)
+    
+    def _set_model_status(self, text, color):
+        """Atualiza o indicador de prontidão (sempre na thread da interface)"""
+        self.after(0, lambda: self.model_status_label.configure(text=f"● {text}", text_color=color))
+    
+    def preload_default_model(self):
+        """Carrega o modelo padrão do config.json (e a voz padrão, se houver) em segundo plano"""
+        default_model = self.app_config.get("default_model")
+        if not default_model:
+            return
+        
+        model = self.tts_engine.find_model(default_model)
+        if not model:
+            self.logger.warning(f"Modelo padrão desconhecido: {default_model}")
+            return
+        
+        model_name, model_language = model
+        self.model_var.set(f"{model_name} ({model_language})")
+        self.on_model_change(self.model_var.get())
+    
+    def start_model_preload(self, model_name, model_language):
+        self._preload_generation += 1
+        thread = threading.Thread(target=self._preload_model_thread,
+                                  args=(model_name, model_language, self._preload_generation))
+        thread.daemon = True
+        thread.start()
+    
+    def _preload_model_thread(self, model_name, model_language, generation):
+        with self._model_lock:
+            # Seleção trocada enquanto aguardava outro carregamento: nada a fazer
+            if generation != self._preload_generation:
+                return
+            self._set_model_status(f"Carregando {model_name} ({model_language})...", "orange")
+            try:
+                if not self.tts_engine.load_model(model_name, model_language):
+                    raise Exception(f"Não foi possível carregar o modelo {model_name}")
+                # Um carregamento posterior (já na fila do lock) definirá o modelo atual
+                if generation != self._preload_generation:
+                    return
+                
+                # Latentes da voz clonada padrão (XTTS) ficam no cache antes da primeira síntese
+                speaker_wav = self.app_config.get("default_speaker_wav")
+                if speaker_wav and os.path.exists(speaker_wav) and self.tts_engine.supports_voice_cloning():
+                    self._set_model_status(f"Preparando voz padrão para {model_name}...", "orange")
+                    self.tts_engine.get_conditioning_latents(self.tts_engine.current_model, speaker_wav)
+                
+                if generation == self._preload_generation:
+                    self._set_model_status(f"Modelo pronto: {model_name} ({model_language})", "green")
+            except Exception as e:
+                self.logger.error(f"Erro ao pré-carregar modelo: {e}")
+                if generation == self._preload_generation:
+                    self._set_model_status(f"Erro ao carregar {model_name}: {e}", "red")
     
     def generate_audio(self):
         text = self.text_input.get("1.0", "end-1c")
@@ -315,10 +387,23 @@ class MainWindow(ctk.CTk):
             self.status_label.configure(text="Gerando áudio...")
             self.generate_btn.configure(state="disabled")
             
+            # Carregar o modelo selecionado (instantâneo se já foi pré-carregado)
+            choice = self.model_var.get()
+            if choice:
+                model_name = choice.split(" (")[0]
+                model_language = choice.split(" (")[1].rstrip(")")
+                # Aguarda um pré-carregamento em andamento em vez de carregar em paralelo
+                with self._model_lock:
+                    if (self.tts_engine.current_model_name, self.tts_engine.current_language) != (model_name, model_language):
+                        self.status_label.configure(text=f"Carregando modelo {model_name}...")
+                        if not self.tts_engine.load_model(model_name, model_language):
+                            raise Exception(f"Não foi possível carregar o modelo {model_name}")
+                        self._set_model_status(f"Modelo pronto: {model_name} ({model_language})", "green")
+                        self.status_label.configure(text="Gerando áudio...")
+            
             # Preparar parâmetros
             kwargs = {
                 "text": text,
-                "output_path": "output.wav",
                 "language": self.lang_var.get()
             }
             
@@ -327,8 +412,10 @@ class MainWindow(ctk.CTk):
             if voice_path and os.path.exists(voice_path):
                 kwargs["speaker_wav"] = voice_path
             
-            # Gerar áudio
-            self.current_audio_file = self.tts_engine.generate_speech(**kwargs)
+            # Gerar áudio em memória
+            self.stop_audio()
+            self.current_audio = self.tts_engine.synthesize(**kwargs)
+            self.current_sound = None
             
             self.status_label.configure(text="Áudio gerado com sucesso!")
             self.play_btn.configure(state="normal")
@@ -343,10 +430,12 @@ class MainWindow(ctk.CTk):
             self.progress.set(0)
     
     def play_audio(self):
-        if self.current_audio_file and os.path.exists(self.current_audio_file):
+        if self.current_audio is not None:
             try:
-                pygame.mixer.music.load(self.current_audio_file)
-                pygame.mixer.music.play()
+                if self.current_sound is None:
+                    wav_data = encode_pcm16(self.current_audio.audio, self.current_audio.sample_rate)
+                    self.current_sound = pygame.mixer.Sound(file=io.BytesIO(wav_data))
+                self.current_sound.play()
                 self.is_playing = True
                 self.play_btn.configure(state="disabled")
                 self.stop_btn.configure(state="normal")
@@ -356,25 +445,28 @@ class MainWindow(ctk.CTk):
     
     def stop_audio(self):
         if self.is_playing:
-            pygame.mixer.music.stop()
+            if self.current_sound is not None:
+                self.current_sound.stop()
             self.is_playing = False
             self.play_btn.configure(state="normal")
             self.stop_btn.configure(state="disabled")
     
     def save_audio(self):
-        if not self.current_audio_file:
+        if self.current_audio is None:
             return
             
+        suggested_path = make_output_path()
         file_path = filedialog.asksaveasfilename(
             defaultextension=".wav",
             filetypes=[("Arquivos WAV", "*.wav")],
-            initialdir=os.path.dirname(self.current_audio_file)
+            initialdir=os.path.dirname(suggested_path),
+            initialfile=os.path.basename(suggested_path)
         )
         
         if file_path:
             try:
-                import shutil
-                shutil.copy2(self.current_audio_file, file_path)
+                with open(file_path, "wb") as f:
+                    f.write(encode_pcm16(self.current_audio.audio, self.current_audio.sample_rate))
                 self.status_label.configure(text=f"Áudio salvo em: {file_path}")
             except Exception as e:
                 self.logger.error(f"Erro ao salvar áudio: {e}")
@@ -488,7 +580,9 @@ class MainWindow(ctk.CTk):
             self.output_dir_entry.insert(0, dir_path)
     
     def save_config(self):
-        config = {
+        # Preserva chaves sem campo na interface (default_model, audio_settings, ...)
+        config = dict(self.app_config)
+        config.update({
             "models_dir": self.models_dir_entry.get(),
             "output_dir": self.output_dir_entry.get(),
             "default_language": self.lang_var.get(),
@@ -498,7 +592,7 @@ class MainWindow(ctk.CTk):
                 "learning_rate": self.lr_entry.get(),
                 "base_model": self.base_model_var.get()
             }
-        }
+        })
         
         try:
             with open("config/config.json", "w", encoding="utf-8") as f:
@@ -512,6 +606,7 @@ class MainWindow(ctk.CTk):
         try:
             with open("config/config.json", "r", encoding="utf-8") as f:
                 config = json.load(f)
+            self.app_config = config
                 
             self.models_dir_entry.delete(0, "end")
             self.models_dir_entry.insert(0, config.get("models_dir", ""))
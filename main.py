@@ -2,12 +2,23 @@ import customtkinter as ctk
 from gui.main_window import MainWindow
 import sys
 import os
+import argparse
 
 # Configuração do CustomTkinter
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
 def main():
+    parser = argparse.ArgumentParser(description="Coqui TTS - Interface Gráfica")
+    parser.add_argument("--import-report", nargs="?", const="gui.main_window", metavar="MODULO",
+                        help="Mostra os módulos que dominam o tempo de importação e sai")
+    args = parser.parse_args()
+
+    if args.import_report:
+        from core.import_report import print_import_report
+        print_import_report(args.import_report)
+        return
+
     try:
         app = MainWindow()
         app.mainloop()
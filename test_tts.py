@@ -1,12 +1,16 @@
-from TTS.api import TTS
-import torch
 import os
+import queue
 import argparse
+import multiprocessing
 
 def initialize_tts(model_name="tts_models/multilingual/multi-dataset/your_tts"):
     """
     Inicializa o modelo TTS e retorna a instância
     """
+    # Importados aqui para que "--help" e "--import-report" não carreguem o torch
+    import torch
+    from TTS.api import TTS
+
     device = "cuda" if torch.cuda.is_available() else "cpu"
     print(f"Usando dispositivo: {device}")
     return TTS(model_name=model_name).to(device)
@@ -65,6 +69,91 @@ def process_batch(tts, texts, output_dir, language="pt-br", speaker_wav=None, sp
         output_path = os.path.join(output_dir, f"output_{i+1}.wav")
         generate_speech(tts, text, output_path, language, speaker_wav, speed)
 
+# Modelo carregado uma única vez em cada processo de trabalho
+_worker_tts = None
+
+def split_cores(workers):
+    """
+    Divide os núcleos disponíveis em fatias contíguas, uma por processo
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    workers = max(1, min(workers, len(cores)))
+    size, extra = divmod(len(cores), workers)
+    slices = []
+    start = 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        slices.append(cores[start:end])
+        start = end
+    return slices
+
+def _init_worker(model_name, core_slices, fallback_threads):
+    """
+    Inicializa um processo de trabalho: fixa a fatia de núcleos e carrega o modelo
+
+    Cada fatia é entregue a um único processo. Um processo que substitui
+    outro (ex: após uma falha) não encontra fatia livre e roda sem fixar
+    núcleos, com fallback_threads threads.
+    """
+    global _worker_tts
+    import torch
+
+    try:
+        # O timeout cobre o atraso entre o put no processo principal e a chegada na fila
+        cores = core_slices.get(timeout=5)
+    except queue.Empty:
+        cores = None
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(len(cores) if cores else fallback_threads)
+    _worker_tts = initialize_tts(model_name)
+
+def _process_line(job):
+    """
+    Sintetiza uma linha do batch no processo de trabalho
+    """
+    index, text, output_path, language, speaker_wav, speed = job
+    try:
+        generate_speech(_worker_tts, text, output_path, language, speaker_wav, speed)
+        return index, output_path, None
+    except Exception as e:
+        return index, output_path, str(e)
+
+def process_batch_parallel(model_name, texts, output_dir, language="pt-br", speaker_wav=None, speed=1.0, workers=2):
+    """
+    Processa múltiplos textos em batch usando vários processos
+
+    Cada processo carrega o modelo uma vez e usa sua própria fatia de núcleos.
+    As linhas são distribuídas dinamicamente, das mais longas para as mais
+    curtas, para que poucas linhas longas não atrasem o final da execução.
+    Os arquivos mantêm os nomes output_{i}.wav da ordem original.
+    """
+    jobs = [
+        (i, text, os.path.join(output_dir, f"output_{i+1}.wav"), language, speaker_wav, speed)
+        for i, text in enumerate(texts)
+    ]
+    jobs.sort(key=lambda job: len(job[1]), reverse=True)
+
+    core_slices = split_cores(workers)
+    ctx = multiprocessing.get_context("spawn")
+    slices_queue = ctx.Queue()
+    for cores in core_slices:
+        slices_queue.put(cores)
+
+    print(f"Iniciando {len(core_slices)} processos: {core_slices}")
+    failures = []
+    with ctx.Pool(len(core_slices), initializer=_init_worker, initargs=(model_name, slices_queue, min(map(len, core_slices)))) as pool:
+        for index, output_path, error in pool.imap_unordered(_process_line, jobs, chunksize=1):
+            if error:
+                print(f"Erro na linha {index+1}: {error}")
+                failures.append(index + 1)
+
+    print(f"Batch concluído: {len(jobs) - len(failures)} de {len(jobs)} áudios gerados")
+    return failures
+
 def main():
     parser = argparse.ArgumentParser(description="Gerador de voz usando YourTTS")
     parser.add_argument("--text", type=str, help="Texto para converter em fala")
@@ -73,12 +162,30 @@ def main():
     parser.add_argument("--speaker_wav", type=str, default="xtts_v2/samples/pt_sample.wav", help="Arquivo de voz de referência")
     parser.add_argument("--speed", type=float, default=1.0, help="Velocidade da fala")
     parser.add_argument("--batch_file", type=str, help="Arquivo com múltiplos textos (um por linha)")
+    parser.add_argument("--model_name", type=str, default="tts_models/multilingual/multi-dataset/your_tts", help="Modelo TTS a usar")
+    parser.add_argument("--workers", type=int, default=1, help="Número de processos para o batch (cada um carrega o modelo)")
+    parser.add_argument("--import-report", action="store_true", help="Mostra os módulos que dominam o tempo de importação e sai")
     
     args = parser.parse_args()
     
+    if args.import_report:
+        from core.import_report import print_import_report
+        # Inicialização do script e custo adiado para o carregamento do modelo
+        print_import_report("test_tts")
+        print_import_report("TTS.api")
+        return
+    
     try:
+        if args.batch_file and args.workers > 1:
+            # Processa o batch em vários processos, cada um com seu modelo
+            with open(args.batch_file, 'r', encoding='utf-8') as f:
+                texts = f.read().splitlines()
+            output_dir = os.path.dirname(args.output)
+            process_batch_parallel(args.model_name, texts, output_dir, args.language, args.speaker_wav, args.speed, args.workers)
+            return
+        
         # Inicializa o modelo
-        tts = initialize_tts()
+        tts = initialize_tts(args.model_name)
         list_capabilities(tts)
         
         if args.batch_file:
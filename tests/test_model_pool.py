@@ -0,0 +1,49 @@
+import torch
+from torch import nn
+
+from core.quantization import quantize_model
+from core.tts_engine import ModelPool, _model_size_bytes
+
+
+class _Synthesizer(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.tts_model = nn.Sequential(nn.Linear(512, 512), nn.Linear(512, 512))
+        self.vocoder_model = None
+
+
+class _FakeTTS(nn.Module):
+    """Mesma estrutura usada por quantize_model (TTS.api -> synthesizer -> tts_model)"""
+
+    def __init__(self):
+        super().__init__()
+        self.synthesizer = _Synthesizer()
+
+
+def _load(key: str):
+    torch.manual_seed(0)
+    model = _FakeTTS()
+    if key.endswith("@int8"):
+        quantize_model(model)
+    return model
+
+
+def test_int8_model_size_includes_packed_weights():
+    fp32 = _model_size_bytes(_load("model"))
+    int8 = _model_size_bytes(_load("model@int8"))
+    assert fp32 > 2 * 512 * 512 * 4
+    # Pesos int8 ocupam ~1/4 dos fp32, mas não zero
+    assert fp32 / 6 < int8 < fp32 / 2
+
+
+def test_int8_model_counts_against_budget():
+    int8_mb = _model_size_bytes(_load("model@int8")) / 1024 / 1024
+    pool = ModelPool(loader=_load, max_models=None, memory_budget_mb=1.5 * int8_mb)
+
+    pool.get("a@int8")
+    assert pool.get_stats()["models_mb"] > 0.9 * int8_mb
+
+    # Dois modelos int8 não cabem no orçamento: o menos recente é descartado
+    pool.get("b@int8")
+    assert pool.resident_models() == ["b@int8"]
+    assert pool.get_stats()["evictions"] == 1
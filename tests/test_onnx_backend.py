@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+
+import onnx
+from onnx import TensorProto, helper
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executado em um processo novo, com torch e TTS bloqueados em sys.modules
+_SCRIPT = """
+import sys
+sys.modules["torch"] = None
+sys.modules["TTS"] = None
+from core.tts_engine import TTSEngine
+
+engine = TTSEngine(conditioning_cache_dir=None, result_cache_dir=None, phoneme_cache_path=None,
+                   phonemizer_workers=0, thread_tuning_path=None, onnx_models_dir=sys.argv[1])
+assert engine.load_model("VITS", "pt-br", backend="onnx")
+chunk = engine.synthesize("Olá mundo. Tudo bem?")
+print(len(chunk.audio), chunk.sample_rate)
+"""
+
+
+def _export_dummy_vits(model_dir: str):
+    """Grafo com a mesma interface do VITS exportado: a saída é o próprio id de cada token"""
+    graph = helper.make_graph(
+        [helper.make_node("Cast", ["input"], ["output"], to=TensorProto.FLOAT)],
+        "vits",
+        [
+            helper.make_tensor_value_info("input", TensorProto.INT64, [1, None]),
+            helper.make_tensor_value_info("input_lengths", TensorProto.INT64, [1]),
+            helper.make_tensor_value_info("scales", TensorProto.FLOAT, [3]),
+        ],
+        [helper.make_tensor_value_info("output", TensorProto.FLOAT, [1, None])],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    os.makedirs(model_dir)
+    onnx.save(model, os.path.join(model_dir, "model.onnx"))
+    with open(os.path.join(model_dir, "model.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "type": "vits",
+            "model_name": "tts_models/pt/cv/vits",
+            "sample_rate": 22050,
+            "characters": list("_ abcdefghijklmnopqrstuvwxyzáãçéêíóõú.,?!"),
+            "text_cleaner": "basic_cleaners",
+            "use_phonemes": False,
+            "add_blank": False,
+            "use_eos_bos": False,
+            "scales": [0.667, 1.0, 0.8],
+        }, f)
+
+
+def test_onnx_synthesis_without_torch(tmp_path):
+    _export_dummy_vits(str(tmp_path / "tts_models--pt--cv--vits"))
+    result = subprocess.run([sys.executable, "-c", _SCRIPT, str(tmp_path)], cwd=REPO_ROOT,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    samples, sample_rate = map(int, result.stdout.split()[-2:])
+    assert sample_rate == 22050
+    # Duas sentenças: um valor por caractere e o silêncio após cada sentença
+    assert samples == len("olá mundo.") + len("tudo bem?") + 2 * 10000
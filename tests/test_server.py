@@ -0,0 +1,44 @@
+import threading
+import time
+
+import numpy as np
+
+from core.server import MicroBatchDispatcher, SynthesisRequest
+from core.tts_engine import AudioChunk
+
+
+class _SlowSingleEngine:
+    """Engine falso: a síntese individual bloqueia até ser liberada; lotes são imediatos"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def _synthesize_cached(self, text, speaker_wav, language, model_name, speed=1.0, sampling_params=None):
+        self.release.wait(10)
+        return np.zeros(10, dtype=np.float32), 22050
+
+    def generate_batch(self, texts, language=None, model_name=None):
+        return [AudioChunk(audio=np.zeros(10, dtype=np.float32), sample_rate=22050, index=i, text=text)
+                for i, text in enumerate(texts)]
+
+
+def test_slow_single_request_does_not_delay_batches():
+    engine = _SlowSingleEngine()
+    dispatcher = MicroBatchDispatcher(engine, window_ms=20)
+    dispatcher.start()
+    try:
+        single = dispatcher.submit(SynthesisRequest(text="clonada", speaker_wav="voz.wav"))
+        first = [dispatcher.submit(SynthesisRequest(text=f"lote {i}")) for i in range(2)]
+        # Lote que chega depois, em uma nova janela
+        time.sleep(0.05)
+        later = dispatcher.submit(SynthesisRequest(text="depois"))
+
+        for future in first + [later]:
+            chunk, batch_size = future.result(timeout=2)
+            assert chunk.sample_rate == 22050
+        assert [f.result()[1] for f in first] == [2, 2]
+        assert not single.done()
+    finally:
+        engine.release.set()
+        assert single.result(timeout=5)[1] == 1
+        dispatcher.stop()
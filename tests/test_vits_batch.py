@@ -0,0 +1,40 @@
+import types
+
+import numpy as np
+import pytest
+import torch
+
+pytest.importorskip("TTS")
+
+from TTS.tts.configs.vits_config import VitsConfig
+from TTS.tts.models.vits import Vits, VitsArgs
+
+from core.tts_engine import TTSEngine
+
+
+@pytest.fixture(scope="module")
+def model():
+    """VITS pequeno com pesos aleatórios e inferência determinística (sem ruído)"""
+    args = VitsArgs(hidden_channels=32, hidden_channels_ffn_text_encoder=64, num_heads_text_encoder=2,
+                    num_layers_text_encoder=2, upsample_initial_channel_decoder=32, num_layers_flow=2,
+                    num_layers_posterior_encoder=2)
+    config = VitsConfig(model_args=args, use_phonemes=False, text_cleaner="basic_cleaners")
+    torch.manual_seed(0)
+    vits = Vits.init_from_config(config)
+    vits.eval()
+    vits.inference_noise_scale = 0.0
+    vits.inference_noise_scale_dp = 0.0
+    synthesizer = types.SimpleNamespace(tts_model=vits, tts_config=config)
+    return types.SimpleNamespace(synthesizer=synthesizer, is_multi_speaker=False, is_multi_lingual=False)
+
+
+def test_batched_vits_matches_single_item(model):
+    engine = TTSEngine(conditioning_cache_dir=None, result_cache_dir=None, phoneme_cache_path=None,
+                       phonemizer_workers=0, thread_tuning_path=None)
+    sentences = ["ola.", "ola mundo, tudo bem com voce hoje?", "uma frase de tamanho medio."]
+    batched = engine._vits_batch_inference(model, sentences)
+    for sentence, wav in zip(sentences, batched):
+        single = engine._vits_batch_inference(model, [sentence])[0]
+        assert len(wav) == len(single)
+        peak = np.abs(single).max()
+        assert np.abs(wav - single).max() <= 1e-4 * peak